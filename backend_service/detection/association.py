@@ -0,0 +1,82 @@
+"""
+Vectorized rider/helmet/plate association.
+
+Every helmet and plate is assigned to the rider box that contains the largest fraction of it, using containment
+matrices computed in one NumPy pass instead of nested loops over detections. A rider without an assigned helmet is a
+violation; its assigned plate (if any) is the one to crop and read.
+
+Usage:
+    riders, helmets, plates = associate_riders(boxes, cls, names)
+    for r, pl in zip(riders[helmets < 0], plates[helmets < 0]):  # riders without a helmet
+        crop = crop_box(im0, boxes[pl]) if pl >= 0 else None
+"""
+
+import numpy as np
+
+RIDER_NAMES = ("rider",)
+HELMET_NAMES = ("helmet",)
+PLATE_NAMES = ("license-plate", "plate", "number-plate")
+
+
+def containment(inner, outer):
+    """Returns the (len(inner), len(outer)) matrix of the fraction of each inner box's area inside each outer box."""
+    tl = np.maximum(inner[:, None, :2], outer[None, :, :2])
+    br = np.minimum(inner[:, None, 2:4], outer[None, :, 2:4])
+    inter = np.prod(np.clip(br - tl, 0, None), axis=2)
+    area = np.prod(np.clip(inner[:, 2:4] - inner[:, :2], 0, None), axis=1)
+    return inter / (area[:, None] + 1e-9)
+
+
+def class_ids(names, wanted):
+    """Returns the class indices whose name is in `wanted`; `names` is a list or an {index: name} dict."""
+    items = names.items() if isinstance(names, dict) else enumerate(names)
+    return np.array([k for k, v in items if v in wanted], dtype=int)
+
+
+def _assign(boxes, parts, riders, thres):
+    """
+    Assigns each part (helmet or plate) to the rider that best contains it and returns, per rider, the detection
+    index of its best part, or -1 if none reaches `thres`.
+    """
+    best = np.full(len(riders), -1, dtype=int)
+    if not len(parts) or not len(riders):
+        return best
+    m = containment(boxes[parts], boxes[riders])  # (parts, riders)
+    owner = m.argmax(axis=1)
+    m = np.where(np.arange(len(riders))[None, :] == owner[:, None], m, 0.0)  # each part belongs to one rider only
+    score = m.max(axis=0)
+    found = score >= thres
+    best[found] = parts[m.argmax(axis=0)[found]]
+    return best
+
+
+def associate_riders(boxes, cls, names, contain_thres=0.6):
+    """
+    Associates helmets and plates with riders.
+
+    Args:
+        boxes: (n, 4) xyxy boxes in image coordinates.
+        cls: (n,) class indices.
+        names: model class names, list or {index: name} dict.
+        contain_thres: minimum fraction of a helmet/plate box that must lie inside a rider box.
+
+    Returns:
+        (riders, helmets, plates) int arrays of equal length, one entry per rider: the rider's detection index and
+        the detection index of its helmet and plate, or -1 where none was found.
+    """
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    cls = np.asarray(cls).astype(int).reshape(-1)
+    riders = np.flatnonzero(np.isin(cls, class_ids(names, RIDER_NAMES)))
+    helmets = np.flatnonzero(np.isin(cls, class_ids(names, HELMET_NAMES)))
+    plates = np.flatnonzero(np.isin(cls, class_ids(names, PLATE_NAMES)))
+
+    return riders, _assign(boxes, helmets, riders, contain_thres), _assign(boxes, plates, riders, contain_thres)
+
+
+def crop_box(im, box, pad=0):
+    """Returns the in-memory crop of xyxy `box` from HWC image `im`, clipped to the image (a view, not a copy)."""
+    h, w = im.shape[:2]
+    x1, y1, x2, y2 = (int(round(float(v))) for v in box)
+    x1, y1 = max(x1 - pad, 0), max(y1 - pad, 0)
+    x2, y2 = min(x2 + pad, w), min(y2 + pad, h)
+    return im[y1:y2, x1:x2]
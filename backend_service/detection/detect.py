@@ -34,6 +34,7 @@ import os
 import platform
 import sys
 import shutil
+import time
 import glob
 from pathlib import Path
 
@@ -67,28 +68,14 @@ from utils.general import (
 )
 from utils.torch_utils import select_device, smart_inference_mode
 
-
-def cleanup_temp_files():
-    """Clean up temporary files in the outputs/temp directory."""
-    temp_dir = Path("outputs/temp")
-    if temp_dir.exists():
-        # Remove all files in temp directory
-        for file_path in temp_dir.glob("*"):
-            if file_path.is_file():
-                try:
-                    file_path.unlink()
-                    LOGGER.info(f"Cleaned up temporary file: {file_path}")
-                except Exception as e:
-                    LOGGER.warning(f"Could not remove temporary file {file_path}: {e}")
-        
-        # Remove empty subdirectories
-        for dir_path in temp_dir.glob("*/"):
-            if dir_path.is_dir() and not any(dir_path.iterdir()):
-                try:
-                    dir_path.rmdir()
-                    LOGGER.info(f"Cleaned up empty temporary directory: {dir_path}")
-                except Exception as e:
-                    LOGGER.warning(f"Could not remove temporary directory {dir_path}: {e}")
+from dir_watch import DirectoryWatcher, WatchImages
+from janitor import Janitor, load_settings
+from manifest import Manifest, config_fingerprint, file_key, prune_csv
+from motion_gate import GATE_METHODS, MotionGate
+from output_writer import CROP_FORMATS, AsyncWriter
+from profiler import StageProfiler
+from tracker import BestShot, Tracker
+from video_pipeline import VideoPipeline
 
 
 @smart_inference_mode()
@@ -121,6 +108,24 @@ def run(
     half=False,  # use FP16 half-precision inference
     dnn=False,  # use OpenCV DNN for ONNX inference
     vid_stride=1,  # video frame-rate stride
+    writer_threads=2,  # number of background image/video writer threads
+    writer_queue=64,  # pending writes per writer thread before inference blocks
+    save_quality=95,  # JPEG/WebP encode quality (0-100) for saved images and crops
+    crop_format="jpg",  # file format for --save-crop: jpg, png or webp
+    video_fourcc="mp4v",  # fourcc codec for saved videos
+    pipeline=False,  # overlap decode, inference and encode in separate threads for video files
+    pipeline_batch=4,  # frames per inference batch in --pipeline mode
+    drop_frames=False,  # drop decoded frames when inference falls behind in --pipeline mode
+    motion_gate=None,  # skip inference on unchanged video/stream frames: 'diff' or 'mog2'
+    motion_thres=0.005,  # fraction of changed thumbnail pixels that triggers inference
+    motion_refresh=30,  # force inference every N frames while gated, 0 to disable
+    track=False,  # track objects in video/stream sources and save crops/CSV rows once per track
+    track_max_age=30,  # frames a track survives without a matching detection
+    track_min_hits=3,  # matched frames before a track is confirmed
+    watch=False,  # keep running and process new images as they land in the --source directory
+    watch_poll=False,  # poll the directory instead of using inotify (e.g. for network shares)
+    manifest=None,  # JSONL record of processed inputs; skips completed inputs on re-runs, default with --watch
+    profile=False,  # record per-frame stage timings, export profile_trace.json and profile.csv to save_dir
 ):
     source = str(source)
     save_img = not nosave and not source.endswith(".txt")  # save inference images
@@ -130,6 +135,7 @@ def run(
     screenshot = source.lower().startswith("screen")
     if is_url and is_file:
         source = check_file(source)  # download
+    source_is_dir = Path(source).is_dir()
 
     # Directories
     save_dir = increment_path(Path(project) / name, exist_ok=exist_ok)  # increment run
@@ -152,6 +158,27 @@ def run(
     stride, names, pt = model.stride, model.names, model.pt
     imgsz = check_img_size(imgsz, s=stride)  # check image size
 
+    # Processed-input manifest, so interrupted batch runs and --watch resume where they stopped
+    if (manifest or watch) and not (webcam or screenshot):
+        fingerprint = config_fingerprint(
+            weights=weights,
+            imgsz=imgsz,
+            conf_thres=conf_thres,
+            iou_thres=iou_thres,
+            classes=classes,
+            agnostic_nms=agnostic_nms,
+            max_det=max_det,
+            augment=augment,
+            save_txt=save_txt,
+            save_crop=save_crop,
+            crop_format=crop_format,
+            nosave=nosave,
+            track=track,
+        )
+        manifest = Manifest(manifest or save_dir / "manifest.jsonl", fingerprint)
+    else:
+        manifest = None
+
     # Dataloader
     bs = 1  # batch_size
     if webcam:
@@ -160,15 +187,40 @@ def run(
         bs = len(dataset)
     elif screenshot:
         dataset = LoadScreenshots(source, img_size=imgsz, stride=stride, auto=pt)
+    elif watch:
+        Janitor(**load_settings()).start()  # long-running, so keep outputs/ within retention and quota in-process
+        watcher = DirectoryWatcher(source, manifest, poll=watch_poll)
+        dataset = WatchImages(watcher, img_size=imgsz, stride=stride, auto=pt)
+        todo = manifest.pending(sorted(f for f in Path(source).iterdir() if f.is_file()))
     else:
         dataset = LoadImages(source, img_size=imgsz, stride=stride, auto=pt, vid_stride=vid_stride)
-    vid_path, vid_writer = [None] * bs, [None] * bs
+        if manifest:
+            todo = manifest.pending(dataset.files)
+            LOGGER.info(f"{len(dataset.files) - len(todo)}/{len(dataset.files)} inputs already done in {manifest.path}")
+            if not todo:
+                return
+            if len(todo) < len(dataset.files):
+                dataset = LoadImages(todo, img_size=imgsz, stride=stride, auto=pt, vid_stride=vid_stride)
+    if manifest and save_csv:  # rows of inputs cut short by an interrupted run are rewritten when they are redone
+        n = prune_csv(save_dir / "predictions.csv", {Path(f).name for f in todo})
+        if n:
+            LOGGER.info(f"Removed {n} CSV rows of unfinished inputs that are processed again")
+    vid_path, vid_meta = [None] * bs, [None] * bs  # per-stream (save path, fps, size) of the current video
+    prof = StageProfiler(enabled=profile)
+    writer = AsyncWriter(
+        writer_threads, writer_queue, quality=save_quality, crop_format=crop_format, fourcc=video_fourcc, profiler=prof
+    )
 
     # Run inference
     model.warmup(imgsz=(1 if pt or model.triton else bs, 3, *imgsz))  # warmup
     seen, windows, dt = 0, [], (Profile(device=device), Profile(device=device), Profile(device=device))
-    for path, im, im0s, vid_cap, s in dataset:
-        with dt[0]:
+
+    def infer(im, ids, visualize=False):
+        """
+        Runs pre-process, inference and NMS on a uint8 CHW image or BCHW batch; returns per-image detections. `ids` are
+        the profiler frame ids of the images, which label the batch's stages in the trace.
+        """
+        with prof.stage("pre", ids), dt[0]:
             im = torch.from_numpy(im).to(model.device)
             im = im.half() if model.fp16 else im.float()  # uint8 to fp16/32
             im /= 255  # 0 - 255 to 0.0 - 1.0
@@ -178,8 +230,7 @@ def run(
                 ims = torch.chunk(im, im.shape[0], 0)
 
         # Inference
-        with dt[1]:
-            visualize = increment_path(save_dir / "inference_results", mkdir=True) if visualize else False
+        with prof.stage("infer", ids), dt[1]:
             if model.xml and im.shape[0] > 1:
                 pred = None
                 for image in ims:
@@ -191,109 +242,270 @@ def run(
             else:
                 pred = model(im, augment=augment, visualize=visualize)
         # NMS
-        with dt[2]:
+        with prof.stage("nms", ids), dt[2]:
             pred = non_max_suppression(pred, conf_thres, iou_thres, classes, agnostic_nms, max_det=max_det)
-            
 
         # Second-stage classifier (optional)
         # pred = utils.general.apply_classifier(pred, classifier_model, im, im0s)
-
-        # Define the path for the CSV file
-        csv_path = save_dir / "predictions.csv"
-
-        # Create or append to the CSV file
-        def write_to_csv(image_name, prediction, confidence):
-            data = {"Image Name": image_name, "Prediction": prediction, "Confidence": confidence}
-            with open(csv_path, mode="a", newline="") as f:
-                writer = csv.DictWriter(f, fieldnames=data.keys())
-                if not csv_path.is_file():
-                    writer.writeheader()
-                writer.writerow(data)
-
-        # Process predictions
-        for i, det in enumerate(pred):  # per image
-            seen += 1
-            if webcam:  # batch_size >= 1
-                p, im0, frame = path[i], im0s[i].copy(), dataset.count
-                s += f"{i}: "
-            else:
-                p, im0, frame = path, im0s.copy(), getattr(dataset, "frame", 0)
-
-            p = Path(p)  # to Path
-            save_path = str(save_dir / Path(source).name)  # Use the name of the uploaded image
-
-            txt_path = str(save_dir / "labels" / p.stem) + ("" if dataset.mode == "image" else f"_{frame}")  # im.txt
-            s += "%gx%g " % im.shape[2:]  # print string
-            gn = torch.tensor(im0.shape)[[1, 0, 1, 0]]  # normalization gain whwh
-            imc = im0.copy() if save_crop else im0  # for save_crop
-            annotator = Annotator(im0, line_width=line_thickness, example=str(names))
-            if len(det):
-                # Rescale boxes from img_size to im0 size
-                det[:, :4] = scale_boxes(im.shape[2:], det[:, :4], im0.shape).round()
-
-                # Print results
-                for c in det[:, 5].unique():
-                    n = (det[:, 5] == c).sum()  # detections per class
-                    s += f"{n} {names[int(c)]}{'s' * (n > 1)}, "  # add to string
-
-                # Write results
-                for *xyxy, conf, cls in reversed(det):
+        return pred
+
+    # Define the path for the CSV file
+    csv_path = save_dir / "predictions.csv"
+
+    # Create or append to the CSV file
+    def write_to_csv(image_name, prediction, confidence):
+        data = {"Image Name": image_name, "Prediction": prediction, "Confidence": confidence}
+        new_file = not csv_path.is_file()
+        with open(csv_path, mode="a", newline="") as f:
+            csv_writer = csv.DictWriter(f, fieldnames=data.keys())
+            if new_file:
+                csv_writer.writeheader()
+            csv_writer.writerow(data)
+
+    trackers = [None] * bs if track else None  # per-stream Tracker, created on the first frame of each source
+    track_src, best_shots = [None] * bs, [BestShot() for _ in range(bs)]
+
+    def finish_tracks(p, shots):
+        """Writes the best crop and CSV row of each finished track of source `p`."""
+        p = Path(p)
+        for tid, shot in shots:
+            if shot["crop"] is not None:
+                writer.save_crop(Path("outputs/crops") / shot["name"] / f"{p.stem}_track{tid}", shot["crop"])
+            if save_csv:
+                write_to_csv(p.name, shot["name"], f"{shot['conf']:.2f}")
+
+    def process(i, p, im0, det, im_shape, frame, mode, vid_cap, s="", trace_id=None):
+        """
+        Rescales, annotates and saves the detections of image `i` of a batch; returns the updated log string. `trace_id`
+        labels its stages in the profile and defaults to the running image count.
+        """
+        nonlocal seen
+        seen += 1
+        trace_id = seen if trace_id is None else trace_id
+        t = time.perf_counter()
+        p = Path(p)  # to Path
+        name = p.name if source_is_dir else Path(source).name  # one output per file for directory sources
+        save_path = str(save_dir / name)  # Use the name of the uploaded image
+
+        txt_path = str(save_dir / "labels" / p.stem) + ("" if mode == "image" else f"_{frame}")  # im.txt
+        if manifest and save_txt:
+            Path(f"{txt_path}.txt").unlink(missing_ok=True)  # labels are appended, start clean when re-processing
+        s += "%gx%g " % tuple(im_shape)  # print string
+        gn = torch.tensor(im0.shape)[[1, 0, 1, 0]]  # normalization gain whwh
+        imc = im0.copy() if save_crop else im0  # for save_crop
+        annotator = Annotator(im0, line_width=line_thickness, example=str(names))
+        boxes = []  # (xyxy, label, color) drawn after post-processing
+        if len(det):
+            # Rescale boxes from img_size to im0 size
+            det[:, :4] = scale_boxes(im_shape, det[:, :4], im0.shape).round()
+
+        # Track objects across frames so crops and CSV rows are written once per track
+        tracker = None
+        if trackers is not None and mode != "image":
+            if track_src[i] != p:  # new video or stream source
+                if trackers[i] is not None:
+                    finish_tracks(track_src[i], best_shots[i].pop(trackers[i].flush()))
+                trackers[i], track_src[i] = Tracker(max_age=track_max_age, min_hits=track_min_hits), p
+            tracker = trackers[i]
+            track_ids = tracker.update(det[:, :6].cpu().numpy())[::-1]  # aligned with reversed(det)
+            finish_tracks(p, best_shots[i].pop(tracker.finished))
+        else:
+            track_ids = [-1] * len(det)
+
+        if len(det):
+            # Print results
+            for c in det[:, 5].unique():
+                n = (det[:, 5] == c).sum()  # detections per class
+                s += f"{n} {names[int(c)]}{'s' * (n > 1)}, "  # add to string
+
+            # Write results
+            for (*xyxy, conf, cls), tid in zip(reversed(det), track_ids):
+                c = int(cls)  # integer class
+                label = names[c] if hide_conf else f"{names[c]}"
+                confidence = float(conf)
+                confidence_str = f"{confidence:.2f}"
+
+                if save_csv and tracker is None:
+                    write_to_csv(p.name, label, confidence_str)
+
+                if save_txt:  # Write to file
+                    xywh = (xyxy2xywh(torch.tensor(xyxy).view(1, 4)) / gn).view(-1).tolist()  # normalized xywh
+                    line = (cls, *xywh, conf) if save_conf else (cls, *xywh)  # label format
+                    with open(f"{txt_path}.txt", "a") as f:
+                        f.write(("%g " * len(line)).rstrip() % line + "\n")
+
+                if save_img or save_crop or view_img:  # Add bbox to image
                     c = int(cls)  # integer class
-                    label = names[c] if hide_conf else f"{names[c]}"
-                    confidence = float(conf)
-                    confidence_str = f"{confidence:.2f}"
-
-                    if save_csv:
-                        write_to_csv(p.name, label, confidence_str)
-
-                    if save_txt:  # Write to file
-                        xywh = (xyxy2xywh(torch.tensor(xyxy).view(1, 4)) / gn).view(-1).tolist()  # normalized xywh
-                        line = (cls, *xywh, conf) if save_conf else (cls, *xywh)  # label format
-                        with open(f"{txt_path}.txt", "a") as f:
-                            f.write(("%g " * len(line)).rstrip() % line + "\n")
-
-                    if save_img or save_crop or view_img:  # Add bbox to image
-                        c = int(cls)  # integer class
-                        label = None if hide_labels else (names[c] if hide_conf else f"{names[c]} {conf:.2f}")
-                        annotator.box_label(xyxy, label, color=colors(c, True))
-                    if save_crop:
-                        crop_dir = Path("outputs/crops") / names[c]
-                        crop_dir.mkdir(parents=True, exist_ok=True)
-                        save_one_box(xyxy, imc, file=crop_dir / f"{p.stem}.jpg", BGR=True)
-
-            # Stream results
-            im0 = annotator.result()
-            if view_img:
-                if platform.system() == "Linux" and p not in windows:
-                    windows.append(p)
-                    cv2.namedWindow(str(p), cv2.WINDOW_NORMAL | cv2.WINDOW_KEEPRATIO)  # allow window resize (Linux)
-                    cv2.resizeWindow(str(p), im0.shape[1], im0.shape[0])
-                cv2.imshow(str(p), im0)
-                cv2.waitKey(1)  # 1 millisecond
-
-            # Save results (image with detections)
-            if save_img:
-                if dataset.mode == "image":
-                    cv2.imwrite(save_path, im0)
-                else:  # 'video' or 'stream'
-                    if vid_path[i] != save_path:  # new video
-                        vid_path[i] = save_path
-                        if isinstance(vid_writer[i], cv2.VideoWriter):
-                            vid_writer[i].release()  # release previous video writer
-                        if vid_cap:  # video
-                            fps = vid_cap.get(cv2.CAP_PROP_FPS)
-                            w = int(vid_cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-                            h = int(vid_cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-                        else:  # stream
-                            fps, w, h = 30, im0.shape[1], im0.shape[0]
-                        # Save videos to outputs/videos directory
-                        video_save_path = Path("outputs/videos") / Path(save_path).name
-                        save_path = str(video_save_path.with_suffix(".mp4"))  # force *.mp4 suffix on results videos
-                        vid_writer[i] = cv2.VideoWriter(save_path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (w, h))
-                    vid_writer[i].write(im0)
-
-        # Print time (inference-only)
-        LOGGER.info(f"{s}{'' if len(det) else '(no detections), '}{dt[1].dt * 1E3:.1f}ms")
+                    label = None if hide_labels else (names[c] if hide_conf else f"{names[c]} {conf:.2f}")
+                    if label and tid >= 0:
+                        label += f" #{tid}"
+                    boxes.append((xyxy, label, colors(c, True)))
+                if tracker is not None:
+                    if tid >= 0 and (save_crop or save_csv):  # keep the largest, most confident view of each track
+                        score = confidence * float((xyxy[2] - xyxy[0]) * (xyxy[3] - xyxy[1]))
+                        best_shots[i].offer(
+                            tid,
+                            score,
+                            lambda: {
+                                "name": names[c],
+                                "conf": confidence,
+                                "crop": save_one_box(xyxy, imc, BGR=True, save=False).copy() if save_crop else None,
+                            },
+                        )
+                elif save_crop:
+                    crop = save_one_box(xyxy, imc, BGR=True, save=False)
+                    writer.save_crop(Path("outputs/crops") / names[c] / p.stem, crop)
+
+        t = prof.lap("post", t, trace_id)
+
+        # Stream results
+        for xyxy, label, color in boxes:
+            annotator.box_label(xyxy, label, color=color)
+        im0 = annotator.result()
+        if view_img:
+            if platform.system() == "Linux" and p not in windows:
+                windows.append(p)
+                cv2.namedWindow(str(p), cv2.WINDOW_NORMAL | cv2.WINDOW_KEEPRATIO)  # allow window resize (Linux)
+                cv2.resizeWindow(str(p), im0.shape[1], im0.shape[0])
+            cv2.imshow(str(p), im0)
+            cv2.waitKey(1)  # 1 millisecond
+        t = prof.lap("annotate", t, trace_id)
+
+        # Save results (image with detections)
+        if save_img:
+            if mode == "image":
+                writer.imwrite(save_path, im0)
+            else:  # 'video' or 'stream'
+                if vid_path[i] != save_path:  # new video
+                    vid_path[i] = save_path
+                    if vid_cap:  # video
+                        fps = vid_cap.get(cv2.CAP_PROP_FPS)
+                        w = int(vid_cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+                        h = int(vid_cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+                    else:  # stream
+                        fps, w, h = 30, im0.shape[1], im0.shape[0]
+                    # Save videos to outputs/videos directory
+                    video_save_path = Path("outputs/videos") / Path(save_path).name
+                    save_path = str(video_save_path.with_suffix(".mp4"))  # force *.mp4 suffix on results videos
+                    vid_meta[i] = (save_path, fps, (w, h))
+                video_path, fps, size = vid_meta[i]
+                writer.write_video(i, video_path, im0, fps, size)
+        prof.lap("write", t, trace_id)  # includes waiting for a full writer queue
+        return s
+
+    input_keys = {}  # input path -> (size, mtime_ns) when it was read, recorded in the manifest once it is done
+
+    def input_read(p):
+        """Captures the identity of input `p` as it is read, so later moves or rewrites don't change what is marked."""
+        if str(p) not in input_keys:
+            try:
+                input_keys[str(p)] = file_key(p)
+            except FileNotFoundError:  # already gone, nothing to mark
+                input_keys[str(p)] = None
+
+    def input_done(i, p, mode):
+        """Finalizes the outputs of input `p` on stream `i` and records it in the manifest once they are on disk."""
+        if mode != "image":
+            if trackers is not None and trackers[i] is not None:
+                finish_tracks(track_src[i], best_shots[i].pop(trackers[i].flush()))
+                trackers[i] = track_src[i] = None
+            if vid_path[i] is not None:
+                writer.release_video(i)
+                vid_path[i] = None
+        key = input_keys.pop(str(p), None)
+        if key is not None:
+            writer.barrier(lambda: manifest.mark(p, key))
+
+    gate = MotionGate(motion_gate, threshold=motion_thres, refresh=motion_refresh) if motion_gate else None
+    videos = [f for f, v in zip(getattr(dataset, "files", []), getattr(dataset, "video_flag", [])) if v]
+    if pipeline and videos and len(videos) == dataset.nf:
+        # Decode, batched inference and encode overlap in separate stages
+        view_img = False  # cv2.imshow is not safe off the main thread
+        for video in videos:
+            pipe = VideoPipeline(
+                video,
+                imgsz,
+                stride,
+                auto=pt,
+                vid_stride=vid_stride,
+                batch_size=pipeline_batch,
+                drop_frames=drop_frames,
+                gate=gate,
+                profiler=prof,
+            )
+            if manifest:
+                input_read(video)
+            # stages are labelled with the frame number each work item carries, the counter runs on another thread
+            pipe.run(
+                infer,
+                lambda frame, im0, det, im_shape: process(
+                    0, video, im0, det, im_shape, frame, "video", pipe, trace_id=frame
+                ),
+            )
+            LOGGER.info(pipe.summary())
+            if manifest:
+                input_done(0, video, "video")
+    else:
+        if pipeline:
+            LOGGER.warning("WARNING ⚠️ --pipeline only applies to video file sources, using sequential processing")
+        last_pred = None  # detections of the last inferred batch, reused for motion-gated frames
+        open_inputs = [None] * bs  # video in progress per stream, done when the source changes or the stream ends
+        t_load = time.perf_counter()
+        for path, im, im0s, vid_cap, s in dataset:
+            ids = range(seen + 1, seen + 1 + (len(im0s) if webcam else 1))  # images of this batch, as process() counts
+            prof.lap("load", t_load, ids)
+            if gate and dataset.mode != "image":
+                keys, frames = (path, im0s) if webcam else ([path], [im0s])
+                changed = any([gate.changed(k, f) for k, f in zip(keys, frames)])  # list so every stream updates
+            else:
+                changed = True
+            if changed or last_pred is None:
+                vis = increment_path(save_dir / "inference_results", mkdir=True) if visualize else False
+                pred = infer(im, ids, vis)
+                if gate:
+                    last_pred = [d.clone() for d in pred]  # process() rescales boxes in place
+            else:
+                pred = [d.clone() for d in last_pred]
+                s += "(motion-gated) "
+
+            # Process predictions
+            for i, det in enumerate(pred):  # per image
+                if webcam:  # batch_size >= 1
+                    p, im0, frame = path[i], im0s[i].copy(), dataset.count
+                    s += f"{i}: "
+                else:
+                    p, im0, frame = path, im0s.copy(), getattr(dataset, "frame", 0)
+                if manifest:
+                    if open_inputs[i] not in (None, p):  # the previous video ended, its frame count is not reliable
+                        input_done(i, open_inputs[i], "video")
+                        open_inputs[i] = None
+                    input_read(p)
+                s = process(i, p, im0, det, im.shape[-2:], frame, dataset.mode, vid_cap, s)
+                if manifest:
+                    if dataset.mode == "image":
+                        input_done(i, p, "image")
+                    else:
+                        open_inputs[i] = p
+
+            # Print time (inference-only)
+            LOGGER.info(f"{s}{'' if len(det) else '(no detections), '}{dt[1].dt * 1E3:.1f}ms")
+            t_load = time.perf_counter()
+        for i, p in enumerate(open_inputs):  # end of the stream
+            if p is not None:
+                input_done(i, p, "video")
+
+    for i, tracker in enumerate(trackers or []):
+        if tracker is not None:
+            finish_tracks(track_src[i], best_shots[i].pop(tracker.flush()))
+    writer.close()  # drain pending image/video writes
+    if manifest:
+        manifest.close()
+    if gate:
+        LOGGER.info(gate.summary())
+    if writer.stalls:
+        LOGGER.info(f"Output writer queue was full {writer.stalls} times, consider more --writer-threads")
+    if profile:
+        prof.export(save_dir)
 
     # Print results
     t = tuple(x.t / seen * 1e3 for x in dt)  # speeds per image
@@ -303,9 +515,6 @@ def run(
         LOGGER.info(f"Results saved to {colorstr('bold', save_dir)}{s}")
     if update:
         strip_optimizer(weights[0])  # update model (to fix SourceChangeWarning)
-    
-    # Cleanup temporary files
-    cleanup_temp_files()
 
 
 def parse_opt():
@@ -340,6 +549,24 @@ def parse_opt():
     parser.add_argument("--half", action="store_true", help="use FP16 half-precision inference")
     parser.add_argument("--dnn", action="store_true", help="use OpenCV DNN for ONNX inference")
     parser.add_argument("--vid-stride", type=int, default=1, help="video frame-rate stride")
+    parser.add_argument("--writer-threads", type=int, default=2, help="background image/video writer threads")
+    parser.add_argument("--writer-queue", type=int, default=64, help="pending writes per writer thread")
+    parser.add_argument("--save-quality", type=int, default=95, help="JPEG/WebP quality for saved images and crops")
+    parser.add_argument("--crop-format", default="jpg", choices=CROP_FORMATS, help="file format for --save-crop")
+    parser.add_argument("--video-fourcc", default="mp4v", help="fourcc codec for saved videos")
+    parser.add_argument("--pipeline", action="store_true", help="decode/infer/encode video files in parallel stages")
+    parser.add_argument("--pipeline-batch", type=int, default=4, help="frames per inference batch in --pipeline mode")
+    parser.add_argument("--drop-frames", action="store_true", help="drop frames to keep up with real time in --pipeline")
+    parser.add_argument("--motion-gate", choices=GATE_METHODS, help="skip inference on unchanged video/stream frames")
+    parser.add_argument("--motion-thres", type=float, default=0.005, help="changed-pixel fraction that triggers inference")
+    parser.add_argument("--motion-refresh", type=int, default=30, help="force inference every N gated frames, 0 disables")
+    parser.add_argument("--track", action="store_true", help="track objects and save crops/CSV rows once per track")
+    parser.add_argument("--track-max-age", type=int, default=30, help="frames a lost track is kept before it ends")
+    parser.add_argument("--track-min-hits", type=int, default=3, help="matched frames before a track is confirmed")
+    parser.add_argument("--watch", action="store_true", help="process new images landing in the --source directory")
+    parser.add_argument("--watch-poll", action="store_true", help="poll for new files instead of using inotify")
+    parser.add_argument("--manifest", help="processed-input manifest (JSONL) to resume interrupted runs")
+    parser.add_argument("--profile", action="store_true", help="export per-frame stage timings (Chrome trace + CSV)")
     opt = parser.parse_args()
     opt.imgsz *= 2 if len(opt.imgsz) == 1 else 1  # expand
     print_args(vars(opt))
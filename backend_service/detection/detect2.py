@@ -69,29 +69,6 @@ from utils.general import (
 from utils.torch_utils import select_device, smart_inference_mode
 
 
-def cleanup_temp_files():
-    """Clean up temporary files in the outputs/temp directory."""
-    temp_dir = Path("outputs/temp")
-    if temp_dir.exists():
-        # Remove all files in temp directory
-        for file_path in temp_dir.glob("*"):
-            if file_path.is_file():
-                try:
-                    file_path.unlink()
-                    LOGGER.info(f"Cleaned up temporary file: {file_path}")
-                except Exception as e:
-                    LOGGER.warning(f"Could not remove temporary file {file_path}: {e}")
-        
-        # Remove empty subdirectories
-        for dir_path in temp_dir.glob("*/"):
-            if dir_path.is_dir() and not any(dir_path.iterdir()):
-                try:
-                    dir_path.rmdir()
-                    LOGGER.info(f"Cleaned up empty temporary directory: {dir_path}")
-                except Exception as e:
-                    LOGGER.warning(f"Could not remove temporary directory {dir_path}: {e}")
-
-
 @smart_inference_mode()
 def run(
     weights=Path(__file__).parent.parent.parent / "data" / "models" / "1500img.pt",  # model path or triton URL
@@ -304,9 +281,6 @@ def run(
         LOGGER.info(f"Results saved to {colorstr('bold', save_dir)}{s}")
     if update:
         strip_optimizer(weights[0])  # update model (to fix SourceChangeWarning)
-    
-    # Cleanup temporary files
-    cleanup_temp_files()
 
 
 def parse_opt():
@@ -13,8 +13,6 @@ if str(ROOT) not in sys.path:
 
 import torch
 import cv2
-from PIL import Image
-
 
 from models.common import DetectMultiBackend
 from utils.dataloaders import IMG_FORMATS, VID_FORMATS, LoadImages, LoadScreenshots, LoadStreams
@@ -36,43 +34,10 @@ from utils.general import (
 from utils.torch_utils import select_device, smart_inference_mode
 from ultralytics.utils.plotting import Annotator, colors, save_one_box
 
-def cleanup_temp_files():
-    """Clean up temporary files in the outputs/temp directory."""
-    temp_dir = Path("outputs/temp")
-    if temp_dir.exists():
-        # Remove all files in temp directory
-        for file_path in temp_dir.glob("*"):
-            if file_path.is_file():
-                try:
-                    file_path.unlink()
-                    LOGGER.info(f"Cleaned up temporary file: {file_path}")
-                except Exception as e:
-                    LOGGER.warning(f"Could not remove temporary file {file_path}: {e}")
-        
-        # Remove empty subdirectories
-        for dir_path in temp_dir.glob("*/"):
-            if dir_path.is_dir() and not any(dir_path.iterdir()):
-                try:
-                    dir_path.rmdir()
-                    LOGGER.info(f"Cleaned up empty temporary directory: {dir_path}")
-                except Exception as e:
-                    LOGGER.warning(f"Could not remove temporary directory {dir_path}: {e}")
-
-def is_inside(box1, box2):
-    """
-    Checks if box1 is completely inside box2.
-
-    Args:
-        box1: A dictionary containing 'xmin', 'ymin', 'xmax', and 'ymax' keys.
-        box2: A dictionary containing 'xmin', 'ymin', 'xmax', and 'ymax' keys.
-
-    Returns:
-        True if box1 is completely inside box2, False otherwise.
-    """
-    return (box1['xmin'] >= box2['xmin'] and
-            box1['ymin'] >= box2['ymin'] and
-            box1['xmax'] <= box2['xmax'] and
-            box1['ymax'] <= box2['ymax'])
+from association import associate_riders, crop_box
+from output_writer import AsyncWriter
+from plate_ocr import RECOGNIZERS, PlateOCR, create_recognizer
+from tracker import BestShot, Tracker
 
 @smart_inference_mode()
 def run(
@@ -105,6 +70,11 @@ def run(
     dnn=False,  # use OpenCV DNN for ONNX inference
     vid_stride=1,  # video frame-rate stride
     im0=None,  # added argument for im0
+    ocr=None,  # plate OCR recognizer for riders without a helmet: 'easyocr', 'stub' or 'module:Class'
+    ocr_min_height=64,  # plate crops are upscaled to at least this height before OCR
+    track=False,  # track riders in video/stream sources and report each violating rider once per track
+    track_max_age=30,  # frames a track survives without a matching detection
+    track_min_hits=3,  # matched frames before a track is confirmed
 ):
 
     source = str(source)
@@ -148,6 +118,48 @@ def run(
     else:
         dataset = LoadImages(source, img_size=imgsz, stride=stride, auto=pt, vid_stride=vid_stride)
     vid_path, vid_writer = [None] * bs, [None] * bs
+    writer = AsyncWriter()
+    plate_ocr = PlateOCR(create_recognizer(ocr), min_height=ocr_min_height) if ocr else None
+    csv_path = save_dir / "violations.csv"
+
+    def write_to_csv(image_name, rider, plate, confidence):
+        data = {"Image Name": image_name, "Rider": rider, "Plate": plate, "Confidence": confidence}
+        new_file = not csv_path.is_file()
+        with open(csv_path, mode="a", newline="") as f:
+            csv_writer = csv.DictWriter(f, fieldnames=data.keys())
+            if new_file:
+                csv_writer.writeheader()
+            csv_writer.writerow(data)
+
+    def report(p, violations):
+        """Prints, crops, reads and records riders without a helmet, given as [(rider, plate crop or None), ...]."""
+        crops = [crop for _, crop in violations if crop is not None]
+        texts = iter(plate_ocr.read(crops) if plate_ocr and crops else [])  # one OCR batch per call
+        for rider, crop in violations:
+            print(f"No helmet found for rider {rider} in image {p}.")
+            text, conf = "", 0.0
+            if crop is not None:
+                writer.save_crop(Path("outputs/crops") / f"{p.stem}_rider{rider}_plate", crop)
+                print(f"License plate cropped for rider {rider}.")
+                if plate_ocr:
+                    text, conf = next(texts)
+                    print(f"License plate of rider {rider}: {text or '(unreadable)'} ({conf:.2f})")
+            if save_csv:
+                write_to_csv(p.name, rider, text, f"{conf:.2f}")
+
+    trackers = [None] * bs if track else None  # per-stream Tracker, created on the first frame of each source
+    track_src, best_shots = [None] * bs, [BestShot() for _ in range(bs)]
+    votes = [{} for _ in range(bs)]  # per stream: track id -> [frames without helmet, frames with helmet]
+
+    def finish_tracks(i, p, track_ids):
+        """Reports each finished rider track of stream `i` that had no helmet in most of its frames, once."""
+        shots = dict(best_shots[i].pop(track_ids))
+        violations = []
+        for tid in track_ids:
+            without, with_helmet = votes[i].pop(tid, (0, 0))
+            if tid in shots and without > with_helmet:
+                violations.append((f"track{tid}", shots[tid]))
+        report(Path(p), violations)
 
     # Run inference
     model.warmup(imgsz=(1 if pt or model.triton else bs, 3, *imgsz))  # warmup
@@ -182,35 +194,48 @@ def run(
         # Process predictions
         for i, det in enumerate(pred):  # per image
             seen += 1
+            p, im0 = (path[i], im0s[i]) if webcam else (path, im0s)
+            p = Path(p)
             if len(det):
                 # Rescale boxes from img_size to im0 size
                 det[:, :4] = scale_boxes(im.shape[2:], det[:, :4], im0.shape).round()
 
+            # Associate helmets and plates with riders
+            d = det.cpu().numpy()
+            riders, helmets, plates = associate_riders(d[:, :4], d[:, 5], names)
+
+            if trackers is None or dataset.mode == "image":
+                # Crop the plate of each rider without a helmet on every frame
+                violations = plates[helmets < 0]
+                report(p, [(k, crop_box(im0, d[pl, :4]) if pl >= 0 else None) for k, pl in enumerate(violations)])
+                continue
 
-                # Crop license plate if no helmet found
-                for box in det:
-                    if box['name'] == 'rider':
-                        rider_box = box
-                        helmet_found = False
-                        for helmet_box in det:
-                            if helmet_box['name'] == 'helmet' and is_inside(helmet_box, rider_box):
-                                helmet_found = True
-                                break
+            # Track riders across frames, keep the best plate view of each and report violating tracks once they end
+            if track_src[i] != p:  # new video or stream source
+                if trackers[i] is not None:
+                    finish_tracks(i, track_src[i], trackers[i].flush())
+                trackers[i], track_src[i] = Tracker(max_age=track_max_age, min_hits=track_min_hits), p
+            track_ids = trackers[i].update(d[:, :6])
+            finish_tracks(i, p, trackers[i].finished)
+            for rider, helmet, plate in zip(riders, helmets, plates):
+                tid = track_ids[rider]
+                if tid < 0:  # not confirmed yet
+                    continue
+                count = votes[i].setdefault(tid, [0, 0])
+                count[int(helmet >= 0)] += 1
+                if helmet < 0:  # largest, most confident plate view among the frames without a helmet
+                    box = d[plate] if plate >= 0 else None
+                    score = float(box[4] * (box[2] - box[0]) * (box[3] - box[1])) if box is not None else 0.0
+                    crop = (lambda: crop_box(im0, box[:4]).copy()) if box is not None else None
+                    best_shots[i].offer(tid, score, crop)
 
-                        if not helmet_found:
-                            print(f"No helmet found for rider in image {path}.")
-                            for license_plate_box in det:
-                                if license_plate_box['name'] == 'plate' and is_inside(license_plate_box, rider_box):
-                                    # Crop the license plate from the image
-                                    img = Image.open(path)
-                                    plate_img = img.crop((license_plate_box['xmin'], license_plate_box['ymin'],
-                                                         license_plate_box['xmax'], license_plate_box['ymax']))
-                                    # Save cropped image with filename
-                                    crop_dir = Path("outputs/crops")
-                                    crop_dir.mkdir(parents=True, exist_ok=True)
-                                    plate_img.save(crop_dir / f"rider_{i}_plate_image.jpg")
-                                    print(f"License plate cropped for rider {i}.")
-                            break  # Only process the first rider without a helmet
+    for i, tracker in enumerate(trackers or []):
+        if tracker is not None:
+            finish_tracks(i, track_src[i], tracker.flush())
+
+    writer.close()  # drain pending crop writes
+    if plate_ocr:
+        LOGGER.info(plate_ocr.summary())
 
     # Print time (inference-only)
     t = tuple(x.t / seen * 1e3 for x in dt)  # speeds per image
@@ -220,9 +245,6 @@ def run(
         LOGGER.info(f"Results saved to {colorstr('bold', save_dir)}{s}")
     if update:
         strip_optimizer(weights[0])  # update model (to fix SourceChangeWarning)
-    
-    # Cleanup temporary files
-    cleanup_temp_files()
 
 def parse_opt():
     parser = argparse.ArgumentParser()
@@ -256,6 +278,11 @@ def parse_opt():
     parser.add_argument("--half", action="store_true", help="use FP16 half-precision inference")
     parser.add_argument("--dnn", action="store_true", help="use OpenCV DNN for ONNX inference")
     parser.add_argument("--vid-stride", type=int, default=1, help="video frame-rate stride")
+    parser.add_argument("--ocr", help=f"read plates of riders without a helmet: {', '.join(RECOGNIZERS)} or module:Class")
+    parser.add_argument("--ocr-min-height", type=int, default=64, help="upscale plate crops to at least this height")
+    parser.add_argument("--track", action="store_true", help="track riders and report each violating rider once")
+    parser.add_argument("--track-max-age", type=int, default=30, help="frames a lost track is kept before it ends")
+    parser.add_argument("--track-min-hits", type=int, default=3, help="matched frames before a track is confirmed")
     opt = parser.parse_args()
     opt.imgsz *= 2 if len(opt.imgsz) == 1 else 1  # expand
     print_args(vars(opt))
@@ -0,0 +1,107 @@
+"""
+In-process YOLOv5 detector for long-lived applications.
+
+The detect*.py scripts load the model on every invocation. Detector loads it once and then runs batched inference on
+images already in memory, so a GUI or service pays the import, load and warmup cost a single time.
+
+Usage:
+    detector = Detector("data/models/1500img.pt", imgsz=416)
+    dets = detector([im0, im1])  # BGR HWC images -> [(n, 6) xyxy/conf/cls arrays in image coordinates, ...]
+    annotated = detector.annotate(im0, dets[0])
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import torch
+
+FILE = Path(__file__).resolve()
+ROOT = FILE.parents[1] / "yolov5"  # YOLOv5 root directory
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))  # add ROOT to PATH
+if str(FILE.parent) not in sys.path:
+    sys.path.append(str(FILE.parent))  # sibling modules when imported from other apps
+
+from ultralytics.utils.plotting import Annotator, colors
+
+from models.common import DetectMultiBackend
+from utils.augmentations import letterbox
+from utils.general import LOGGER, check_img_size, non_max_suppression, scale_boxes
+from utils.torch_utils import select_device, smart_inference_mode
+
+DEFAULT_WEIGHTS = FILE.parents[2] / "data" / "models" / "1500img.pt"
+
+
+class Detector:
+    """
+    YOLOv5 model loaded once and reused for many images or frames.
+
+    Args:
+        weights: model path, any format DetectMultiBackend accepts.
+        imgsz: inference size, int or (h, w).
+        conf_thres: confidence threshold.
+        iou_thres: NMS IoU threshold.
+        classes: class index or list of indices to keep, None for all.
+        max_det: maximum detections per image.
+        device: cuda device, i.e. 0 or 0,1,2,3 or cpu.
+        half: use FP16 half-precision inference.
+    """
+
+    def __init__(
+        self,
+        weights=DEFAULT_WEIGHTS,
+        imgsz=640,
+        conf_thres=0.25,
+        iou_thres=0.45,
+        classes=None,
+        max_det=1000,
+        device="",
+        half=False,
+    ):
+        self.device = select_device(device)
+        self.model = DetectMultiBackend(weights, device=self.device, fp16=half)
+        self.stride, self.names, self.pt = self.model.stride, self.model.names, self.model.pt
+        self.imgsz = check_img_size(imgsz if isinstance(imgsz, (list, tuple)) else (imgsz, imgsz), s=self.stride)
+        self.conf_thres, self.iou_thres = conf_thres, iou_thres
+        self.classes, self.max_det = classes, max_det
+        self.model.warmup(imgsz=(1, 3, *self.imgsz))
+        LOGGER.info(f"Detector ready: {Path(str(weights)).name} at {self.imgsz}")
+
+    def preprocess(self, ims):
+        """Letterboxes BGR images into one uint8 BCHW RGB batch; a single image keeps minimum-rectangle padding."""
+        auto = self.pt and len(ims) == 1  # a batch needs one common shape
+        batch = [letterbox(im, self.imgsz, stride=self.stride, auto=auto)[0] for im in ims]
+        return np.ascontiguousarray(np.stack(batch).transpose((0, 3, 1, 2))[:, ::-1])  # BHWC to BCHW, BGR to RGB
+
+    @smart_inference_mode()
+    def __call__(self, ims):
+        """Returns one (n, 6) float array of xyxy, conf, cls in image coordinates per BGR image in `ims`."""
+        if not len(ims):
+            return []
+        x = self.preprocess(ims)
+        x = torch.from_numpy(x).to(self.device)
+        x = x.half() if self.model.fp16 else x.float()
+        x /= 255  # 0 - 255 to 0.0 - 1.0
+        if self.model.xml and x.shape[0] > 1:  # OpenVINO exports are static batch 1
+            pred = torch.cat([self.model(xi[None]) for xi in x], 0)
+        else:
+            pred = self.model(x)
+        pred = non_max_suppression(pred, self.conf_thres, self.iou_thres, self.classes, max_det=self.max_det)
+        out = []
+        for det, im0 in zip(pred, ims):
+            det[:, :4] = scale_boxes(x.shape[2:], det[:, :4], im0.shape).round()
+            out.append(det.cpu().numpy())
+        return out
+
+    def annotate(self, im0, det, line_width=None):
+        """Returns a copy of `im0` with the boxes and labels of `det` drawn on it."""
+        annotator = Annotator(im0.copy(), line_width=line_width, example=str(self.names))
+        for *xyxy, conf, cls in reversed(det):
+            c = int(cls)
+            annotator.box_label(xyxy, f"{self.names[c]} {conf:.2f}", color=colors(c, True))
+        return annotator.result()
+
+    def describe(self, det):
+        """Returns one "name conf" line per detection, most confident first."""
+        return [f"{self.names[int(c)]} {conf:.2f}" for *_, conf, c in sorted(det, key=lambda d: -d[4])]
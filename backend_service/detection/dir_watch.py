@@ -0,0 +1,149 @@
+"""
+Continuous ingestion of images dropped into a directory.
+
+DirectoryWatcher uses inotify (via the optional inotify_simple package) to learn about new files and falls back to
+polling the directory with os.scandir(). A file is handed out once its size and mtime have been stable for `settle`
+seconds (or immediately after an inotify close-write), so half-copied JPEGs are never read. Processed files are
+skipped if the Manifest already records them, so a restart resumes without reprocessing; the consumer marks files
+done once their outputs are written.
+
+Usage:
+    watcher = DirectoryWatcher("incoming/", Manifest("outputs/detections/manifest.jsonl"))
+    dataset = WatchImages(watcher, img_size=640, stride=32, auto=True)
+    for path, im, im0s, vid_cap, s in dataset:  # same tuples as LoadImages, never ends
+        ...
+"""
+
+import os
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from utils.augmentations import letterbox
+from utils.dataloaders import IMG_FORMATS
+from utils.general import LOGGER
+
+from manifest import file_key
+
+try:
+    from inotify_simple import INotify, flags
+except ImportError:
+    INotify = None
+
+
+class DirectoryWatcher:
+    """
+    Yields new, fully written files in `root` forever.
+
+    Args:
+        root: directory to watch (not recursive).
+        manifest: Manifest of already processed files, consulted on every scan.
+        suffixes: accepted file suffixes without the dot.
+        settle: seconds a file's size and mtime must stay unchanged before it is considered complete.
+        poll_interval: seconds between directory scans when polling, and the inotify read timeout.
+        poll: force polling even if inotify is available (e.g. for network shares, where inotify sees no events).
+    """
+
+    def __init__(self, root, manifest, suffixes=IMG_FORMATS, settle=0.5, poll_interval=0.5, poll=False):
+        self.root = Path(root)
+        assert self.root.is_dir(), f"{self.root} is not a directory"
+        self.manifest = manifest
+        self.suffixes = {s.lower() for s in suffixes}
+        self.settle, self.poll_interval = settle, poll_interval
+        self._pending = {}  # path -> ((size, mtime_ns), time the key was last seen changing)
+        self._known = set()  # paths already processed or handed out, skipped by scans without a stat() call
+        self._stopped = False
+        self._inotify = None
+        if INotify is not None and not poll:
+            self._inotify = INotify()
+            self._inotify.add_watch(str(self.root), flags.CLOSE_WRITE | flags.MOVED_TO)
+        LOGGER.info(f"Watching {self.root} for new images ({'inotify' if self._inotify else 'polling'})")
+
+    def __iter__(self):
+        self._scan()  # pick up files that arrived while we were not running
+        while not self._stopped:
+            yield from self._ready()
+            self._wait()
+
+    def stop(self):
+        self._stopped = True
+
+    def _accept(self, path):
+        name = path.name
+        return not name.startswith(".") and name.rsplit(".", 1)[-1].lower() in self.suffixes
+
+    def _track(self, path, complete=False):
+        """Starts debouncing `path`; complete=True when the writer is known to have closed it."""
+        if complete:
+            self._known.discard(path)  # rewritten in place
+        if path in self._known or path in self._pending or not self._accept(path):
+            return
+        try:
+            key = file_key(path)
+        except FileNotFoundError:
+            return
+        if self.manifest.is_done(path, key):
+            self._known.add(path)
+        else:
+            self._pending[path] = (key, float("-inf") if complete else time.monotonic())
+
+    def _scan(self):
+        with os.scandir(self.root) as it:
+            for entry in it:
+                if entry.is_file():
+                    self._track(Path(entry.path))
+
+    def _wait(self):
+        if self._inotify is None:
+            time.sleep(self.poll_interval)
+            self._scan()
+        else:
+            for event in self._inotify.read(timeout=int(self.poll_interval * 1000)):
+                self._track(self.root / event.name, complete=True)
+
+    def _ready(self):
+        now = time.monotonic()
+        ready = []
+        for path, (key, since) in list(self._pending.items()):
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                del self._pending[path]
+                continue
+            current = (st.st_size, st.st_mtime_ns)
+            if current != key:
+                self._pending[path] = (current, now)  # still being written
+            elif st.st_size and now - since >= self.settle:
+                del self._pending[path]
+                self._known.add(path)
+                ready.append(path)
+        return sorted(ready)
+
+
+class WatchImages:
+    """Adapts a DirectoryWatcher to the (path, im, im0s, vid_cap, s) items of LoadImages."""
+
+    mode = "image"
+
+    def __init__(self, watcher, img_size=640, stride=32, auto=True):
+        self.watcher = watcher
+        self.img_size, self.stride, self.auto = img_size, stride, auto
+        self.count = 0
+
+    def __iter__(self):
+        for path in self.watcher:
+            try:
+                key = file_key(path)  # the version of the file that is read below
+            except FileNotFoundError:
+                continue  # removed after it settled
+            im0 = cv2.imread(str(path))  # BGR
+            if im0 is None:
+                LOGGER.warning(f"WARNING ⚠️ could not read {path}, skipping")
+                self.watcher.manifest.mark(path, key)
+                continue
+            im = letterbox(im0, self.img_size, stride=self.stride, auto=self.auto)[0]
+            im = np.ascontiguousarray(im.transpose((2, 0, 1))[::-1])  # HWC to CHW, BGR to RGB
+            self.count += 1
+            yield str(path), im, im0, None, f"watch {self.count} {path}: "
@@ -0,0 +1,240 @@
+"""
+Retention-based cleanup of the outputs/ tree.
+
+Files under the expiring subdirectories (outputs/temp by default) are deleted once they are older than the retention
+period, and if the whole tree is still above its size quota the oldest remaining files of the quota subdirectories
+(also outputs/temp by default) are deleted until it fits. Results outside them, CSVs and resume manifests are never
+deleted for the quota, since a manifest would keep them from being regenerated.
+Deletes are issued in small batches with a pause in between, and files modified in the last `min_age` seconds are
+never touched, so a sweep can run next to active detection runs. Runs as a background thread or as a service:
+
+Usage:
+    $ python backend_service/detection/janitor.py                      # sweep every CLEANUP_INTERVAL_MINUTES
+    $ python backend_service/detection/janitor.py --once --max-size-mb 2048
+
+    janitor = Janitor("outputs", retention_hours=24, max_size_mb=2048).start()  # daemon thread
+    janitor.stop()
+
+Defaults come from the project config (TEMP_FILE_RETENTION_HOURS, CLEANUP_INTERVAL_MINUTES, OUTPUTS_MAX_SIZE_MB,
+OUTPUTS_QUOTA_DIRS).
+"""
+
+import argparse
+import fnmatch
+import logging
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))  # for the config package
+
+try:
+    from utils.general import LOGGER  # inside detect.py, which puts YOLOv5 on the path
+except ImportError:
+    LOGGER = logging.getLogger(__name__)  # standalone service, no torch import
+
+
+def load_settings():
+    """Returns the janitor defaults of the active config (LP_ENVIRONMENT), or the base values without one."""
+    try:
+        from config.utils import get_config
+
+        cfg = get_config()
+    except (ImportError, ValueError) as e:  # production config raises ValueError without its required env vars
+        LOGGER.warning(f"Janitor: could not load project config ({e}), using defaults")
+        cfg = None
+    return {
+        "root": Path("outputs"),
+        "retention_hours": getattr(cfg, "TEMP_FILE_RETENTION_HOURS", 24),
+        "interval_minutes": getattr(cfg, "CLEANUP_INTERVAL_MINUTES", 30),
+        "max_size_mb": getattr(cfg, "OUTPUTS_MAX_SIZE_MB", None),
+        "expire": ["temp"] if getattr(cfg, "AUTO_CLEANUP_TEMP", True) else [],
+        "quota": list(getattr(cfg, "OUTPUTS_QUOTA_DIRS", ["temp"])),
+    }
+
+
+class Janitor:
+    """
+    Sweeps `root` by age and total size.
+
+    Args:
+        root: output tree to keep in check.
+        retention_hours: age after which files under `expire` are deleted.
+        max_size_mb: quota for the whole tree, None for no quota.
+        interval_minutes: pause between sweeps when running as a thread.
+        expire: subdirectories of `root` whose files expire after `retention_hours`.
+        quota: subdirectories of `root` whose oldest files are deleted while the tree is above `max_size_mb`.
+        keep: file name patterns that are never deleted, e.g. resume manifests and result CSVs.
+        min_age: seconds since the last modification before a file may be deleted.
+        batch_size: files deleted per batch.
+        batch_pause: seconds slept between batches.
+    """
+
+    def __init__(
+        self,
+        root="outputs",
+        retention_hours=24,
+        max_size_mb=None,
+        interval_minutes=30,
+        expire=("temp",),
+        quota=("temp",),
+        keep=("manifest.jsonl", "*.csv"),
+        min_age=60.0,
+        batch_size=256,
+        batch_pause=0.05,
+    ):
+        self.root = Path(root)
+        self.retention = retention_hours * 3600
+        self.max_bytes = int(max_size_mb * 2**20) if max_size_mb else None
+        self.interval = interval_minutes * 60
+        self.expire = [self.root / d for d in expire]
+        self.quota = [self.root / d for d in quota]
+        self.keep = keep
+        self.min_age = min_age
+        self.batch_size, self.batch_pause = max(1, batch_size), batch_pause
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Sweeps every `interval_minutes` on a daemon thread; returns self."""
+        self._thread = threading.Thread(target=self.run, name="janitor", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops the sweep thread, interrupting a sweep in progress between batches."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def sweep(self):
+        """Deletes expired files, then the oldest files above the quota; returns (files deleted, bytes freed)."""
+        now = time.time()
+        files = sorted(self._scan(), key=lambda f: f[0])  # oldest first
+        if not files:
+            return 0, 0
+        total = sum(size for _, size, _ in files)
+        expired, rest = [], []
+        for f in files:
+            (expired if self._expired(f[2], now - f[0]) else rest).append(f)
+        doomed = expired
+        excess = total - sum(size for _, size, _ in expired) - (self.max_bytes or total)
+        for f in rest:  # oldest first until the tree fits the quota
+            if excess <= 0:
+                break
+            if now - f[0] >= self.min_age and any(d in f[2].parents for d in self.quota):
+                doomed.append(f)
+                excess -= f[1]
+        n, freed = self._delete(doomed)
+        self._prune()
+        if n:
+            LOGGER.info(f"Janitor: deleted {n} files ({freed / 2**20:.1f} MB) from {self.root}, {len(files) - n} kept")
+        if excess > 0:
+            LOGGER.warning(
+                f"Janitor: {self.root} still {excess / 2**20:.1f} MB over quota (remaining files are too recent "
+                f"or outside the quota directories {[str(d) for d in self.quota]})"
+            )
+        return n, freed
+
+    def run(self):
+        """Sweeps every `interval_minutes` until stop() is called."""
+        while not self._stop.is_set():
+            try:
+                self.sweep()
+            except Exception as e:  # keep the service alive across transient filesystem errors
+                LOGGER.warning(f"Janitor: sweep of {self.root} failed: {e}")
+            self._stop.wait(self.interval)
+
+    def _scan(self):
+        """Yields (mtime, size, path) of every deletable file under root."""
+        stack = [self.root]
+        while stack:
+            try:
+                it = os.scandir(stack.pop())
+            except FileNotFoundError:
+                continue
+            with it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False) and not self._kept(entry.name):
+                            st = entry.stat(follow_symlinks=False)
+                            yield st.st_mtime, st.st_size, Path(entry.path)
+                    except FileNotFoundError:
+                        continue  # deleted by someone else mid-scan
+
+    def _kept(self, name):
+        return any(fnmatch.fnmatch(name, pattern) for pattern in self.keep)
+
+    def _expired(self, path, age):
+        return age >= max(self.retention, self.min_age) and any(d in path.parents for d in self.expire)
+
+    def _delete(self, files):
+        n, freed = 0, 0
+        for k in range(0, len(files), self.batch_size):
+            if self._stop.is_set():
+                break
+            for _, size, path in files[k : k + self.batch_size]:
+                try:
+                    path.unlink()
+                    n, freed = n + 1, freed + size
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    LOGGER.warning(f"Janitor: could not remove {path}: {e}")
+            time.sleep(self.batch_pause)  # spread deletes out so they do not compete with active runs for I/O
+        return n, freed
+
+    def _prune(self):
+        """Removes empty directories below the expiring subdirectories, keeping the subdirectories themselves."""
+        for top in self.expire:
+            for dirpath, _, _ in sorted(os.walk(top), key=lambda d: -len(d[0])):  # deepest first
+                if Path(dirpath) != top:
+                    try:
+                        os.rmdir(dirpath)
+                    except OSError:
+                        pass  # not empty or already gone
+
+
+def parse_opt():
+    settings = load_settings()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--root", type=str, default=settings["root"], help="output tree to sweep")
+    parser.add_argument("--retention-hours", type=float, default=settings["retention_hours"], help="temp file age")
+    parser.add_argument("--max-size-mb", type=float, default=settings["max_size_mb"], help="quota for the whole tree")
+    parser.add_argument("--interval-minutes", type=float, default=settings["interval_minutes"], help="sweep period")
+    parser.add_argument("--expire", nargs="*", default=settings["expire"], help="subdirectories whose files expire")
+    parser.add_argument("--quota", nargs="*", default=settings["quota"], help="subdirectories trimmed for the quota")
+    parser.add_argument("--batch-size", type=int, default=256, help="files deleted per batch")
+    parser.add_argument("--once", action="store_true", help="sweep once and exit")
+    return parser.parse_args()
+
+
+def main(opt):
+    janitor = Janitor(
+        opt.root,
+        retention_hours=opt.retention_hours,
+        max_size_mb=opt.max_size_mb,
+        interval_minutes=opt.interval_minutes,
+        expire=opt.expire,
+        quota=opt.quota,
+        batch_size=opt.batch_size,
+    )
+    if opt.once:
+        janitor.sweep()
+        return
+    LOGGER.info(f"Janitor: sweeping {janitor.root} every {opt.interval_minutes:g} minutes")
+    try:
+        janitor.run()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    main(parse_opt())
@@ -0,0 +1,106 @@
+"""
+Append-only record of processed input files.
+
+Each line of the JSONL manifest holds the absolute path, size and mtime of an input whose outputs were written,
+plus a fingerprint of the run configuration. An input counts as done only while its size, mtime and the fingerprint
+still match, so replaced files, and every file after a config change, are processed again. Later lines supersede
+earlier ones and a torn last line from a crash is ignored on load.
+
+Usage:
+    manifest = Manifest("outputs/detections/manifest.jsonl", config_fingerprint(weights=w, conf_thres=0.25))
+    todo = manifest.pending(files)
+    for path in todo:
+        key = file_key(path)  # when the input is read
+        ...
+        manifest.mark(path, key)
+"""
+
+import csv
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+
+def file_key(path):
+    """Returns the (size, mtime_ns) identity of a file."""
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+def config_fingerprint(**config):
+    """Returns a short stable hash of the settings that affect a run's outputs."""
+    return hashlib.sha1(json.dumps(config, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def prune_csv(path, names):
+    """
+    Removes the rows whose first column (the input name) is in `names` from a results CSV, so inputs that are about to
+    be processed again after an interrupted run or a config change are not listed twice. Returns the rows removed.
+    """
+    path = Path(path)
+    if not names or not path.is_file():
+        return 0
+    with open(path, newline="") as f:
+        rows = list(csv.reader(f))
+    keep = [r for k, r in enumerate(rows) if not r or k == 0 and r[0] == "Image Name" or r[0] not in names]
+    if len(keep) < len(rows):
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w", newline="") as f:
+            csv.writer(f).writerows(keep)
+        os.replace(tmp, path)
+    return len(rows) - len(keep)
+
+
+class Manifest:
+    """Thread-safe JSONL manifest of processed files keyed by absolute path, size, mtime and config fingerprint."""
+
+    def __init__(self, path, fingerprint=""):
+        self.path = Path(path)
+        self.fingerprint = fingerprint
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._done = {}  # absolute path -> (size, mtime_ns, fingerprint)
+        self._lock = threading.Lock()
+        if self.path.exists():
+            with open(self.path) as f:
+                for line in f:
+                    try:
+                        r = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn write from an interrupted run
+                    self._done[r["path"]] = (r["size"], r["mtime_ns"], r.get("config", ""))
+        self._file = open(self.path, "a")
+
+    def __len__(self):
+        return len(self._done)
+
+    def is_done(self, path, key=None):
+        """Returns True if `path` was processed and has not changed since."""
+        path = os.path.abspath(path)
+        try:
+            key = key or file_key(path)
+        except FileNotFoundError:
+            return False
+        return self._done.get(path) == (*key, self.fingerprint)
+
+    def pending(self, files):
+        """Returns the subset of `files` that still needs processing, preserving order."""
+        return [f for f in files if not self.is_done(f)]
+
+    def mark(self, path, key=None):
+        """
+        Records `path` as processed with the (size, mtime) `key` captured when it was read; without a key the file's
+        current size and mtime are used, which is only right if it cannot have changed since.
+        """
+        path = os.path.abspath(path)
+        size, mtime_ns = key or file_key(path)
+        line = json.dumps({"path": path, "size": size, "mtime_ns": mtime_ns, "config": self.fingerprint})
+        with self._lock:
+            self._done[path] = (size, mtime_ns, self.fingerprint)
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
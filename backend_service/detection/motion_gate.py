@@ -0,0 +1,83 @@
+"""
+Motion gating for fixed cameras.
+
+Frames are compared against the last inferred frame of their stream on a small blurred grayscale thumbnail
+(frame differencing) or fed to a MOG2 background-subtraction model. Frames that did not change enough skip the model
+and reuse the previous detections, with a forced refresh every `refresh` frames so slow changes are never missed.
+
+Usage:
+    gate = MotionGate(method="diff", threshold=0.005, refresh=30)
+    if gate.changed(stream_id, im0):
+        pred = infer(im)
+    LOGGER.info(gate.summary())
+"""
+
+import cv2
+import numpy as np
+
+GATE_METHODS = ("diff", "mog2")
+
+
+class MotionGate:
+    """
+    Per-stream change detector.
+
+    Args:
+        method: "diff" for downscaled frame differencing or "mog2" for a background-subtraction model.
+        threshold: fraction of thumbnail pixels that must change for a frame to be inferred.
+        pixel_thres: absolute gray-level difference counted as a changed pixel ("diff" only).
+        refresh: forced inference interval in frames, 0 to disable.
+        size: thumbnail width in pixels.
+    """
+
+    def __init__(self, method="diff", threshold=0.005, pixel_thres=25, refresh=30, size=96):
+        if method not in GATE_METHODS:
+            raise ValueError(f"method must be one of {GATE_METHODS}, got '{method}'")
+        self.method = method
+        self.threshold = threshold
+        self.pixel_thres = pixel_thres
+        self.refresh = refresh
+        self.size = size
+        self.checked, self.skipped = 0, 0
+        self._state = {}  # stream -> [reference thumbnail or MOG2 model, frames since last inference]
+
+    def changed(self, stream, im0):
+        """Returns True if frame `im0` of `stream` should be inferred, False if the last detections still hold."""
+        self.checked += 1
+        h, w = im0.shape[:2]
+        small = cv2.resize(im0, (self.size, max(1, round(self.size * h / w))), interpolation=cv2.INTER_AREA)
+        gray = cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+
+        state = self._state.get(stream)
+        if state is None:  # first frame of a stream
+            model = cv2.createBackgroundSubtractorMOG2(detectShadows=False) if self.method == "mog2" else gray
+            if self.method == "mog2":
+                model.apply(gray)
+            self._state[stream] = [model, 0]
+            return True
+
+        if self.method == "mog2":
+            mask = state[0].apply(gray)
+        else:
+            mask = cv2.absdiff(gray, state[0]) > self.pixel_thres
+        score = np.count_nonzero(mask) / mask.size
+        state[1] += 1
+        if score >= self.threshold or (self.refresh and state[1] >= self.refresh):
+            if self.method == "diff":
+                state[0] = gray  # compare against the last inferred frame so slow drift accumulates
+            state[1] = 0
+            return True
+        self.skipped += 1
+        return False
+
+    def reset(self, stream=None):
+        """Forgets the reference of one stream, or of all streams."""
+        if stream is None:
+            self._state.clear()
+        else:
+            self._state.pop(stream, None)
+
+    def summary(self):
+        """Returns a one-line skipped-frame report."""
+        pct = 100 * self.skipped / self.checked if self.checked else 0.0
+        return f"Motion gate ({self.method}): skipped {self.skipped}/{self.checked} frames ({pct:.1f}%)"
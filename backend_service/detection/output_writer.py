@@ -0,0 +1,211 @@
+"""
+Asynchronous output stage for the detection scripts.
+
+Annotated images, crops and video frames are handed to a small pool of writer threads through bounded queues,
+so JPEG/MP4 encoding and disk latency stay out of the inference loop.
+
+Usage:
+    writer = AsyncWriter(workers=2, queue_size=64, quality=90, crop_format="webp")
+    writer.imwrite("outputs/detections/img.jpg", im0)
+    writer.save_crop("outputs/crops/plate/img", crop)
+    writer.write_video(0, "outputs/videos/vid.mp4", im0, fps=30, size=(1920, 1080))
+    writer.close()  # drain queues and release video writers
+"""
+
+import atexit
+import itertools
+import logging
+import os
+import queue
+import threading
+import time
+import zlib
+from pathlib import Path
+
+import cv2
+
+try:
+    from utils.general import LOGGER  # inside the detection scripts, which put YOLOv5 on the path
+except ImportError:
+    LOGGER = logging.getLogger(__name__)
+
+CROP_FORMATS = ("jpg", "png", "webp")  # formats accepted for --crop-format
+_STOP = object()  # queue sentinel
+
+
+def imwrite_params(path, quality):
+    """Returns cv2.imwrite() encode parameters for the file suffix of `path` at the given 0-100 quality."""
+    suffix = Path(path).suffix.lower()
+    if suffix in (".jpg", ".jpeg"):
+        return [cv2.IMWRITE_JPEG_QUALITY, int(quality)]
+    if suffix == ".webp":
+        return [cv2.IMWRITE_WEBP_QUALITY, int(quality)]
+    return []
+
+
+class AsyncWriter:
+    """
+    Pool of writer threads fed by bounded per-thread queues.
+
+    Video frames for one stream are always routed to the same thread so they are encoded in submission order.
+    Still images are spread round-robin over all threads. When a queue is full the caller blocks until a slot
+    frees up (the number of such stalls is counted in `stalls`), which bounds memory on slow disks. An optional
+    StageProfiler records the duration of every write as stage "io".
+    """
+
+    def __init__(self, workers=2, queue_size=64, quality=95, crop_format="jpg", fourcc="mp4v", profiler=None):
+        if crop_format not in CROP_FORMATS:
+            raise ValueError(f"crop_format must be one of {CROP_FORMATS}, got '{crop_format}'")
+        if not 0 <= quality <= 100:
+            raise ValueError(f"quality must be in [0, 100], got {quality}")
+        self.quality = quality
+        self.crop_format = crop_format
+        self.fourcc = cv2.VideoWriter_fourcc(*fourcc)
+        self.profiler = profiler
+        self.stalls, self.written, self.errors = 0, 0, 0
+        self._queues = [queue.Queue(maxsize=queue_size) for _ in range(max(1, workers))]
+        self._videos = {}  # stream key -> (path, cv2.VideoWriter), only touched by the thread owning the key
+        self._crop_counts = {}  # crop stem -> last number handed out for that stem
+        self._rr = itertools.count()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._threads = [
+            threading.Thread(target=self._worker, args=(q,), name=f"writer-{k}", daemon=True)
+            for k, q in enumerate(self._queues)
+        ]
+        for t in self._threads:
+            t.start()
+        atexit.register(self.close)  # drain pending writes even if run() exits early, unregistered by close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def imwrite(self, path, im, callback=None):
+        """Queues `im` to be encoded to `path`; `callback(path)` is called from the writer thread once written."""
+        self._put(next(self._rr), ("image", str(path), im, callback))
+
+    def save_crop(self, stem, crop):
+        """
+        Queues a crop saved as `stem` + crop_format suffix, numbering repeats like increment_path (img, img2, ...).
+
+        Names already on disk are skipped, so crops of an earlier run are never overwritten, and names handed out
+        by this writer are skipped even before their write has completed.
+        """
+        stem = str(stem)
+        with self._lock:
+            n = self._crop_counts.get(stem, 0)
+            while True:
+                n += 1
+                path = f"{stem}{n if n > 1 else ''}.{self.crop_format}"
+                if not os.path.exists(path):
+                    break
+            self._crop_counts[stem] = n
+        self.imwrite(path, crop)
+        return path
+
+    def write_video(self, key, path, im, fps, size):
+        """Queues one frame for the video of stream `key`; a new `path` for the key starts a new video file."""
+        self._put(self._slot(key), ("video", key, str(path), im, (fps, size)))
+
+    def release_video(self, key):
+        """Queues closing the current video of stream `key` after its pending frames, finalizing the file."""
+        self._put(self._slot(key), ("release", key))
+
+    def barrier(self, callback):
+        """
+        Calls `callback()` from a writer thread once every write queued before this call has completed.
+
+        The callback is skipped if any write failed in the meantime, so callers can use it to record inputs as done.
+        """
+        errors, remaining, lock = self.errors, [len(self._queues)], threading.Lock()
+
+        def arrive():
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last and self.errors == errors:
+                callback()
+
+        for k in range(len(self._queues)):
+            self._put(k, ("call", arrive))
+
+    def close(self):
+        """Drains all queues, stops the writer threads and releases any open video writers."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        atexit.unregister(self.close)  # the exit hook would otherwise keep this writer alive until exit
+        for q in self._queues:
+            q.put(_STOP)
+        for t in self._threads:
+            t.join()
+        for _, vw in self._videos.values():
+            vw.release()
+        self._videos.clear()
+        if self.errors:
+            LOGGER.warning(f"AsyncWriter: {self.errors} writes failed")
+
+    def _slot(self, key):
+        """Maps a stream key to a fixed worker index so its frames stay ordered."""
+        k = key if isinstance(key, int) else zlib.crc32(str(key).encode())
+        return k % len(self._queues)
+
+    def _put(self, index, item):
+        if self._closed:
+            raise RuntimeError("AsyncWriter is closed")
+        q = self._queues[index % len(self._queues)]
+        try:
+            q.put_nowait(item)
+        except queue.Full:
+            self.stalls += 1
+            q.put(item)
+
+    def _worker(self, q):
+        while True:
+            item = q.get()
+            if item is _STOP:
+                break
+            t = time.perf_counter()
+            try:
+                if item[0] == "image":
+                    self._write_image(*item[1:])
+                elif item[0] == "video":
+                    self._write_frame(*item[1:])
+                elif item[0] == "release":
+                    current = self._videos.pop(item[1], None)
+                    if current is not None:
+                        current[1].release()
+                    continue
+                else:  # "call"
+                    item[1]()
+                    continue
+                self.written += 1
+                if self.profiler:
+                    self.profiler.lap("io", t)
+            except Exception as e:
+                self.errors += 1
+                LOGGER.warning(f"AsyncWriter: {item[0]} {item[1]} failed: {e}")
+
+    def _write_image(self, path, im, callback):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.stem}.tmp{path.suffix}")  # keeps the suffix cv2 needs to pick the encoder
+        if not cv2.imwrite(str(tmp), im, imwrite_params(path, self.quality)):
+            raise OSError(f"cv2.imwrite could not encode {path}")
+        os.replace(tmp, path)  # atomic, so a crash never leaves a truncated output behind
+        if callback:
+            callback(path)
+
+    def _write_frame(self, key, path, im, meta):
+        current = self._videos.get(key)
+        if current is None or current[0] != path:  # new video
+            if current is not None:
+                current[1].release()  # release previous video writer
+            fps, size = meta
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            current = self._videos[key] = (path, cv2.VideoWriter(path, self.fourcc, fps, size))
+        current[1].write(im)
@@ -0,0 +1,153 @@
+"""
+Per-frame stage timings for the detection loop.
+
+StageProfiler records the start and duration of every stage of every frame (load, pre, infer, nms, post, annotate,
+write, plus the output writer threads' io) on whichever thread ran it. export() writes a Chrome trace-event file,
+viewable in chrome://tracing or https://ui.perfetto.dev, and a CSV of per-stage percentiles. Unlike the averages
+logged at the end of a run, these show individual slow frames and which thread stalled.
+
+Usage:
+    prof = StageProfiler()
+    with prof.stage("infer", frame=[n, n + 1]):  # a batched stage covers several frames
+        ...
+    t = prof.lap("post", t, frame=n)  # consecutive stages without nesting
+    prof.export("outputs/detections")  # profile_trace.json, profile.csv
+"""
+
+import csv
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+import numpy as np
+
+try:
+    from utils.general import LOGGER  # inside the detection scripts, which put YOLOv5 on the path
+except ImportError:
+    LOGGER = logging.getLogger(__name__)
+
+_NULL = nullcontext()
+
+
+class StageProfiler:
+    """
+    Thread-safe recorder of stage timings.
+
+    Args:
+        enabled: when False every method is a no-op, so the profiler can be passed around unconditionally.
+        max_events: trace events kept for the JSON export; durations for the CSV summary are always kept.
+    """
+
+    def __init__(self, enabled=True, max_events=2_000_000):
+        self.enabled = enabled
+        self.max_events = max_events
+        self.events = []  # (stage, thread id, start, duration, frame)
+        self.durations = defaultdict(list)  # stage -> durations in seconds
+        self.threads = {}  # thread id -> thread name
+        self.truncated = 0
+        self.t0 = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def stage(self, name, frame=None):
+        """Returns a context manager timing one occurrence of stage `name`."""
+        return self._time(name, frame) if self.enabled else _NULL
+
+    def lap(self, name, start, frame=None):
+        """Records stage `name` from `start` (a perf_counter() value) to now and returns now."""
+        now = time.perf_counter()
+        self.add(name, start, now, frame)
+        return now
+
+    def add(self, name, start, end, frame=None):
+        """
+        Records stage `name` of `frame` that ran on the current thread from `start` to `end`. `frame` is a frame id, or
+        a sequence of ids for a stage that ran on a batch.
+        """
+        if not self.enabled:
+            return
+        if isinstance(frame, (list, tuple, range)):
+            frame = frame[0] if len(frame) == 1 else list(frame)
+        thread = threading.current_thread()
+        with self._lock:
+            self.durations[name].append(end - start)
+            self.threads.setdefault(thread.ident, thread.name)
+            if len(self.events) < self.max_events:
+                self.events.append((name, thread.ident, start, end - start, frame))
+            else:
+                self.truncated += 1
+
+    @contextmanager
+    def _time(self, name, frame):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, t, time.perf_counter(), frame)
+
+    def summary(self):
+        """Returns one dict per stage, in order of first occurrence, with count, total, mean and percentiles in ms."""
+        rows = []
+        with self._lock:
+            durations = {k: np.array(v) * 1e3 for k, v in self.durations.items()}
+        for name, d in durations.items():
+            p50, p95, p99 = np.percentile(d, (50, 95, 99))
+            rows.append(
+                {
+                    "stage": name,
+                    "count": len(d),
+                    "total_ms": d.sum(),
+                    "mean_ms": d.mean(),
+                    "p50_ms": p50,
+                    "p95_ms": p95,
+                    "p99_ms": p99,
+                    "max_ms": d.max(),
+                }
+            )
+        return rows
+
+    def export(self, save_dir, prefix="profile"):
+        """Writes `<prefix>_trace.json` and `<prefix>.csv` to `save_dir` and logs the summary; returns both paths."""
+        if not self.enabled:
+            return None
+        save_dir = Path(save_dir)
+        save_dir.mkdir(parents=True, exist_ok=True)
+        pid = os.getpid()
+        with self._lock:
+            events, threads = list(self.events), dict(self.threads)
+        trace = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": t, "args": {"name": n}}
+            for t, n in threads.items()
+        ]
+        for name, tid, start, dur, frame in events:
+            e = {"name": name, "cat": "detect", "ph": "X", "pid": pid, "tid": tid}
+            e["ts"], e["dur"] = round((start - self.t0) * 1e6, 1), round(dur * 1e6, 1)  # microseconds
+            if frame is not None:
+                e["args"] = {"frame": frame}
+            trace.append(e)
+        trace_path = save_dir / f"{prefix}_trace.json"
+        with open(trace_path, "w") as f:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+
+        rows = self.summary()
+        csv_path = save_dir / f"{prefix}.csv"
+        with open(csv_path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else ["stage"])
+            writer.writeheader()
+            for r in rows:
+                writer.writerow({k: f"{v:.3f}" if isinstance(v, float) else v for k, v in r.items()})
+
+        fmt = "{:>10} {:>8} {:>9} {:>9} {:>9} {:>9} {:>9}"
+        s = fmt.format("stage", "count", "mean ms", "p50 ms", "p95 ms", "p99 ms", "max ms")
+        for r in rows:
+            times = (f"{r[k]:.2f}" for k in ("mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"))
+            s += "\n" + fmt.format(r["stage"], r["count"], *times)
+        LOGGER.info(s)
+        if self.truncated:
+            LOGGER.warning(f"WARNING ⚠️ trace truncated to {self.max_events} events ({self.truncated} more in the CSV)")
+        LOGGER.info(f"Profile saved to {trace_path} and {csv_path}")
+        return trace_path, csv_path
@@ -0,0 +1,200 @@
+"""
+Lightweight multi-object tracking for video and stream detections (SORT/ByteTrack style, NumPy only).
+
+Each track carries a constant-velocity Kalman filter over (cx, cy, area, aspect). Detections are associated to
+predicted tracks by IoU in two passes: high-confidence detections first, then low-confidence ones against the tracks
+that are still unmatched (ByteTrack), so a briefly occluded plate keeps its id instead of spawning a new track.
+
+Usage:
+    tracker = Tracker()
+    ids = tracker.update(det)  # det: (n, 6) array [x1, y1, x2, y2, conf, cls] -> (n,) track ids, -1 if untracked
+    for tid in tracker.finished:  # tracks that ended on this update
+        ...
+"""
+
+import numpy as np
+
+
+def box_iou(a, b):
+    """Returns the (len(a), len(b)) IoU matrix of two xyxy box arrays."""
+    tl = np.maximum(a[:, None, :2], b[None, :, :2])
+    br = np.minimum(a[:, None, 2:4], b[None, :, 2:4])
+    inter = np.prod(np.clip(br - tl, 0, None), axis=2)
+    area_a = np.prod(a[:, 2:4] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:4] - b[:, :2], axis=1)
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def greedy_match(iou, thres):
+    """Greedily pairs rows and columns of `iou` in descending order above `thres`; returns (rows, cols) arrays."""
+    rows, cols = [], []
+    if iou.size:
+        order = np.argsort(-iou, axis=None)
+        r, c = np.unravel_index(order, iou.shape)
+        keep = iou[r, c] > thres
+        used_r, used_c = set(), set()
+        for i, j in zip(r[keep], c[keep]):
+            if i not in used_r and j not in used_c:
+                used_r.add(i)
+                used_c.add(j)
+                rows.append(i)
+                cols.append(j)
+    return np.array(rows, dtype=int), np.array(cols, dtype=int)
+
+
+def xyxy_to_z(box):
+    """Converts an xyxy box to the Kalman measurement (cx, cy, area, aspect)."""
+    w, h = box[2] - box[0], box[3] - box[1]
+    return np.array([box[0] + w / 2, box[1] + h / 2, w * h, w / max(h, 1e-6)])
+
+
+def x_to_xyxy(x):
+    """Converts a Kalman state back to an xyxy box."""
+    w = np.sqrt(max(x[2] * x[3], 0.0))
+    h = x[2] / w if w > 0 else 0.0
+    return np.array([x[0] - w / 2, x[1] - h / 2, x[0] + w / 2, x[1] + h / 2])
+
+
+class KalmanBoxTrack:
+    """Constant-velocity Kalman filter over (cx, cy, area, aspect, vcx, vcy, varea)."""
+
+    F = np.eye(7)
+    F[0, 4] = F[1, 5] = F[2, 6] = 1.0
+    H = np.eye(4, 7)
+    Q = np.diag([1.0, 1.0, 1.0, 1.0, 0.01, 0.01, 1e-4])
+    R = np.diag([1.0, 1.0, 10.0, 10.0])
+
+    def __init__(self, track_id, box, conf, cls):
+        self.id = track_id
+        self.cls = int(cls)
+        self.conf = float(conf)
+        self.x = np.zeros(7)
+        self.x[:4] = xyxy_to_z(box)
+        self.P = np.diag([10.0, 10.0, 10.0, 10.0, 1e4, 1e4, 1e4])
+        self.hits, self.age, self.misses = 1, 0, 0
+
+    def predict(self):
+        if self.x[2] + self.x[6] <= 0:
+            self.x[6] = 0.0  # keep the area positive
+        self.x = self.F @ self.x
+        self.P = self.F @ self.P @ self.F.T + self.Q
+        self.age += 1
+        self.misses += 1
+        return x_to_xyxy(self.x)
+
+    def update(self, box, conf):
+        y = xyxy_to_z(box) - self.H @ self.x
+        S = self.H @ self.P @ self.H.T + self.R
+        K = self.P @ self.H.T @ np.linalg.inv(S)
+        self.x = self.x + K @ y
+        self.P = (np.eye(7) - K @ self.H) @ self.P
+        self.conf = float(conf)
+        self.hits += 1
+        self.misses = 0
+
+    @property
+    def box(self):
+        return x_to_xyxy(self.x)
+
+
+class Tracker:
+    """
+    Two-pass IoU + Kalman tracker.
+
+    Args:
+        high_thres: detections at or above this confidence start and update tracks.
+        low_thres: detections between low_thres and high_thres only extend existing tracks.
+        iou_thres: minimum IoU between a predicted track box and a detection to associate them.
+        max_age: frames a track survives without a matching detection before it is finished.
+        min_hits: matched frames before a track id is reported.
+        class_aware: only associate detections with tracks of the same class.
+    """
+
+    def __init__(self, high_thres=0.5, low_thres=0.1, iou_thres=0.3, max_age=30, min_hits=3, class_aware=True):
+        self.high_thres, self.low_thres = high_thres, low_thres
+        self.iou_thres = iou_thres
+        self.max_age, self.min_hits = max_age, min_hits
+        self.class_aware = class_aware
+        self.tracks = []
+        self.finished = []  # ids of confirmed tracks removed by the last update()
+        self._next_id = 1
+
+    def update(self, det):
+        """
+        Advances all tracks one frame and associates the new detections.
+
+        Args:
+            det: (n, 6) array-like of [x1, y1, x2, y2, conf, cls] in image coordinates.
+
+        Returns:
+            (n,) int array of track ids aligned with `det`, -1 for detections without a confirmed track.
+        """
+        det = np.asarray(det, dtype=np.float64).reshape(-1, 6)
+        ids = np.full(len(det), -1, dtype=int)
+        predicted = np.array([t.predict() for t in self.tracks]).reshape(-1, 4)
+
+        high = np.flatnonzero(det[:, 4] >= self.high_thres)
+        low = np.flatnonzero((det[:, 4] >= self.low_thres) & (det[:, 4] < self.high_thres))
+        unmatched = np.arange(len(self.tracks))
+        matched = np.zeros(len(det), dtype=bool)
+        for pool in (high, low):
+            if not len(pool) or not len(unmatched):
+                continue
+            iou = box_iou(predicted[unmatched], det[pool, :4])
+            if self.class_aware:
+                track_cls = np.array([self.tracks[k].cls for k in unmatched])
+                iou[track_cls[:, None] != det[pool, 5][None, :].astype(int)] = 0.0
+            rows, cols = greedy_match(iou, self.iou_thres)
+            for r, c in zip(unmatched[rows], pool[cols]):
+                self.tracks[r].update(det[c, :4], det[c, 4])
+                matched[c] = True
+                if self.tracks[r].hits >= self.min_hits:
+                    ids[c] = self.tracks[r].id
+            unmatched = np.delete(unmatched, rows)
+
+        for c in high[~matched[high]]:  # new tracks from unmatched confident detections
+            self.tracks.append(KalmanBoxTrack(self._next_id, det[c, :4], det[c, 4], det[c, 5]))
+            if self.min_hits <= 1:
+                ids[c] = self._next_id
+            self._next_id += 1
+
+        alive = [t.misses <= self.max_age for t in self.tracks]
+        self.finished = [t.id for t, a in zip(self.tracks, alive) if not a and t.hits >= self.min_hits]
+        self.tracks = [t for t, a in zip(self.tracks, alive) if a]
+        return ids
+
+    def flush(self):
+        """Ends all tracks, returning the ids of the confirmed ones."""
+        self.finished = [t.id for t in self.tracks if t.hits >= self.min_hits]
+        self.tracks = []
+        return self.finished
+
+
+class BestShot:
+    """
+    Keeps the highest-scoring payload per track id (e.g. a plate crop) until the track finishes.
+
+    Usage:
+        best.offer(tid, score, crop)
+        for tid, crop in best.pop(tracker.finished):
+            ...
+    """
+
+    def __init__(self):
+        self._items = {}  # track id -> (score, payload)
+
+    def offer(self, track_id, score, payload):
+        """Stores `payload` for `track_id` if `score` beats the current best; returns True if it was stored."""
+        current = self._items.get(track_id)
+        if current is None or score > current[0]:
+            self._items[track_id] = (score, payload() if callable(payload) else payload)
+            return True
+        return False
+
+    def pop(self, track_ids):
+        """Removes and returns [(track_id, payload), ...] for the given ids that have a stored payload."""
+        return [(tid, self._items.pop(tid)[1]) for tid in track_ids if tid in self._items]
+
+    def pop_all(self):
+        """Removes and returns all stored payloads."""
+        return self.pop(list(self._items))
@@ -0,0 +1,214 @@
+"""
+Pipelined decode -> infer -> encode processing for video files.
+
+A decode thread reads and letterboxes frames, the calling thread runs batched inference and an encode thread
+annotates and writes results. Stages are linked by bounded queues so the slowest stage (normally the model) sets
+the pace and the others overlap with it.
+
+Usage:
+    pipeline = VideoPipeline("vid.mp4", img_size=(640, 640), stride=32, batch_size=4)
+    pipeline.run(infer, sink)  # infer(uint8 BCHW batch, frames) -> [det, ...]; sink(frame, im0, det, im_shape)
+    LOGGER.info(pipeline.summary())
+"""
+
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+import cv2
+import numpy as np
+
+from utils.augmentations import letterbox
+from utils.general import LOGGER
+
+_EOS = object()  # end-of-stream sentinel
+
+
+class StageMeter:
+    """Frame count and busy time of one pipeline stage."""
+
+    def __init__(self, name):
+        self.name = name
+        self.n = 0  # frames
+        self.busy = 0.0  # seconds spent working, excluding queue waits
+        self.t0 = time.perf_counter()
+
+    @contextmanager
+    def time(self, n=1):
+        t = time.perf_counter()
+        yield
+        self.busy += time.perf_counter() - t
+        self.n += n
+
+    def fps(self):
+        """Returns (busy FPS, wall-clock FPS); busy FPS is what the stage could sustain on its own."""
+        wall = time.perf_counter() - self.t0
+        return (self.n / self.busy if self.busy else 0.0), (self.n / wall if wall else 0.0)
+
+    def __str__(self):
+        busy, wall = self.fps()
+        return f"{self.name} {self.n} frames {busy:.1f} FPS busy/{wall:.1f} FPS wall"
+
+
+class VideoPipeline:
+    """
+    Three-stage pipeline over one video file.
+
+    With drop_frames=True the decoder discards frames whenever the inference queue is full instead of waiting,
+    so processing keeps up with real time at the cost of skipped frames (counted in `dropped`). An optional
+    MotionGate is checked on the decode thread; unchanged frames skip letterboxing and inference and are emitted
+    with a copy of the previous detections. An optional StageProfiler records each frame's decode as stage "load".
+    """
+
+    def __init__(
+        self,
+        path,
+        img_size=640,
+        stride=32,
+        auto=True,
+        vid_stride=1,
+        batch_size=4,
+        queue_size=16,
+        drop_frames=False,
+        gate=None,
+        report_interval=10.0,
+        profiler=None,
+    ):
+        self.path = str(path)
+        self.img_size, self.stride, self.auto = img_size, stride, auto
+        self.vid_stride = max(1, vid_stride)
+        self.batch_size = max(1, batch_size)
+        self.drop_frames = drop_frames
+        self.gate = gate
+        self.report_interval = report_interval
+        self.profiler = profiler
+        self.cap = cv2.VideoCapture(self.path)
+        assert self.cap.isOpened(), f"Failed to open {self.path}"
+        props = (cv2.CAP_PROP_FPS, cv2.CAP_PROP_FRAME_WIDTH, cv2.CAP_PROP_FRAME_HEIGHT, cv2.CAP_PROP_FRAME_COUNT)
+        self._props = {p: self.cap.get(p) for p in props}
+        self.frames = int(self._props[cv2.CAP_PROP_FRAME_COUNT] / self.vid_stride)
+        self.meters = {k: StageMeter(k) for k in ("decode", "infer", "encode")}
+        self.dropped = 0
+        self._decoded = queue.Queue(maxsize=queue_size)
+        self._results = queue.Queue(maxsize=queue_size)
+        self._error = None
+        self._stopped = False
+
+    def get(self, prop):
+        """Mimics cv2.VideoCapture.get() for the properties read at open; safe to call from any stage."""
+        return self._props.get(prop, 0.0)
+
+    def run(self, infer, sink):
+        """
+        Processes the whole video.
+
+        Args:
+            infer: callable taking a uint8 BCHW numpy batch and the frame numbers of its images, returning a list of
+                per-image detections.
+            sink: callable sink(frame, im0, det, im_shape), called on the encode thread in frame order.
+        """
+        for m in self.meters.values():
+            m.t0 = time.perf_counter()
+        decoder = threading.Thread(target=self._decode, name="pipeline-decode", daemon=True)
+        encoder = threading.Thread(target=self._encode, args=(sink,), name="pipeline-encode", daemon=True)
+        decoder.start()
+        encoder.start()
+        try:
+            self._infer(infer)
+        finally:
+            self._results.put(_EOS)
+            encoder.join()
+            self._stopped = True
+            while decoder.is_alive():  # unblock a decoder waiting on a full queue
+                self._drain(self._decoded)
+                decoder.join(0.1)
+            self.cap.release()
+        if self._error:
+            raise self._error
+
+    def summary(self):
+        """Returns a one-line per-stage FPS report."""
+        dropped = f", {self.dropped} frames dropped" if self.drop_frames else ""
+        return f"{self.path}: " + ", ".join(str(m) for m in self.meters.values()) + dropped
+
+    def _decode(self):
+        meter, frame = self.meters["decode"], 0
+        try:
+            while not self._stopped:
+                with meter.time():
+                    t = time.perf_counter()
+                    for _ in range(self.vid_stride - 1):
+                        self.cap.grab()
+                    ok, im0 = self.cap.read()
+                    if not ok:
+                        break
+                    frame += self.vid_stride
+                    if self.drop_frames and self._decoded.full():
+                        self.dropped += 1
+                        continue
+                    if self.gate is not None and not self.gate.changed(self.path, im0):
+                        self._decoded.put((frame, None, im0))  # reuse the previous detections
+                        continue
+                    im = letterbox(im0, self.img_size, stride=self.stride, auto=self.auto)[0]
+                    im = np.ascontiguousarray(im.transpose((2, 0, 1))[::-1])  # HWC to CHW, BGR to RGB
+                    if self.profiler:
+                        self.profiler.lap("load", t, frame)
+                self._decoded.put((frame, im, im0))
+        except Exception as e:
+            self._error = e
+        finally:
+            self._decoded.put(_EOS)
+
+    def _infer(self, infer):
+        meter, last_report, done = self.meters["infer"], time.perf_counter(), False
+        last, im_shape = None, None  # previous detections and letterboxed shape, reused for gated frames
+        while not done and self._error is None:
+            batch = [self._decoded.get()]
+            while len(batch) < self.batch_size and batch[-1] is not _EOS:
+                try:
+                    batch.append(self._decoded.get_nowait())
+                except queue.Empty:
+                    break
+            if batch[-1] is _EOS:
+                batch.pop()
+                done = True
+            if not batch:
+                break
+            ims = [im for _, im, _ in batch if im is not None]
+            if ims:
+                with meter.time(len(ims)):
+                    pred = iter(infer(np.stack(ims), [frame for frame, im, _ in batch if im is not None]))
+                im_shape = ims[0].shape[1:]
+            for frame, im, im0 in batch:
+                if im is not None:
+                    det = next(pred)
+                    last = det.clone()  # the sink rescales det in place
+                else:
+                    det = last.clone()
+                self._results.put((frame, im0, det, im_shape))
+            if time.perf_counter() - last_report > self.report_interval:
+                last_report = time.perf_counter()
+                LOGGER.info(f"{self.summary()} ({meter.n}/{self.frames})")
+
+    def _encode(self, sink):
+        meter = self.meters["encode"]
+        while True:
+            item = self._results.get()
+            if item is _EOS:
+                break
+            if self._error is not None:
+                continue  # keep draining so the infer stage never blocks
+            try:
+                with meter.time():
+                    sink(*item)
+            except Exception as e:
+                self._error = e
+
+    @staticmethod
+    def _drain(q):
+        try:
+            while True:
+                q.get_nowait()
+        except queue.Empty:
+            pass
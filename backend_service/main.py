@@ -1,30 +1,83 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
 import requests
 from io import BytesIO
 import base64
+import os
+
+from detection.janitor import Janitor, load_settings
+from replicas import ReplicaPool
 
 app = FastAPI()
 
-ML_MODELS_SERVICE_URL = "http://localhost:5000" # TODO: Replace with your actual deployed ML Models service URL
+# Comma-separated ML Models service replicas; requests only go to replicas whose /readyz reports ready
+ML_MODELS_SERVICE_URLS = [
+    u.strip().rstrip("/")
+    for u in os.environ.get("ML_MODELS_SERVICE_URL", "http://localhost:5000").split(",")
+    if u.strip()
+]
+READINESS_INTERVAL = float(os.environ.get("ML_READINESS_INTERVAL", "2"))  # seconds between /readyz polls
+REQUEST_TIMEOUT = float(os.environ.get("ML_REQUEST_TIMEOUT", "30"))  # seconds a replica may take to answer
+
+replicas = ReplicaPool(ML_MODELS_SERVICE_URLS, interval=READINESS_INTERVAL, request_timeout=REQUEST_TIMEOUT)
+
+# Keeps outputs/ within its retention and size quota (detection/janitor.py) while the service runs
+janitor = Janitor(**load_settings()) if os.environ.get("OUTPUTS_JANITOR", "1") != "0" else None
+
+
+@app.on_event("startup")
+def start_readiness_checks():
+    replicas.start()
+    if janitor is not None:
+        janitor.start()
+
+
+@app.on_event("shutdown")
+def stop_readiness_checks():
+    replicas.stop()
+    if janitor is not None:
+        janitor.stop()
 
 @app.post("/detect-license-plate/")
-async def detect_license_plate(file: UploadFile = File(...)):
+async def detect_license_plate(
+    file: UploadFile = File(...),
+    camera: str = Form(None),
+    conf: str = Form(None),
+    iou: str = Form(None),
+    classes: str = Form(None),
+    max_det: str = Form(None),
+    mode: str = Form(None),
+    tile: str = Form(None),
+    overlap: str = Form(None),
+):
     """
     Receives an image, forwards it to the ML Models service, and returns the detection results.
+    The optional detection fields are passed through as sent; the ML Models service validates them and fills in its
+    per-camera and default values for the ones left out.
     """
     if not file.content_type.startswith("image/"):
         raise HTTPException(status_code=400, detail="Only image files are allowed.")
 
     try:
         image_data = await file.read()
+        fields = {"camera": camera, "conf": conf, "iou": iou, "classes": classes, "max_det": max_det, "mode": mode,
+                  "tile": tile, "overlap": overlap}
+        fields = {k: v for k, v in fields.items() if v not in (None, "")}
         
-        # Forward the image to the ML Models service
+        # Forward the image to a ready ML Models service replica, moving on to the next one if it is down or cold
         # The ML Models service should have an endpoint to accept image data and return predictions
-        ml_response = requests.post(
-            f"{ML_MODELS_SERVICE_URL}/predict",
-            files={"file": (file.filename, image_data, file.content_type)}
+        # The blocking call runs on the thread pool, so a slow replica does not stall the event loop
+        ml_response = await run_in_threadpool(
+            replicas.post,
+            "/predict",
+            files={"file": (file.filename, image_data, file.content_type)},
+            data=fields,
         )
+        if ml_response is None:
+            return JSONResponse(status_code=503, content={"detail": "No ML Models service replica is ready."})
+        if ml_response.status_code == 400:  # invalid detection fields, reported back to the caller
+            return JSONResponse(status_code=400, content={"detail": ml_response.json().get("error", ml_response.text)})
         ml_response.raise_for_status() # Raise an HTTPError for bad responses (4xx or 5xx)
         
         # Assuming the ML service returns JSON with detection results
@@ -32,13 +85,27 @@ async def detect_license_plate(file: UploadFile = File(...)):
         
         return JSONResponse(content={"filename": file.filename, "detections": detections})
 
-    except requests.exceptions.ConnectionError:
-        raise HTTPException(status_code=503, detail="ML Models service is unavailable.")
+    except requests.exceptions.Timeout:
+        detail = f"ML Models service did not answer within {REQUEST_TIMEOUT}s."
+        return JSONResponse(status_code=504, content={"detail": detail})
     except requests.exceptions.RequestException as e:
         raise HTTPException(status_code=500, detail=f"Error from ML Models service: {e}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {e}")
 
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the API process is up."""
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: at least one ML Models service replica is ready."""
+    ready = sorted(replicas.ready)
+    return JSONResponse(status_code=200 if ready else 503, content={"ready": bool(ready), "replicas": ready})
+
+
 @app.get("/")
 @app.head("/")  # Add this line to allow HEAD requests
 async def root():
@@ -0,0 +1,96 @@
+"""
+Readiness-aware routing to the ML Models service replicas.
+
+ReplicaPool polls each replica's /readyz on a background thread and hands out the ready ones round-robin. post() sends
+a request to the next ready replica and moves on when one refuses the connection or answers 503 while it warms up,
+so a restarted replica never sees traffic before its warmup has finished.
+
+Usage:
+    replicas = ReplicaPool(["http://ml-1:5000", "http://ml-2:5000"], interval=2.0).start()
+    response = replicas.post("/predict", files={"file": (name, data, content_type)})  # None if no replica is ready
+"""
+
+import itertools
+import threading
+
+import requests
+
+
+class ReplicaPool:
+    """
+    Polls each ML Models service replica's /readyz and hands out the ready ones round-robin.
+
+    Args:
+        urls: replica base URLs.
+        interval: seconds between /readyz polls.
+        timeout: seconds to wait for a /readyz answer, and for a connection to a replica.
+        request_timeout: seconds a replica may take to answer a request, so a hung replica cannot block the caller.
+    """
+
+    def __init__(self, urls, interval=2.0, timeout=1.0, request_timeout=30.0):
+        self.urls = urls
+        self.interval, self.timeout, self.request_timeout = interval, timeout, request_timeout
+        self.ready = set()
+        self._lock = threading.Lock()
+        self._counter = itertools.count()
+        self._stop = threading.Event()
+
+    def start(self):
+        """Checks every replica once, then keeps polling on a daemon thread; returns self."""
+        self.check_all()
+        threading.Thread(target=self.run, name="readiness", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def check_all(self):
+        for url in self.urls:
+            try:
+                ok = requests.get(f"{url}/readyz", timeout=self.timeout).status_code == 200
+            except requests.exceptions.RequestException:
+                ok = False
+            self.mark(url, ok)
+
+    def run(self):
+        while not self._stop.wait(self.interval):
+            self.check_all()
+
+    def mark(self, url, ok):
+        with self._lock:
+            if ok:
+                self.ready.add(url)
+            else:
+                self.ready.discard(url)  # until the next poll finds it ready again
+
+    def pick(self):
+        """Returns the next ready replica URL, or None if no replica is ready."""
+        with self._lock:
+            ready = [u for u in self.urls if u in self.ready]
+        return ready[next(self._counter) % len(ready)] if ready else None
+
+    def post(self, path, **kwargs):
+        """
+        POSTs to `path` on the next ready replica and returns the response, or None if no replica is ready.
+
+        A replica that refuses the connection or answers 503 (restarted and warming up) is marked not ready and the
+        next one is tried. A replica that does not answer within `request_timeout` is marked not ready as well, and
+        the requests.exceptions.Timeout is raised rather than sending the request to another replica again.
+        """
+        for _ in range(len(self.urls)):
+            url = self.pick()
+            if url is None:
+                break
+            try:
+                response = requests.post(f"{url}{path}", timeout=(self.timeout, self.request_timeout), **kwargs)
+            except requests.exceptions.ConnectionError:  # refused, or no connection within `timeout`
+                self.mark(url, False)
+                continue
+            except requests.exceptions.Timeout:
+                self.mark(url, False)
+                raise
+            if response.status_code == 503:
+                self.mark(url, False)
+                continue
+            return response
+        return None
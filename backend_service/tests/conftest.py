@@ -0,0 +1,10 @@
+import sys
+from pathlib import Path
+
+DETECTION_DIR = Path(__file__).resolve().parents[1] / "detection"
+if str(DETECTION_DIR) not in sys.path:
+    sys.path.insert(0, str(DETECTION_DIR))
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]  # replicas.py
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.append(str(BACKEND_DIR))
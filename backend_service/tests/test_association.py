@@ -0,0 +1,55 @@
+import numpy as np
+
+from association import associate_riders, class_ids, containment, crop_box
+
+NAMES = ["rider", "helmet", "license-plate"]
+
+
+def test_containment():
+    inner = np.array([[0, 0, 10, 10], [5, 5, 15, 15]], dtype=float)
+    outer = np.array([[0, 0, 10, 10]], dtype=float)
+    np.testing.assert_allclose(containment(inner, outer), [[1.0], [0.25]], atol=1e-6)
+
+
+def test_class_ids_list_and_dict():
+    assert class_ids(NAMES, ("helmet",)).tolist() == [1]
+    assert class_ids({0: "plate", 3: "rider"}, ("rider", "plate")).tolist() == [0, 3]
+    assert class_ids(NAMES, ("car",)).tolist() == []
+
+
+def test_parts_go_to_the_rider_that_contains_them():
+    boxes = [
+        [0, 0, 100, 200],  # 0 rider A
+        [200, 0, 300, 200],  # 1 rider B
+        [210, 0, 250, 40],  # 2 helmet in B
+        [20, 150, 60, 170],  # 3 plate in A
+        [400, 0, 440, 40],  # 4 helmet outside both riders
+    ]
+    riders, helmets, plates = associate_riders(boxes, [0, 0, 1, 2, 1], NAMES)
+    assert riders.tolist() == [0, 1]
+    assert helmets.tolist() == [-1, 2]  # rider A is the violation
+    assert plates.tolist() == [3, -1]
+
+
+def test_each_part_belongs_to_one_rider_only():
+    boxes = [[0, 0, 100, 200], [50, 0, 150, 200], [60, 0, 90, 30]]  # helmet inside both overlapping riders
+    riders, helmets, _ = associate_riders(boxes, [0, 0, 1], NAMES)
+    assert sorted(helmets.tolist()) == [-1, 2]
+
+
+def test_contain_threshold():
+    boxes = [[0, 0, 100, 200], [80, 0, 120, 40]]  # half of the helmet inside the rider
+    assert associate_riders(boxes, [0, 1], NAMES, contain_thres=0.6)[1].tolist() == [-1]
+    assert associate_riders(boxes, [0, 1], NAMES, contain_thres=0.4)[1].tolist() == [1]
+
+
+def test_no_riders():
+    riders, helmets, plates = associate_riders(np.zeros((0, 4)), [], NAMES)
+    assert len(riders) == len(helmets) == len(plates) == 0
+
+
+def test_crop_box_clips_to_the_image():
+    im = np.arange(10 * 20 * 3, dtype=np.uint8).reshape(10, 20, 3)
+    crop = crop_box(im, [-5, 2, 8, 30], pad=1)
+    assert crop.shape == (9, 9, 3)
+    assert np.shares_memory(crop, im)
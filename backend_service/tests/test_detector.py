@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("models.common", reason="needs the YOLOv5 repository on sys.path")
+
+from detector import Detector
+
+
+def bare_detector(pt=True, imgsz=(416, 416)):
+    """A Detector without a model, for the pre- and post-processing helpers."""
+    detector = Detector.__new__(Detector)
+    detector.imgsz, detector.stride, detector.pt = imgsz, 32, pt
+    detector.names = {0: "helmet", 1: "plate"}
+    return detector
+
+
+def test_preprocess_letterboxes_a_batch_to_one_shape():
+    ims = [np.zeros((480, 640, 3), np.uint8), np.zeros((1080, 1920, 3), np.uint8), np.zeros((100, 50, 3), np.uint8)]
+    x = bare_detector().preprocess(ims)
+    assert x.shape == (3, 3, 416, 416) and x.dtype == np.uint8
+    assert x.flags["C_CONTIGUOUS"]
+
+
+def test_preprocess_keeps_minimum_padding_for_a_single_pytorch_image():
+    im = np.zeros((480, 640, 3), np.uint8)
+    assert bare_detector(pt=True).preprocess([im]).shape == (1, 3, 320, 416)
+    assert bare_detector(pt=False).preprocess([im]).shape == (1, 3, 416, 416)  # exported models are static
+
+
+def test_preprocess_converts_bgr_to_rgb():
+    im = np.zeros((416, 416, 3), np.uint8)
+    im[..., 0] = 255  # blue
+    x = bare_detector().preprocess([im])
+    assert x[0, 2].min() == 255 and x[0, 0].max() == 0
+
+
+def test_describe_lists_the_most_confident_first():
+    det = np.array([[0, 0, 4, 4, 0.5, 1], [0, 0, 4, 4, 0.9, 0]])
+    assert bare_detector().describe(det) == ["helmet 0.90", "plate 0.50"]
+    assert bare_detector().describe(np.zeros((0, 6))) == []
+
+
+def test_empty_call_skips_the_model():
+    assert bare_detector()([]) == []
@@ -0,0 +1,66 @@
+import os
+import time
+
+from janitor import Janitor
+
+
+def make(path, size, age_s):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+    t = time.time() - age_s
+    os.utime(path, (t, t))
+    return path
+
+
+def janitor(root, **kwargs):
+    return Janitor(root, **{"retention_hours": 1, "min_age": 60, "batch_pause": 0, **kwargs})
+
+
+def test_retention_expires_only_temp(tmp_path):
+    old_temp = make(tmp_path / "temp" / "run1" / "a.jpg", 10, 7200)
+    new_temp = make(tmp_path / "temp" / "b.jpg", 10, 600)
+    old_result = make(tmp_path / "detections" / "c.jpg", 10, 7200)
+    assert janitor(tmp_path).sweep() == (1, 10)
+    assert not old_temp.exists() and new_temp.exists() and old_result.exists()
+    assert not (tmp_path / "temp" / "run1").exists()  # emptied directories are pruned
+    assert (tmp_path / "temp").is_dir()
+
+
+def test_quota_deletes_oldest_temp_files_only(tmp_path):
+    mb = 2**20
+    oldest = make(tmp_path / "temp" / "a.bin", mb, 5000)
+    older = make(tmp_path / "temp" / "b.bin", mb, 4000)
+    recent = make(tmp_path / "temp" / "c.bin", mb, 10)  # within min_age, never touched
+    result = make(tmp_path / "detections" / "d.bin", mb, 9000)
+    csv = make(tmp_path / "detections" / "predictions.csv", mb, 9000)
+    manifest = make(tmp_path / "detections" / "manifest.jsonl", mb, 9000)
+    n, freed = janitor(tmp_path, retention_hours=24, max_size_mb=3).sweep()
+    assert (n, freed) == (1, mb)  # 4 MB of deletable files, one temp file brings it to 3 MB
+    assert not oldest.exists()
+    assert all(p.exists() for p in (older, recent, result, csv, manifest))
+
+
+def test_quota_never_deletes_results_even_when_over(tmp_path):
+    result = make(tmp_path / "detections" / "d.bin", 2**20, 9000)
+    assert janitor(tmp_path, retention_hours=24, max_size_mb=0.5).sweep() == (0, 0)
+    assert result.exists()
+
+
+def test_custom_quota_dirs(tmp_path):
+    result = make(tmp_path / "detections" / "d.bin", 2**20, 9000)
+    assert janitor(tmp_path, retention_hours=24, max_size_mb=0.5, quota=("detections",)).sweep() == (1, 2**20)
+    assert not result.exists()
+
+
+def test_missing_root(tmp_path):
+    assert janitor(tmp_path / "missing").sweep() == (0, 0)
+
+
+def test_start_and_stop(tmp_path):
+    old = make(tmp_path / "temp" / "a.jpg", 10, 7200)
+    j = janitor(tmp_path, interval_minutes=60).start()
+    deadline = time.time() + 5
+    while old.exists() and time.time() < deadline:
+        time.sleep(0.01)
+    j.stop()
+    assert not old.exists()
@@ -0,0 +1,71 @@
+import csv
+import os
+
+from manifest import Manifest, config_fingerprint, file_key, prune_csv
+
+
+def write(path, text):
+    path.write_text(text)
+    return path
+
+
+def test_config_fingerprint_is_order_independent():
+    assert config_fingerprint(a=1, b="x") == config_fingerprint(b="x", a=1)
+    assert config_fingerprint(a=1) != config_fingerprint(a=2)
+
+
+def test_pending_and_mark(tmp_path):
+    a, b = write(tmp_path / "a.jpg", "a"), write(tmp_path / "b.jpg", "b")
+    manifest = Manifest(tmp_path / "out" / "manifest.jsonl", "cfg")
+    assert manifest.pending([a, b]) == [a, b]
+    manifest.mark(a, file_key(a))
+    assert manifest.pending([a, b]) == [b]
+    assert len(manifest) == 1
+
+
+def test_survives_restart_and_invalidates_on_config_change(tmp_path):
+    a = write(tmp_path / "a.jpg", "a")
+    path = tmp_path / "manifest.jsonl"
+    Manifest(path, "cfg").mark(a)
+    assert Manifest(path, "cfg").is_done(a)
+    assert not Manifest(path, "other").is_done(a)
+
+
+def test_changed_file_is_pending_again(tmp_path):
+    a = write(tmp_path / "a.jpg", "a")
+    manifest = Manifest(tmp_path / "manifest.jsonl")
+    manifest.mark(a)
+    write(a, "replaced")
+    os.utime(a, ns=(0, 0))
+    assert manifest.pending([a]) == [a]
+
+
+def test_mark_uses_the_key_captured_at_read_time(tmp_path):
+    a = write(tmp_path / "a.jpg", "a")
+    manifest = Manifest(tmp_path / "manifest.jsonl")
+    key = file_key(a)
+    write(a, "replaced while it was processed")
+    manifest.mark(a, key)
+    assert not manifest.is_done(a)  # the new contents were never processed
+
+
+def test_missing_file_and_torn_line(tmp_path):
+    path = tmp_path / "manifest.jsonl"
+    a = write(tmp_path / "a.jpg", "a")
+    Manifest(path).mark(a)
+    with open(path, "a") as f:
+        f.write('{"path": "/x", "si')  # interrupted write
+    manifest = Manifest(path)
+    assert manifest.is_done(a)
+    assert not manifest.is_done(tmp_path / "missing.jpg")
+
+
+def test_prune_csv(tmp_path):
+    path = tmp_path / "predictions.csv"
+    with open(path, "w", newline="") as f:
+        csv.writer(f).writerows([["Image Name", "Prediction"], ["a.jpg", "x"], ["b.jpg", "y"], ["a.jpg", "z"]])
+    assert prune_csv(path, {"a.jpg"}) == 2
+    with open(path, newline="") as f:
+        assert list(csv.reader(f)) == [["Image Name", "Prediction"], ["b.jpg", "y"]]
+    assert prune_csv(path, set()) == 0
+    assert prune_csv(tmp_path / "missing.csv", {"a.jpg"}) == 0
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from motion_gate import MotionGate
+
+
+def frame(value=0, box=None):
+    im = np.full((240, 320, 3), value, dtype=np.uint8)
+    if box is not None:
+        x1, y1, x2, y2 = box
+        im[y1:y2, x1:x2] = 255
+    return im
+
+
+def test_unknown_method():
+    with pytest.raises(ValueError):
+        MotionGate(method="optical-flow")
+
+
+def test_diff_skips_static_frames_and_infers_changes():
+    gate = MotionGate(method="diff", threshold=0.005, refresh=0)
+    assert gate.changed("cam", frame())  # first frame of a stream
+    assert not gate.changed("cam", frame())
+    assert gate.changed("cam", frame(box=(100, 80, 180, 160)))
+    assert not gate.changed("cam", frame(box=(100, 80, 180, 160)))  # compared against the last inferred frame
+    assert (gate.checked, gate.skipped) == (4, 2)
+    assert "skipped 2/4" in gate.summary()
+
+
+def test_streams_are_independent():
+    gate = MotionGate(refresh=0)
+    assert gate.changed("a", frame())
+    assert gate.changed("b", frame(box=(0, 0, 320, 240)))
+    assert not gate.changed("a", frame())
+
+
+def test_refresh_forces_inference():
+    gate = MotionGate(refresh=3)
+    results = [gate.changed("cam", frame()) for _ in range(7)]
+    assert results == [True, False, False, True, False, False, True]
+
+
+def test_reset_forgets_the_reference():
+    gate = MotionGate(refresh=0)
+    gate.changed("cam", frame())
+    gate.reset("cam")
+    assert gate.changed("cam", frame())
+    gate.reset()
+    assert gate.changed("cam", frame())
+
+
+def test_mog2_detects_a_new_object():
+    gate = MotionGate(method="mog2", threshold=0.01, refresh=0)
+    for _ in range(20):  # learn the background
+        gate.changed("cam", frame(40))
+    assert not gate.changed("cam", frame(40))
+    assert gate.changed("cam", frame(40, box=(100, 80, 200, 180)))
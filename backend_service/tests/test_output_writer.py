@@ -0,0 +1,109 @@
+import gc
+import threading
+import weakref
+
+import cv2
+import numpy as np
+import pytest
+
+from output_writer import AsyncWriter, imwrite_params
+
+
+def image(value, size=(48, 64)):
+    return np.full((*size, 3), value, dtype=np.uint8)
+
+
+def test_rejects_bad_settings():
+    with pytest.raises(ValueError):
+        AsyncWriter(crop_format="gif")
+    with pytest.raises(ValueError):
+        AsyncWriter(quality=101)
+
+
+def test_imwrite_params():
+    assert imwrite_params("a.jpg", 90) == [cv2.IMWRITE_JPEG_QUALITY, 90]
+    assert imwrite_params("a.webp", 80) == [cv2.IMWRITE_WEBP_QUALITY, 80]
+    assert imwrite_params("a.png", 90) == []
+
+
+def test_imwrite_calls_back_with_the_written_path(tmp_path):
+    written = []
+    with AsyncWriter(workers=2) as writer:
+        for k in range(6):
+            writer.imwrite(tmp_path / "sub" / f"{k}.png", image(k * 40), callback=written.append)
+    assert sorted(p.name for p in written) == [f"{k}.png" for k in range(6)]
+    assert writer.written == 6 and writer.errors == 0
+    assert not list((tmp_path / "sub").glob(".*"))  # no temporary files left behind
+    assert cv2.imread(str(tmp_path / "sub" / "3.png"))[0, 0, 0] == 120
+
+
+def test_video_frames_are_written_in_order(tmp_path):
+    path = str(tmp_path / "vid.avi")
+    with AsyncWriter(workers=3, queue_size=2, fourcc="MJPG") as writer:
+        for k in range(10):
+            writer.write_video("cam", path, image(k * 25), fps=10, size=(64, 48))
+        writer.release_video("cam")
+    cap = cv2.VideoCapture(path)
+    means = []
+    while True:
+        ok, im = cap.read()
+        if not ok:
+            break
+        means.append(im.mean())
+    cap.release()
+    assert len(means) == 10
+    assert means == sorted(means)
+
+
+def test_barrier_runs_after_earlier_writes(tmp_path):
+    done = threading.Event()
+    with AsyncWriter(workers=3) as writer:
+        for k in range(9):
+            writer.imwrite(tmp_path / f"{k}.png", image(k))
+        writer.barrier(lambda: done.set() if len(list(tmp_path.glob("*.png"))) == 9 else None)
+        assert done.wait(5)
+
+
+def test_barrier_is_skipped_after_a_failed_write(tmp_path):
+    called = []
+    with AsyncWriter(workers=2) as writer:
+        writer.imwrite(tmp_path / "bad.unknown", image(0))  # no encoder for the suffix
+        writer.barrier(lambda: called.append(True))
+    assert writer.errors == 1
+    assert not called
+
+
+def test_crops_are_numbered_like_increment_path(tmp_path):
+    stem = tmp_path / "crops" / "img"
+    with AsyncWriter(workers=2, crop_format="png") as writer:
+        paths = [writer.save_crop(stem, image(k)) for k in range(3)]
+    assert [p.rsplit("/", 1)[1] for p in paths] == ["img.png", "img2.png", "img3.png"]
+    assert all((tmp_path / "crops" / name).exists() for name in ("img.png", "img2.png", "img3.png"))
+
+
+def test_crops_of_an_earlier_run_are_not_overwritten(tmp_path):
+    stem = tmp_path / "img"
+    with AsyncWriter(crop_format="png") as writer:
+        writer.save_crop(stem, image(10))
+        writer.save_crop(stem, image(20))
+    with AsyncWriter(crop_format="png") as writer:  # second run with fresh counters
+        path = writer.save_crop(stem, image(30))
+    assert path.endswith("img3.png")
+    assert cv2.imread(str(tmp_path / "img.png"))[0, 0, 0] == 10
+
+
+def test_close_is_idempotent_and_rejects_new_writes(tmp_path):
+    writer = AsyncWriter()
+    writer.close()
+    writer.close()
+    with pytest.raises(RuntimeError):
+        writer.imwrite(tmp_path / "a.png", image(0))
+
+
+def test_closed_writer_is_not_kept_alive():
+    writer = AsyncWriter()
+    writer.close()
+    ref = weakref.ref(writer)
+    del writer
+    gc.collect()
+    assert ref() is None  # the exit hook registered at start-up was dropped by close()
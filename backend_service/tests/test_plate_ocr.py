@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from plate_ocr import PlateOCR, StubRecognizer, create_recognizer, normalize_plate, pad_batch, upscale
+
+
+def crop(value, shape=(20, 60)):
+    return np.full((*shape, 3), value, dtype=np.uint8)
+
+
+class SizeRecognizer(StubRecognizer):
+    """Stub that also records the shape of every image it is given."""
+
+    def __init__(self):
+        super().__init__(text="KA01AB1234", conf=0.9)
+        self.shapes = []
+
+    def recognize(self, images):
+        self.shapes.extend(im.shape for im in images)
+        return super().recognize(images)
+
+
+def test_normalize_plate():
+    assert normalize_plate(" ka-01 ab.1234 ") == "KA01AB1234"
+
+
+def test_upscale_reaches_min_height_within_max_scale():
+    assert upscale(crop(0, (16, 40)), min_height=64).shape == (64, 160, 3)
+    assert upscale(crop(0, (8, 20)), min_height=64, max_scale=4.0).shape == (32, 80, 3)  # capped at 4x
+    tall = crop(0, (100, 200))
+    assert upscale(tall, min_height=64) is tall  # never downscaled
+
+
+def test_pad_batch_pads_to_the_largest_crop():
+    padded = pad_batch([crop(0, (10, 30)), crop(0, (20, 15))])
+    assert [im.shape for im in padded] == [(20, 30, 3), (20, 30, 3)]
+    assert padded[0][15, 5, 0] == 114 and padded[0][5, 5, 0] == 0
+
+
+def test_read_recognizes_all_crops_in_one_batch():
+    stub = SizeRecognizer()
+    ocr = PlateOCR(stub, min_height=40)
+    results = ocr.read([crop(1), crop(2, (10, 30)), crop(3)])
+    assert results == [("KA01AB1234", 0.9)] * 3
+    assert stub.calls == 1 and stub.images == 3
+    assert stub.shapes == [(40, 120, 3), (40, 120, 3), (40, 120, 3)]  # upscaled before recognition
+
+
+def test_identical_crops_hit_the_cache():
+    stub = StubRecognizer("MH12", 0.8)
+    ocr = PlateOCR(stub)
+    ocr.read([crop(1), crop(1), crop(2)])  # duplicates within a batch are read once
+    assert stub.images == 2
+    assert ocr.read([crop(2), crop(1)]) == [("MH12", 0.8)] * 2
+    assert stub.calls == 1  # all hits, no second batch
+    assert (ocr.hits, ocr.misses) == (2, 2)
+    assert "2 crops recognized, 2 cache hits (50.0%)" in ocr.summary()
+
+
+def test_cache_key_includes_the_shape():
+    assert PlateOCR.key(crop(0, (10, 60))) != PlateOCR.key(crop(0, (60, 10)))
+
+
+def test_cache_is_bounded_and_can_be_disabled():
+    stub = StubRecognizer("X")
+    ocr = PlateOCR(stub, cache_size=2)
+    ocr.read([crop(1), crop(2), crop(3)])
+    assert len(ocr.cache) == 2
+    ocr.read([crop(1)])  # evicted as the least recently used
+    assert stub.images == 4
+
+    uncached = PlateOCR(StubRecognizer("X"), cache_size=0)
+    uncached.read([crop(1)])
+    uncached.read([crop(1)])
+    assert uncached.recognizer.images == 2 and not uncached.cache
+
+
+def test_empty_crops_are_not_recognized():
+    stub = StubRecognizer("X")
+    assert PlateOCR(stub).read([crop(0, (0, 10))]) == [("", 0.0)]
+    assert stub.calls == 0
+
+
+def test_create_recognizer():
+    stub = create_recognizer("stub", text="AB12")
+    assert isinstance(stub, StubRecognizer) and stub.text == "AB12"
+    assert isinstance(create_recognizer("plate_ocr:StubRecognizer"), StubRecognizer)
+    with pytest.raises(ValueError):
+        create_recognizer("tesseract")
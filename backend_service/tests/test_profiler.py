@@ -0,0 +1,91 @@
+import csv
+import json
+import threading
+import time
+
+from profiler import StageProfiler
+
+
+def test_stage_and_lap_record_duration_thread_and_frame():
+    prof = StageProfiler()
+    with prof.stage("infer", 7):
+        time.sleep(0.001)
+    t = prof.lap("post", time.perf_counter() - 0.002, frame=7)
+    assert t > prof.t0
+    (s1, tid1, start1, dur1, f1), (s2, _, _, dur2, f2) = prof.events
+    assert (s1, f1, s2, f2) == ("infer", 7, "post", 7)
+    assert dur1 >= 0.001 and dur2 >= 0.002
+    assert prof.threads[tid1] == threading.current_thread().name
+
+
+def test_batched_stages_record_every_frame():
+    prof = StageProfiler()
+    prof.add("infer", 0.0, 1.0, frame=range(5, 9))
+    prof.add("pre", 0.0, 1.0, frame=[3])
+    assert [e[4] for e in prof.events] == [[5, 6, 7, 8], 3]
+
+
+def test_disabled_profiler_records_nothing(tmp_path):
+    prof = StageProfiler(enabled=False)
+    with prof.stage("infer", 1):
+        pass
+    prof.lap("post", time.perf_counter())
+    assert not prof.events and not prof.durations
+    assert prof.export(tmp_path) is None
+    assert not list(tmp_path.iterdir())
+
+
+def test_stages_from_several_threads():
+    prof = StageProfiler()
+    barrier = threading.Barrier(4)  # keep all threads alive, so no thread id is reused
+
+    def work(k):
+        for _ in range(10):
+            with prof.stage("io", k):
+                pass
+        barrier.wait()
+
+    threads = [threading.Thread(target=work, args=(k,), name=f"writer-{k}") for k in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(prof.durations["io"]) == 40
+    assert sorted(prof.threads.values()) == [f"writer-{k}" for k in range(4)]
+
+
+def test_summary_percentiles_in_stage_order():
+    prof = StageProfiler()
+    for k in range(100):
+        prof.add("load", 0.0, 0.001)
+        prof.add("infer", 0.0, (k + 1) / 1000)
+    rows = prof.summary()
+    assert [r["stage"] for r in rows] == ["load", "infer"]
+    infer = rows[1]
+    assert infer["count"] == 100
+    assert abs(infer["mean_ms"] - 50.5) < 1e-6 and abs(infer["max_ms"] - 100) < 1e-6
+    assert infer["p50_ms"] < infer["p95_ms"] < infer["p99_ms"] <= infer["max_ms"]
+
+
+def test_export_writes_a_chrome_trace_and_csv(tmp_path):
+    prof = StageProfiler()
+    start = prof.t0 + 0.5
+    prof.add("infer", start, start + 0.25, frame=[1, 2])
+    prof.add("post", start, start + 0.125)
+    trace_path, csv_path = prof.export(tmp_path / "out")
+    trace = json.loads(trace_path.read_text())
+    meta, infer, post = trace["traceEvents"]
+    assert meta["ph"] == "M" and meta["args"]["name"] == threading.current_thread().name
+    assert (infer["name"], infer["ph"], infer["ts"], infer["dur"]) == ("infer", "X", 500000.0, 250000.0)
+    assert infer["args"] == {"frame": [1, 2]} and "args" not in post
+    with open(csv_path) as f:
+        rows = list(csv.DictReader(f))
+    assert [r["stage"] for r in rows] == ["infer", "post"] and rows[0]["mean_ms"] == "250.000"
+
+
+def test_trace_is_truncated_but_durations_are_kept():
+    prof = StageProfiler(max_events=3)
+    for _ in range(5):
+        prof.add("io", 0.0, 0.001)
+    assert len(prof.events) == 3 and prof.truncated == 2
+    assert prof.summary()[0]["count"] == 5
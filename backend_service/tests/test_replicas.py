@@ -0,0 +1,101 @@
+import pytest
+
+requests = pytest.importorskip("requests")
+
+import replicas
+from replicas import ReplicaPool
+
+URLS = ["http://ml-1:5000", "http://ml-2:5000", "http://ml-3:5000"]
+
+
+class Response:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class FakeReplicas:
+    """Stands in for requests.get/post: `behaviour[url]` is a status code or an exception to raise."""
+
+    def __init__(self, behaviour):
+        self.behaviour = behaviour
+        self.calls = []
+
+    def __call__(self, url, timeout=None, **kwargs):
+        base = url.rsplit("/", 1)[0]
+        self.calls.append((base, timeout))
+        outcome = self.behaviour.get(base, 200)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return Response(outcome)
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    def install(behaviour):
+        fake = FakeReplicas(behaviour)
+        monkeypatch.setattr(replicas.requests, "get", fake)
+        monkeypatch.setattr(replicas.requests, "post", fake)
+        return fake
+
+    return install
+
+
+def ready_pool(urls=URLS, **kwargs):
+    pool = ReplicaPool(urls, **kwargs)
+    for url in urls:
+        pool.mark(url, True)
+    return pool
+
+
+def test_pick_round_robins_over_ready_replicas():
+    pool = ready_pool()
+    assert [pool.pick() for _ in range(6)] == URLS + URLS
+    pool.mark(URLS[1], False)
+    assert {pool.pick() for _ in range(4)} == {URLS[0], URLS[2]}
+    pool.mark(URLS[1], True)
+    assert {pool.pick() for _ in range(3)} == set(URLS)
+
+
+def test_pick_without_ready_replicas():
+    assert ReplicaPool(URLS).pick() is None
+
+
+def test_check_all_marks_replicas_by_readyz(fake):
+    fake({URLS[0]: 503, URLS[1]: requests.exceptions.ConnectionError()})
+    pool = ReplicaPool(URLS, timeout=0.5)
+    pool.check_all()
+    assert pool.ready == {URLS[2]}
+
+
+def test_post_skips_replicas_that_are_warming_up_or_down(fake):
+    calls = fake({URLS[0]: 503, URLS[1]: requests.exceptions.ConnectionError()}).calls
+    pool = ready_pool(timeout=0.5, request_timeout=20)
+    assert pool.post("/predict", files={}).status_code == 200
+    assert pool.post("/predict", files={}).status_code == 200
+    assert [url for url, _ in calls] == [URLS[0], URLS[2], URLS[1], URLS[2]]
+    assert calls[0][1] == (0.5, 20)  # connect and read timeouts
+    assert pool.ready == {URLS[2]}
+    pool.post("/predict")
+    assert calls[-1][0] == URLS[2]  # only the ready replica is tried now
+
+
+def test_post_returns_none_when_no_replica_answers(fake):
+    fake({url: 503 for url in URLS})
+    pool = ready_pool()
+    assert pool.post("/predict") is None
+    assert pool.ready == set()
+    assert pool.post("/predict") is None  # nothing left to try
+
+
+def test_post_passes_other_errors_through(fake):
+    fake({URLS[0]: 500})
+    assert ready_pool().post("/predict").status_code == 500  # reported to the caller, not retried
+
+
+def test_post_raises_when_a_replica_hangs(fake):
+    calls = fake({URLS[0]: requests.exceptions.ReadTimeout()}).calls
+    pool = ready_pool()
+    with pytest.raises(requests.exceptions.Timeout):
+        pool.post("/predict")
+    assert len(calls) == 1  # not sent again to another replica
+    assert URLS[0] not in pool.ready
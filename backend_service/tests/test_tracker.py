@@ -0,0 +1,75 @@
+import numpy as np
+
+from tracker import BestShot, Tracker, box_iou, greedy_match
+
+
+def moving_box(k, x0=100.0, y0=50.0, dx=4.0, size=40.0):
+    return [x0 + k * dx, y0, x0 + k * dx + size, y0 + size]
+
+
+def test_box_iou():
+    a = np.array([[0, 0, 10, 10]], dtype=float)
+    b = np.array([[0, 0, 10, 10], [5, 0, 15, 10], [20, 20, 30, 30]], dtype=float)
+    np.testing.assert_allclose(box_iou(a, b), [[1.0, 1 / 3, 0.0]], atol=1e-6)
+
+
+def test_greedy_match_takes_best_pairs_first():
+    iou = np.array([[0.9, 0.8], [0.85, 0.1]])
+    rows, cols = greedy_match(iou, 0.3)
+    assert dict(zip(rows.tolist(), cols.tolist())) == {0: 0}  # row 1 only overlaps the taken column above 0.3
+    rows, cols = greedy_match(np.zeros((0, 3)), 0.3)
+    assert len(rows) == len(cols) == 0
+
+
+def test_track_id_is_stable_and_reported_after_min_hits():
+    tracker = Tracker(min_hits=3)
+    ids = [tracker.update([[*moving_box(k), 0.9, 0]])[0] for k in range(6)]
+    assert ids[:2] == [-1, -1]
+    assert len(set(ids[2:])) == 1 and ids[2] > 0
+
+
+def test_low_confidence_detection_extends_track():
+    tracker = Tracker(high_thres=0.5, low_thres=0.1, min_hits=1)
+    first = tracker.update([[*moving_box(0), 0.9, 0]])[0]
+    assert tracker.update([[*moving_box(1), 0.2, 0]])[0] == first  # occluded frame, ByteTrack second pass
+    assert tracker.update([[*moving_box(2, x0=400.0), 0.2, 0]])[0] == -1  # low confidence never starts a track
+    assert len(tracker.tracks) == 1
+
+
+def test_class_aware_association():
+    tracker = Tracker(min_hits=1)
+    helmet = tracker.update([[*moving_box(0), 0.9, 1]])[0]
+    plate = tracker.update([[*moving_box(1), 0.9, 2]])[0]
+    assert plate != helmet
+
+
+def test_finished_after_max_age_and_flush():
+    tracker = Tracker(min_hits=1, max_age=2)
+    tid = tracker.update([[*moving_box(0), 0.9, 0]])[0]
+    finished = []
+    for _ in range(4):
+        tracker.update(np.zeros((0, 6)))
+        finished += tracker.finished
+    assert finished == [tid] and not tracker.tracks
+
+    tid = tracker.update([[*moving_box(0), 0.9, 0]])[0]
+    assert tracker.flush() == [tid] and not tracker.tracks
+
+
+def test_unconfirmed_tracks_are_not_reported_as_finished():
+    tracker = Tracker(min_hits=3, max_age=0)
+    tracker.update([[*moving_box(0), 0.9, 0]])
+    tracker.update(np.zeros((0, 6)))
+    assert tracker.finished == [] and not tracker.tracks
+
+
+def test_best_shot_keeps_highest_score():
+    best = BestShot()
+    assert best.offer(1, 0.5, "a")
+    assert not best.offer(1, 0.4, "b")
+    assert best.offer(1, 0.7, lambda: "c")  # payload built only when it wins
+    assert not best.offer(1, 0.6, lambda: 1 / 0)
+    best.offer(2, 0.1, "d")
+    assert best.pop([1, 3]) == [(1, "c")]
+    assert best.pop_all() == [(2, "d")]
+    assert best.pop_all() == []
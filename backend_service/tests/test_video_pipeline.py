@@ -0,0 +1,111 @@
+import cv2
+import numpy as np
+import pytest
+
+pytest.importorskip("utils.augmentations", reason="needs the YOLOv5 repository on sys.path")
+
+from video_pipeline import StageMeter, VideoPipeline
+
+
+class Det(list):
+    """Stand-in for a detection tensor; the pipeline only clones it."""
+
+    def clone(self):
+        return Det(self)
+
+
+def make_video(path, n=12, size=(96, 64)):
+    """Writes an MJPG video whose frame k is filled with the gray value 10 * k (mod 250)."""
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 10, size)
+    for k in range(n):
+        writer.write(np.full((size[1], size[0], 3), 10 * k % 250, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+def brightness(im0):
+    return round(float(im0.mean()) / 10)
+
+
+class Recorder:
+    """infer() and sink() callbacks that record what reached each stage."""
+
+    def __init__(self):
+        self.batches, self.frames, self.dets, self.infer_frames = [], [], [], []
+
+    def infer(self, batch, frames):
+        assert batch.dtype == np.uint8 and batch.shape[1] == 3  # letterboxed BCHW
+        assert len(frames) == len(batch)
+        self.batches.append(len(batch))
+        self.infer_frames.extend(frames)
+        return [Det([int(im.mean())]) for im in batch]
+
+    def sink(self, frame, im0, det, im_shape):
+        self.frames.append((frame, brightness(im0)))
+        self.dets.append(det)
+
+
+def test_frames_reach_the_sink_in_order_in_batches(tmp_path):
+    pipeline = VideoPipeline(make_video(tmp_path / "v.avi"), img_size=(64, 64), batch_size=4, queue_size=2)
+    rec = Recorder()
+    pipeline.run(rec.infer, rec.sink)
+    assert [f for f, _ in rec.frames] == list(range(1, 13))
+    assert [b for _, b in rec.frames] == list(range(12))
+    assert rec.infer_frames == list(range(1, 13))
+    assert sum(rec.batches) == 12 and max(rec.batches) <= 4
+    assert pipeline.meters["encode"].n == 12 and pipeline.dropped == 0
+
+
+def test_vid_stride_skips_frames(tmp_path):
+    pipeline = VideoPipeline(make_video(tmp_path / "v.avi"), img_size=(64, 64), vid_stride=3)
+    rec = Recorder()
+    pipeline.run(rec.infer, rec.sink)
+    assert rec.frames == [(3, 2), (6, 5), (9, 8), (12, 11)]
+    assert pipeline.frames == 4
+
+
+def test_gated_frames_reuse_the_previous_detections(tmp_path):
+    class EveryThird:
+        def __init__(self):
+            self.n = 0
+
+        def changed(self, key, im0):
+            self.n += 1
+            return self.n % 3 == 1
+
+    pipeline = VideoPipeline(make_video(tmp_path / "v.avi", n=6), img_size=(64, 64), gate=EveryThird())
+    rec = Recorder()
+    pipeline.run(rec.infer, rec.sink)
+    assert rec.infer_frames == [1, 4]
+    assert rec.dets[1] == rec.dets[2] == rec.dets[0] and rec.dets[4] == rec.dets[5] == rec.dets[3]
+    assert rec.dets[1] is not rec.dets[0]  # a copy, the sink rescales detections in place
+
+
+@pytest.mark.parametrize("stage", ["infer", "sink"])
+def test_errors_stop_the_pipeline_and_are_raised(tmp_path, stage):
+    rec = Recorder()
+
+    def fail(*args):
+        raise RuntimeError(stage)
+
+    pipeline = VideoPipeline(make_video(tmp_path / "v.avi", n=40), img_size=(64, 64), batch_size=2, queue_size=2)
+    with pytest.raises(RuntimeError, match=stage):
+        pipeline.run(fail if stage == "infer" else rec.infer, fail if stage == "sink" else rec.sink)
+    assert not pipeline.cap.isOpened()
+
+
+def test_get_returns_the_properties_read_at_open(tmp_path):
+    pipeline = VideoPipeline(make_video(tmp_path / "v.avi"), img_size=(64, 64))
+    assert pipeline.get(cv2.CAP_PROP_FRAME_WIDTH) == 96 and pipeline.get(cv2.CAP_PROP_FRAME_HEIGHT) == 64
+    assert pipeline.get(cv2.CAP_PROP_POS_FRAMES) == 0.0
+    pipeline.cap.release()
+
+
+def test_stage_meter_counts_frames_and_busy_time():
+    meter = StageMeter("infer")
+    with meter.time(4):
+        pass
+    assert meter.n == 4 and meter.busy > 0
+    busy, wall = meter.fps()
+    assert busy >= wall > 0
+    assert str(meter).startswith("infer 4 frames")
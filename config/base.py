@@ -64,4 +64,6 @@ ALLOWED_VIDEO_EXTENSIONS = ['.mp4', '.avi', '.mov', '.mkv']
 SAVE_CROPS = True
 SAVE_DETECTIONS = True
 CLEANUP_TEMP_FILES = True
-TEMP_FILE_RETENTION_HOURS = 24
\ No newline at end of file
+TEMP_FILE_RETENTION_HOURS = 24
+OUTPUTS_MAX_SIZE_MB = None  # total size quota for outputs/, enforced oldest-first by the janitor
+OUTPUTS_QUOTA_DIRS = ['temp']  # subdirectories of outputs/ the janitor may trim to meet the quota
@@ -120,6 +120,9 @@ ENABLE_PROFILING = False
 # File cleanup settings for production
 AUTO_CLEANUP_TEMP = True
 CLEANUP_INTERVAL_MINUTES = int(os.environ.get('CLEANUP_INTERVAL_MINUTES', '30'))
+TEMP_FILE_RETENTION_HOURS = float(os.environ.get('TEMP_FILE_RETENTION_HOURS', TEMP_FILE_RETENTION_HOURS))
+OUTPUTS_MAX_SIZE_MB = int(os.environ.get('OUTPUTS_MAX_SIZE_MB', '10240'))
+OUTPUTS_QUOTA_DIRS = os.environ.get('OUTPUTS_QUOTA_DIRS', 'temp').split(',')
 
 # Rate limiting and resource management
 MAX_REQUESTS_PER_MINUTE = int(os.environ.get('MAX_REQUESTS_PER_MINUTE', '60'))
@@ -1,44 +1,328 @@
-import tkinter as tk
-from tkinter import filedialog, scrolledtext
-import subprocess
 import os
+import queue
+import sys
+import threading
+import time
+import tkinter as tk
+from collections import deque
+from pathlib import Path
+from tkinter import filedialog, scrolledtext, ttk
+
+import cv2
+
+# Get the project root directory (parent of desktop_app)
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+DETECTION_DIR = PROJECT_ROOT / "backend_service" / "detection"
+WEIGHTS_PATH = PROJECT_ROOT / "data" / "models" / "1500img.pt"
+OUTPUT_DIR = PROJECT_ROOT / "outputs" / "detections"
+IMAGE_TYPES = ("*.jpg", "*.jpeg", "*.png", "*.bmp", "*.tif", "*.tiff", "*.webp")
+BATCH_SIZE = 4  # images per forward pass
+POLL_MS = 50  # how often the Tk thread picks up worker messages
+DISPLAY_MS = 30  # live preview refresh period, about 33 FPS
+PREVIEW_SIZE = (640, 480)  # live preview canvas (width, height)
+VIDEO_TYPES = ("*.mp4", "*.avi", "*.mov", "*.mkv")
+
+if str(DETECTION_DIR) not in sys.path:
+    sys.path.append(str(DETECTION_DIR))
+
+
+class RateMeter:
+    """Thread-safe events-per-second counter over a sliding window."""
+
+    def __init__(self, window=2.0):
+        self.window = window
+        self.count = 0
+        self._times = deque()
+        self._lock = threading.Lock()
+
+    def tick(self):
+        with self._lock:
+            self.count += 1
+            self._times.append(time.perf_counter())
+
+    def rate(self):
+        with self._lock:
+            now = time.perf_counter()
+            while self._times and now - self._times[0] > self.window:
+                self._times.popleft()
+            return len(self._times) / self.window
+
+
+class LiveSource(threading.Thread):
+    """
+    Decodes a webcam or video file on its own thread and keeps only the latest frame.
+
+    Consumers never queue behind the decoder: the detector takes whatever frame is newest when it is free, so stale
+    frames are dropped instead of adding latency. Video files are paced to their native frame rate.
+    """
+
+    def __init__(self, source):
+        super().__init__(name="capture", daemon=True)
+        self.source = source
+        self.frame, self.seq = None, 0  # latest decoded frame and its sequence number
+        self.result = (0, None)  # (seq, detections) of the latest inferred frame
+        self.capture_fps, self.infer_fps = RateMeter(), RateMeter()
+        self.error = None
+        self.stopped = False
+        self._cond = threading.Condition()
+
+    def run(self):
+        cap = cv2.VideoCapture(self.source)
+        if not cap.isOpened():
+            self.error = f"Could not open {self.source}"
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        frame_time = 1 / fps if isinstance(self.source, str) and fps > 0 else 0  # webcams pace themselves
+        next_t = time.perf_counter()
+        while not self.stopped and self.error is None:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            with self._cond:
+                self.frame, self.seq = frame, self.seq + 1
+                self._cond.notify_all()
+            self.capture_fps.tick()
+            if frame_time:
+                next_t = max(next_t + frame_time, time.perf_counter() - frame_time)  # no catch-up burst after a stall
+                time.sleep(max(0.0, next_t - time.perf_counter()))
+        cap.release()
+        self.stop()
+
+    def stop(self):
+        with self._cond:
+            self.stopped = True
+            self._cond.notify_all()
+
+    def latest(self, after=0, timeout=0.1):
+        """Waits up to `timeout` for a frame newer than sequence number `after`; returns (seq, frame)."""
+        with self._cond:
+            self._cond.wait_for(lambda: self.seq > after or self.stopped, timeout)
+            return self.seq, self.frame
+
+    def publish(self, seq, det):
+        self.result = (seq, det)
+        self.infer_fps.tick()
+
+
+class DetectionWorker(threading.Thread):
+    """
+    Loads the detector once and runs queued jobs off the Tk thread.
+
+    Every job is a list of image paths processed in batches. Progress and results are reported as messages on
+    `events`, which the Tk thread polls; the worker never touches a widget. While a LiveSource is attached and no
+    job is queued, the worker runs the same detector on the latest live frame.
+    """
+
+    def __init__(self, events, weights=WEIGHTS_PATH, imgsz=416, batch_size=BATCH_SIZE):
+        super().__init__(name="detector", daemon=True)
+        self.events = events
+        self.weights, self.imgsz, self.batch_size = weights, imgsz, batch_size
+        self.jobs = queue.Queue()
+        self.cancelled = threading.Event()
+        self.live = None  # LiveSource, set and cleared by the Tk thread
+        self.names = None  # class names, available once the model is loaded
+
+    def submit(self, paths):
+        self.jobs.put(list(paths))
+
+    def cancel(self):
+        """Drops queued jobs and stops the running one after its current batch."""
+        self.cancelled.set()
+        while not self.jobs.empty():
+            self.jobs.get_nowait()
+
+    def run(self):
+        self.events.put(("status", "Loading model..."))
+        try:
+            from detector import Detector
+            from output_writer import AsyncWriter
+
+            detector = Detector(self.weights, imgsz=self.imgsz, classes=1)  # same settings as detect2.py
+            writer = AsyncWriter(workers=1)
+        except Exception as e:
+            self.events.put(("error", f"Could not load the detector: {e}"))
+            return
+        self.names = detector.names
+        self.events.put(("ready", None))
+        last_seq = 0
+        while True:
+            live = self.live
+            if live is not None and not live.stopped and self.jobs.empty():
+                seq, frame = live.latest(after=last_seq)
+                if seq > last_seq and frame is not None:
+                    live.publish(seq, detector([frame])[0])
+                    last_seq = seq
+                continue
+            last_seq = 0
+            try:
+                paths = self.jobs.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            self.cancelled.clear()
+            try:
+                self.process(detector, writer, paths)
+            except Exception as e:
+                self.events.put(("error", f"Detection failed: {e}"))
+
+    def process(self, detector, writer, paths):
+        total, done = len(paths), 0
+        self.events.put(("progress", (0, total)))
+        for k in range(0, total, self.batch_size):
+            if self.cancelled.is_set():
+                self.events.put(("status", f"Cancelled after {done}/{total} images"))
+                return
+            batch, ims = [], []
+            for path in paths[k : k + self.batch_size]:
+                im = cv2.imread(str(path))
+                if im is None:
+                    self.events.put(("result", (path, ["could not read image"])))
+                    done += 1
+                else:
+                    batch.append(path)
+                    ims.append(im)
+            for path, im, det in zip(batch, ims, detector(ims)):
+                writer.imwrite(OUTPUT_DIR / Path(path).name, detector.annotate(im, det))
+                self.events.put(("result", (path, detector.describe(det) or ["no detections"])))
+                done += 1
+            self.events.put(("progress", (done, total)))
+        self.events.put(("status", f"Done: {total} images, results saved to {OUTPUT_DIR}"))
+
+
+class App:
+    def __init__(self, root):
+        self.root = root
+        self.root.title("YOLOv5 Object Detection")
+        self.events = queue.Queue()
+        self.worker = DetectionWorker(self.events)
+
+        buttons = tk.Frame(root)
+        buttons.pack(fill=tk.X)
+        tk.Button(buttons, text="Upload Images", command=self.select_files).pack(side=tk.LEFT)
+        tk.Button(buttons, text="Upload Folder", command=self.select_folder).pack(side=tk.LEFT)
+        tk.Button(buttons, text="Cancel", command=self.worker.cancel).pack(side=tk.LEFT)
+        tk.Button(buttons, text="Live Camera", command=lambda: self.start_live(0)).pack(side=tk.LEFT)
+        tk.Button(buttons, text="Live Video", command=self.select_video).pack(side=tk.LEFT)
+        tk.Button(buttons, text="Stop Live", command=self.stop_live).pack(side=tk.LEFT)
+
+        self.progress = ttk.Progressbar(root, mode="determinate")
+        self.progress.pack(fill=tk.X)
+        self.status = tk.Label(root, anchor=tk.W)
+        self.status.pack(fill=tk.X)
+
+        # Create and configure text widget to display output
+        self.output_text = scrolledtext.ScrolledText(root, wrap=tk.WORD, width=60, height=16)
+        self.output_text.pack(fill=tk.BOTH, expand=True)
+
+        # Live preview, packed only while a live source runs
+        self.canvas = tk.Canvas(root, width=PREVIEW_SIZE[0], height=PREVIEW_SIZE[1], bg="black")
+        self.live_status = tk.Label(root, anchor=tk.W)
+        self.live = None
+        self.photo = None  # keeps the displayed PhotoImage alive
+        self.display_fps = RateMeter()
+
+        self.worker.start()
+        self.root.after(POLL_MS, self.poll)
+
+    def select_files(self):
+        filenames = filedialog.askopenfilenames(filetypes=[("Images", " ".join(IMAGE_TYPES)), ("All files", "*")])
+        if filenames:
+            self.submit(filenames)
+
+    def select_folder(self):
+        folder = filedialog.askdirectory()
+        if folder:
+            paths = sorted(p for t in IMAGE_TYPES for p in Path(folder).glob(t))
+            if paths:
+                self.submit(paths)
+            else:
+                self.status.config(text=f"No images found in {folder}")
+
+    def select_video(self):
+        filename = filedialog.askopenfilename(filetypes=[("Videos", " ".join(VIDEO_TYPES)), ("All files", "*")])
+        if filename:
+            self.start_live(filename)
+
+    def start_live(self, source):
+        self.stop_live()
+        self.live = LiveSource(source)
+        self.live.start()
+        self.worker.live = self.live
+        self.canvas.pack()
+        self.live_status.pack(fill=tk.X)
+        self.root.after(DISPLAY_MS, self.show_live)
+
+    def stop_live(self):
+        if self.live is not None:
+            self.worker.live = None
+            self.live.stop()
+            self.live = None
+            self.canvas.pack_forget()
+            self.live_status.pack_forget()
+
+    def show_live(self):
+        """Draws the newest frame with the newest detections at display rate; runs on the Tk thread."""
+        live = self.live
+        if live is None:
+            return
+        if live.error or (live.stopped and live.frame is None):
+            self.status.config(text=live.error or f"No frames from {live.source}")
+            self.stop_live()
+            return
+        frame = live.frame
+        if frame is not None:
+            h, w = frame.shape[:2]
+            scale = min(PREVIEW_SIZE[0] / w, PREVIEW_SIZE[1] / h)
+            im = cv2.resize(frame, (round(w * scale), round(h * scale)), interpolation=cv2.INTER_AREA)
+            self.photo = tk.PhotoImage(data=cv2.imencode(".ppm", im)[1].tobytes())  # Tk reads PPM, cv2 writes it as RGB
+            self.canvas.delete("all")
+            self.canvas.create_image(0, 0, image=self.photo, anchor=tk.NW)
+            seq, det = live.result
+            for *xyxy, conf, cls in det if det is not None else []:
+                x1, y1, x2, y2 = (v * scale for v in xyxy)
+                self.canvas.create_rectangle(x1, y1, x2, y2, outline="lime", width=2)
+                label = f"{self.worker.names[int(cls)]} {conf:.2f}" if self.worker.names else f"{conf:.2f}"
+                self.canvas.create_text(x1, y1, text=label, anchor=tk.SW, fill="lime")
+            self.display_fps.tick()
+            stale = live.seq - seq if det is not None else 0
+            dropped = live.capture_fps.count - live.infer_fps.count
+            self.live_status.config(
+                text=f"capture {live.capture_fps.rate():.1f} FPS | inference {live.infer_fps.rate():.1f} FPS | "
+                f"display {self.display_fps.rate():.1f} FPS | boxes {stale} frames behind | {dropped} frames skipped"
+            )
+        if live.stopped:
+            self.status.config(text=f"Live source {live.source} ended")
+            self.live = self.worker.live = None  # keep the last frame on screen
+            return
+        self.root.after(DISPLAY_MS, self.show_live)
+
+    def submit(self, paths):
+        self.output_text.delete(1.0, tk.END)  # Clear previous output
+        self.worker.submit(paths)
+        self.status.config(text=f"Queued {len(paths)} images")
+
+    def poll(self):
+        """Applies worker messages to the widgets; runs on the Tk thread."""
+        try:
+            while True:
+                kind, data = self.events.get_nowait()
+                if kind == "result":
+                    path, lines = data
+                    self.output_text.insert(tk.END, f"{os.path.basename(path)}: {', '.join(lines)}\n")
+                    self.output_text.see(tk.END)
+                elif kind == "progress":
+                    done, total = data
+                    self.progress.config(maximum=max(total, 1), value=done)
+                    self.status.config(text=f"Processing {done}/{total} images")
+                elif kind == "ready":
+                    self.status.config(text="Model loaded")
+                else:  # "status" or "error"
+                    self.status.config(text=data)
+        except queue.Empty:
+            pass
+        self.root.after(POLL_MS, self.poll)
+
 
-# Function to perform YOLOv5 object detection
-def perform_object_detection(image_path):
-    # Get the project root directory (parent of desktop_app)
-    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    
-    # Updated paths to reference ML models in new location
-    detect_script = os.path.join(project_root, "ml_models", "detection", "detect2.py")
-    weights_path = os.path.join(project_root, "data", "models", "1500img.pt")
-    
-    result = subprocess.run([
-        "python",
-        detect_script,
-        "--weights", weights_path,
-        "--source", image_path,
-        "--img", "416"
-    ], capture_output=True, text=True)
-    return result.stdout
-
-# Function to handle image upload and object detection
-def upload_and_detect():
-    filename = filedialog.askopenfilename()
-    if filename:
-        output_text.delete(1.0, tk.END)  # Clear previous output
-        output = perform_object_detection(filename)
-        output_text.insert(tk.END, output)
-
-# Create Tkinter GUI
-root = tk.Tk()
-root.title("YOLOv5 Object Detection")
-
-# Create and configure upload button
-upload_button = tk.Button(root, text="Upload Image", command=upload_and_detect)
-upload_button.pack()
-
-# Create and configure text widget to display output
-output_text = scrolledtext.ScrolledText(root, wrap=tk.WORD, width=40, height=10)
-output_text.pack()
-
-root.mainloop()
\ No newline at end of file
+if __name__ == "__main__":
+    # Create Tkinter GUI
+    root = tk.Tk()
+    App(root)
+    root.mainloop()
@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+DESKTOP_APP_DIR = Path(__file__).resolve().parents[1]
+if str(DESKTOP_APP_DIR) not in sys.path:
+    sys.path.insert(0, str(DESKTOP_APP_DIR))
@@ -0,0 +1,106 @@
+import queue
+import sys
+import types
+
+import cv2
+import numpy as np
+import pytest
+
+pytest.importorskip("tkinter")
+
+from gui import DetectionWorker
+
+
+class FakeDetector:
+    """Detector stand-in that finds one box per image and records the batch sizes it was called with."""
+
+    names = ["helmet", "plate"]
+
+    def __init__(self, *args, **kwargs):
+        self.batches = []
+
+    def __call__(self, ims):
+        self.batches.append(len(ims))
+        return [np.array([[0, 0, 4, 4, 0.9, 1]]) for _ in ims]
+
+    def annotate(self, im0, det):
+        return im0
+
+    def describe(self, det):
+        return [f"plate {det[0][4]:.2f}"]
+
+
+class FakeWriter:
+    def __init__(self):
+        self.paths = []
+
+    def imwrite(self, path, im, callback=None):
+        self.paths.append(path)
+
+
+def drain(events):
+    out = []
+    while not events.empty():
+        out.append(events.get_nowait())
+    return out
+
+
+def images(tmp_path, n):
+    paths = []
+    for k in range(n):
+        paths.append(tmp_path / f"{k}.png")
+        cv2.imwrite(str(paths[-1]), np.full((32, 32, 3), k, dtype=np.uint8))
+    return paths
+
+
+def test_process_runs_batches_and_reports_every_image(tmp_path):
+    events, detector, writer = queue.Queue(), FakeDetector(), FakeWriter()
+    worker = DetectionWorker(events, batch_size=4)
+    paths = images(tmp_path, 6) + [tmp_path / "missing.png"]
+    worker.process(detector, writer, paths)
+    assert detector.batches == [4, 2]
+    assert [p.name for p in writer.paths] == [f"{k}.png" for k in range(6)]
+    messages = drain(events)
+    results = {data[0]: data[1] for kind, data in messages if kind == "result"}
+    assert results[paths[0]] == ["plate 0.90"] and results[paths[-1]] == ["could not read image"]
+    progress = [data for kind, data in messages if kind == "progress"]
+    assert progress == [(0, 7), (4, 7), (7, 7)]
+    assert messages[-1][0] == "status" and messages[-1][1].startswith("Done: 7 images")
+
+
+class CancellingDetector(FakeDetector):
+    """Cancels its worker during the first batch, as the Cancel button would."""
+
+    def __init__(self, worker):
+        super().__init__()
+        self.worker = worker
+
+    def __call__(self, ims):
+        self.worker.cancel()
+        return super().__call__(ims)
+
+
+def test_cancel_stops_after_the_current_batch(tmp_path):
+    events = queue.Queue()
+    worker = DetectionWorker(events, batch_size=2)
+    worker.submit(["queued.png"])
+    detector = CancellingDetector(worker)
+    worker.process(detector, FakeWriter(), images(tmp_path, 6))
+    assert detector.batches == [2]
+    assert worker.jobs.empty()  # queued jobs are dropped
+    assert drain(events)[-1] == ("status", "Cancelled after 2/6 images")
+
+
+def test_worker_reports_a_detector_that_cannot_load(monkeypatch):
+    class BrokenDetector:
+        def __init__(self, *args, **kwargs):
+            raise FileNotFoundError("1500img.pt")
+
+    monkeypatch.setitem(sys.modules, "detector", types.SimpleNamespace(Detector=BrokenDetector))
+    events = queue.Queue()
+    worker = DetectionWorker(events)
+    worker.start()
+    worker.join(5)
+    assert not worker.is_alive()
+    assert drain(events) == [("status", "Loading model..."), ("error", "Could not load the detector: 1500img.pt")]
+
@@ -1,13 +1,12 @@
 import argparse
-import io
+import functools
+import hmac
+import os
+import threading
 import torch
 from flask import Flask, request, jsonify
-from PIL import Image
 import sys
 from pathlib import Path
-import numpy as np # Required for cv2 and numpy operations
-import cv2 # Required for OpenCV image processing
-import openvino.runtime as ov # Required for OpenVINO inference
 
 # Explicitly set YOLOv5 root for Docker environment for consistent pathing
 YOLOV5_ROOT = Path("/app") / "yolov5"
@@ -15,37 +14,217 @@ YOLOV5_ROOT = Path("/app") / "yolov5"
 if str(YOLOV5_ROOT) not in sys.path:
     sys.path.append(str(YOLOV5_ROOT))
 
+# association.py is shared with the detection scripts: the image copies it to /app, local runs import it from there
+DETECTION_DIR = Path(__file__).resolve().parents[1] / "backend_service" / "detection"
+if DETECTION_DIR.is_dir() and str(DETECTION_DIR) not in sys.path:
+    sys.path.append(str(DETECTION_DIR))
+
 from models.common import DetectMultiBackend # Keep for metadata (names/stride)
-from utils.general import non_max_suppression, scale_boxes, check_img_size
+from utils.general import scale_boxes, check_img_size
 from utils.torch_utils import select_device
 
-app = Flask(__name__)
+from association import associate_riders
+from backends import BACKENDS, default_precision, load_backend
+from cascade import detect_cascade
+from model_manifest import ModelManifest
+from params import CAMERA_PARAMS, INFERENCE_MODE, inference_params
+from postprocess import detections
+from preprocess import decode_image, letterbox_geometry, letterbox_into
+from registry import ModelRegistry
+from tiling import detect_tiled, frame_regions
+from tune import TUNING_PROFILE, load_profile
 
-# Initialize OpenVINO runtime
-core = ov.Core()
+app = Flask(__name__)
 
-# Path to the quantized OpenVINO model
+# Path to the quantized OpenVINO model, or to the FP32 one saved instead if INT8 failed the accuracy gate
 QUANTIZED_MODEL_DIR = Path("/app") / "data" / "models" / "yolov5s_int8_openvino_model"
+if not QUANTIZED_MODEL_DIR.is_dir():
+    QUANTIZED_MODEL_DIR = QUANTIZED_MODEL_DIR.with_name("yolov5s_fp32_openvino_model")
 QUANTIZED_MODEL_XML = QUANTIZED_MODEL_DIR / "yolov5s.xml"
 QUANTIZED_MODEL_BIN = QUANTIZED_MODEL_DIR / "yolov5s.bin"
 
-# Load and compile the OpenVINO model
+# Static-shape build matrix (quantize_model.py --matrix); the artifact matching these settings is served if present
+MODEL_MANIFEST = Path(os.environ.get("MODEL_MANIFEST", "/app/data/models/matrix/manifest.json"))
+MODEL_IMGSZ = int(os.environ.get("MODEL_IMGSZ", "416"))
+
+# Node-specific threads, streams and batch size measured by tune.py; explicit environment variables take precedence
+profile = load_profile(os.environ.get("TUNING_PROFILE", TUNING_PROFILE))
+MODEL_BATCH = int(os.environ.get("MODEL_BATCH", profile.get("MODEL_BATCH", 1)))
+
+# Inference runtime (backends.py): openvino, onnxruntime or torchscript; the latter two serve fp32 matrix artifacts
+INFERENCE_BACKEND = os.environ.get("INFERENCE_BACKEND", "openvino")
+MODEL_PRECISION = os.environ.get("MODEL_PRECISION") or default_precision(INFERENCE_BACKEND)
+INFERENCE_THREADS = int(os.environ.get("INFERENCE_THREADS", profile.get("INFERENCE_THREADS", 0))) or None
+INFERENCE_STREAMS = int(os.environ.get("INFERENCE_STREAMS", profile.get("INFERENCE_STREAMS", 0))) or None
+OV_CACHE_DIR = os.environ.get("OV_CACHE_DIR") or None  # OpenVINO compiled-model cache, pre-populated at build
+
+# Warmup inferences per input shape before a model version takes traffic
+WARMUP_ITERATIONS = int(os.environ.get("WARMUP_ITERATIONS", "3"))
+
+# Model registry: name of the startup version, and the token for the /admin endpoints (disabled when unset). The
+# registry is per process, so gunicorn.conf.py runs a single worker while the admin endpoints are enabled
+MODEL_VERSION = os.environ.get("MODEL_VERSION", "default")
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+MODEL_SPEC_KEYS = {"manifest", "imgsz", "batch", "precision", "backend"}
+
+# Detection defaults and the per-camera and per-request parameters are in params.py. Tiled mode (tiling.py): tiles of
+# version <name> run on version <name>-tiles if one is ready, and the startup version gets a TILE_BATCH build of the
+# same model (0 to skip), so a 4K frame takes ~11 inferences instead of 85. Requests needing more than MAX_TILES
+# regions (e.g. a small tile on a large frame) are rejected rather than running into the gunicorn timeout
+TILE_BATCH = int(os.environ.get("TILE_BATCH", "8"))
+MAX_TILES = int(os.environ.get("MAX_TILES", "128"))
+
+# Cascade mode (cascade.py): riders and vehicles on the downscaled frame by a coarse version with a smaller input,
+# then helmets and plates on up to CASCADE_MAX_ROIS of their boxes, grown by CASCADE_ROI_PAD and cropped from the
+# full-resolution frame (batched on <name>-tiles if ready). The coarse version of <name> is CASCADE_COARSE_VERSION or
+# <name>-coarse, which the startup version gets from the CASCADE_COARSE_IMGSZ build (0 to skip); without a smaller
+# coarse version cascade costs more than full mode, so such requests are refused
+CASCADE_COARSE_VERSION = os.environ.get("CASCADE_COARSE_VERSION")
+CASCADE_COARSE_IMGSZ = int(os.environ.get("CASCADE_COARSE_IMGSZ", "320"))
+CASCADE_ROI_PAD = float(os.environ.get("CASCADE_ROI_PAD", "0.15"))
+CASCADE_MAX_ROIS = int(os.environ.get("CASCADE_MAX_ROIS", "16"))
+
+
+def load_model(spec):
+    """
+    Returns (backend, artifact, static_shape) for a model version spec with optional keys manifest, imgsz, batch,
+    precision and backend; missing keys default to the MODEL_* and INFERENCE_BACKEND settings.
+    """
+    backend_name = spec.get("backend", INFERENCE_BACKEND)
+    if backend_name not in BACKENDS:
+        raise ValueError(f"INFERENCE_BACKEND must be one of {list(BACKENDS)}, got '{backend_name}'")
+    manifest = Path(spec.get("manifest", MODEL_MANIFEST))
+    static_shape = manifest.exists()  # static IRs need exactly imgsz inputs, no minimum-rectangle letterbox
+    if static_shape:  # the manifest carries names and stride, no need to load the PyTorch model
+        imgsz, batch = int(spec.get("imgsz", MODEL_IMGSZ)), int(spec.get("batch", MODEL_BATCH))
+        fmt = BACKENDS[backend_name].fmt
+        precision = spec.get("precision", MODEL_PRECISION if backend_name == INFERENCE_BACKEND else None)
+        precision = precision or default_precision(backend_name)
+        if precision not in BACKENDS[backend_name].precisions:
+            raise ValueError(
+                f"MODEL_PRECISION={precision} is not available with the {backend_name} backend, which serves "
+                f"{'/'.join(BACKENDS[backend_name].precisions)} artifacts; set MODEL_PRECISION accordingly"
+            )
+        artifact = ModelManifest(manifest).select(imgsz, batch, precision, fmt=fmt)
+    elif "manifest" in spec:
+        raise FileNotFoundError(f"{manifest} not found")
+    elif backend_name == "openvino":
+        # Get model info (names, stride) from a dummy PyTorch model, the single INT8 IR does not carry them
+        dummy_pt_model = DetectMultiBackend(Path("/app") / "data" / "models" / "yolov5s.pt", device=torch.device("cpu"), dnn=False, data=YOLOV5_ROOT / "data" / "coco.yaml", fp16=False)
+        artifact = {
+            "name": QUANTIZED_MODEL_DIR.name,
+            "files": {"openvino": QUANTIZED_MODEL_XML},
+            "imgsz": [416, 416],
+            "batch": 1,
+            "precision": QUANTIZED_MODEL_DIR.name.split("_")[1],
+            "stride": int(dummy_pt_model.stride),
+            "names": dummy_pt_model.names,
+        }
+    else:
+        raise FileNotFoundError(f"{backend_name} needs the model build matrix, {manifest} not found")
+    backend = load_backend(backend_name, artifact, INFERENCE_THREADS, OV_CACHE_DIR, INFERENCE_STREAMS)
+    return backend, artifact, static_shape
+
+
+def coarse_name(version):
+    """Returns the name of the registry version that runs the first cascade stage for `version`."""
+    return CASCADE_COARSE_VERSION or f"{version.name}-coarse"
+
+
+def check_cascade(version):
+    """
+    Raises ValueError unless a coarse version with a smaller input than `version` is loaded for cascade mode; returns
+    whether it is ready, False while it still warms up.
+    """
+    coarse = registry.versions.get(coarse_name(version))
+    if coarse is None or coarse.state == "failed" or max(coarse.imgsz or version.imgsz) >= max(version.imgsz):
+        raise ValueError(f"mode cascade needs a ready coarse version '{coarse_name(version)}' with an input smaller "
+                         f"than {max(version.imgsz)} px, otherwise it costs more than mode full")
+    return coarse.state == "ready"
+
+
+def detect(version, im0, params=None):
+    """
+    Returns the (n, 6) xyxy, conf, cls detections of model `version` on BGR image `im0`, in image coordinates, with
+    detection parameters from inference_params() (the defaults if None).
+    """
+    p = params or inference_params([], version.names)
+    if p["mode"] == "tiled":
+        tiles = registry.acquire(f"{version.name}-tiles")
+        try:
+            return detect_tiled(tiles or version, im0, p, p["tile"], p["overlap"])
+        finally:
+            if tiles is not None:
+                tiles.release()
+    if p["mode"] == "cascade":
+        coarse = registry.acquire(coarse_name(version))
+        fine = registry.acquire(f"{version.name}-tiles")
+        try:
+            return detect_cascade(coarse or version, fine or version, im0, p, CASCADE_ROI_PAD, CASCADE_MAX_ROIS)
+        finally:
+            for v in (coarse, fine):
+                if v is not None:
+                    v.release()
+
+    # Letterbox straight into this thread's reused input tensor (normalized RGB CHW, one resize copy); the padding
+    # slots of a static batch stay zero
+    geometry = letterbox_geometry(im0.shape[:2], version.imgsz, stride=version.stride, auto=not version.static_shape)
+    x = version.backend.input_buffer((version.batch_size, 3, *geometry.shape))
+    letterbox_into(im0, x[0], geometry)
+
+    # Inference with the version's backend
+    results = version.backend.infer_batch(x)
+
+    # Confidence and class masks on the raw output, then YOLOv5 NMS on the remaining candidates
+    det = detections(results[0], p["conf"], p["iou"], p["classes"], p["max_det"])
+    det[:, :4] = scale_boxes(geometry.shape, det[:, :4], im0.shape).round()
+    return det
+
+
+# Named model versions; the startup version loads from the MODEL_* settings, later ones through the admin endpoints.
+# /readyz reports ready (and /predict accepts requests) once a version is warm and active.
+registry = ModelRegistry(load_model, detect, warmup_iterations=WARMUP_ITERATIONS)
 try:
-    model = core.read_model(QUANTIZED_MODEL_XML)
-    compiled_model = core.compile_model(model, "CPU")
-    input_layer = compiled_model.input(0)
-    output_layer = compiled_model.output(0)
-    # Get model info (names, stride, imgsz) if needed from the original PyTorch model or configuration
-    # For simplicity, we'll assume constants or extract from a dummy PyTorch model for names
-    # In a full conversion, names would be embedded or passed through configuration
-    # As a fallback, we can load a dummy PyTorch model to get names
-    dummy_pt_model = DetectMultiBackend(Path("/app") / "data" / "models" / "yolov5s.pt", device=torch.device("cpu"), dnn=False, data=YOLOV5_ROOT / "data" / "coco.yaml", fp16=False)
-    names = dummy_pt_model.names
-    stride = dummy_pt_model.stride
-    imgsz = (416, 416)
+    version = registry.load(MODEL_VERSION, {}, activate=True)
+    print(f"Serving {version.artifact['name']} as {MODEL_VERSION} with {version.info()['runtime']}", file=sys.stderr)
 except Exception as e:
-    print(f"Error loading OpenVINO model: {e}", file=sys.stderr)
+    print(f"Error loading model: {e}", file=sys.stderr)
     sys.exit(1)
+if TILE_BATCH > version.batch_size and version.static_shape:
+    try:
+        registry.load(f"{MODEL_VERSION}-tiles", {"batch": TILE_BATCH})
+    except Exception as e:  # tiled mode still works, one region per inference
+        print(f"No batch-{TILE_BATCH} build for tiled mode, tiles run one per inference: {e}", file=sys.stderr)
+if not CASCADE_COARSE_VERSION and 0 < CASCADE_COARSE_IMGSZ < max(version.imgsz) and version.static_shape:
+    try:
+        registry.load(f"{MODEL_VERSION}-coarse", {"imgsz": CASCADE_COARSE_IMGSZ})
+    except Exception as e:
+        print(f"No {CASCADE_COARSE_IMGSZ} px build for cascade mode: {e}", file=sys.stderr)
+if INFERENCE_MODE == "cascade" and not CASCADE_COARSE_VERSION:  # a named coarse version is loaded via the admin API
+    try:
+        check_cascade(version)
+    except ValueError as e:
+        print(f"INFERENCE_MODE=cascade: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+@app.route("/healthz", methods=["GET"])
+def healthz():
+    """Liveness: the process is up and the model is loaded."""
+    return jsonify({"status": "ok"})
+
+
+@app.route("/readyz", methods=["GET"])
+def readyz():
+    """Readiness: a warmed-up model version is active and the replica can take traffic."""
+    version = registry.active_version()
+    if version is None:
+        errors = {v["name"]: v["error"] for v in registry.info()["versions"] if v["error"]}
+        return jsonify({"ready": False, "errors": errors}), 503
+    info = version.info()
+    return jsonify({"ready": True, "version": version.name, "model": info["model"], "runtime": info["runtime"],
+                    "warmup_ms": info["warmup_ms"]})
+
 
 @app.route("/predict", methods=["POST"])
 def predict():
@@ -54,91 +233,150 @@ def predict():
 
     if request.files.get("file"):
         im_file = request.files["file"]
-        im_bytes = im_file.read()
-        img = Image.open(io.BytesIO(im_bytes))
-
-        im0 = cv2.cvtColor(np.array(img), cv2.COLOR_RGB2BGR)
-
-        # Preprocess image for OpenVINO model
-        # This uses the letterbox function from YOLOv5 utils
-        img_preprocessed = letterbox(im0, imgsz, stride=stride, auto=True)[0]
-        img_preprocessed = img_preprocessed.transpose((2, 0, 1))[::-1]  # HWC to CHW, RGB to BGR
-        img_preprocessed = np.ascontiguousarray(img_preprocessed)
-        img_preprocessed = img_preprocessed.astype(np.float32) / 255.0  # Normalize to 0.0 - 1.0
-        img_preprocessed = np.expand_dims(img_preprocessed, 0) # Add batch dimension
-
-        # OpenVINO Inference
-        results = compiled_model([img_preprocessed])[output_layer]
+        im0 = decode_image(im_file.read())  # BGR, straight from the encoded bytes
+        if im0 is None:
+            return jsonify({"error": "Could not decode image file"}), 400
 
-        # Post-process results using YOLOv5 NMS on CPU tensor
-        pred = non_max_suppression(torch.from_numpy(results), conf_thres=0.25, iou_thres=0.45, classes=None, agnostic_nms=False, max_det=1000)
+        version = registry.acquire()  # runs the whole request on one version, even if another is activated meanwhile
+        if version is None:
+            return jsonify({"error": "Model is warming up"}), 503, {"Retry-After": "1"}
+        try:  # released on every path, or unload() would wait for this request forever
+            try:
+                # Per-camera profile, then per-request fields, over the environment defaults
+                camera = request.values.get("camera")
+                params = inference_params([CAMERA_PARAMS.get(camera, {}), request.values], version.names)
+                if params["mode"] == "tiled":
+                    n = len(frame_regions(im0.shape[:2], params["tile"] or max(version.imgsz), params["overlap"]))
+                    if n > MAX_TILES:
+                        raise ValueError(f"{n} tiles for a {im0.shape[1]}x{im0.shape[0]} frame exceed MAX_TILES "
+                                         f"({MAX_TILES}), use a larger tile or a smaller overlap")
+                if params["mode"] == "cascade" and not check_cascade(version):  # not run on the full-size version
+                    return jsonify({"error": "Cascade coarse version is warming up"}), 503, {"Retry-After": "1"}
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            d = detect(version, im0, params)
+        finally:
+            version.release()
+        registry.shadow(im0, d, params)
+        names = version.names
 
         detections_list = []
+        riders_list = []
         riders_without_helmets = []
 
-        for i, det in enumerate(pred):
-            if det is not None and len(det):
-                det[:, :4] = scale_boxes(img_preprocessed.shape[2:], det[:, :4], im0.shape).round()
-
-                license_plates = []
-                riders = []
-                for *xyxy, conf, cls in reversed(det):
-                    c = int(cls)
-                    label = names[c]
-                    confidence = float(conf)
-                    bbox = [int(x) for x in xyxy]
-
-                    detections_list.append({
-                        "box": bbox,
-                        "label": label,
-                        "confidence": confidence
-                    })
-
-                    if label == "license-plate":
-                        license_plates.append({"box": bbox, "confidence": confidence})
-                    elif label == "rider":
-                        riders.append({"box": bbox, "confidence": confidence})
-
-                has_helmet_detection = any(d["label"] == "helmet" for d in detections_list)
-                if len(riders) > 0 and not has_helmet_detection:
-                    riders_without_helmets.append("A rider was detected without a helmet.")
+        if len(d):
+            for *xyxy, conf, cls in d[::-1]:
+                detections_list.append({
+                    "box": [int(x) for x in xyxy],
+                    "label": names[int(cls)],
+                    "confidence": float(conf)
+                })
+
+            # Per-rider helmet/plate association
+            riders, helmets, plates = associate_riders(d[:, :4], d[:, 5], names)
+            for rider, helmet, plate in zip(riders, helmets, plates):
+                riders_list.append({
+                    "box": [int(x) for x in d[rider, :4]],
+                    "confidence": float(d[rider, 4]),
+                    "helmet": bool(helmet >= 0),
+                    "license_plate": [int(x) for x in d[plate, :4]] if plate >= 0 else None,
+                })
+                if helmet < 0:
+                    riders_without_helmets.append(f"Rider {len(riders_list) - 1} was detected without a helmet.")
 
         return jsonify({
             "success": True,
+            "model_version": version.name,
+            "params": params,
             "detections": detections_list,
+            "riders": riders_list,
             "riders_without_helmets": riders_without_helmets,
             "processing_time": 0 
         })
 
     return jsonify({"error": "No image file provided"}), 400
 
-def letterbox(im, new_shape=(640, 640), color=(114, 114, 114), auto=True, scaleFill=False, scaleup=True, stride=32):
-    shape = im.shape[:2]
-    if isinstance(new_shape, int):
-        new_shape = (new_shape, new_shape)
-
-    r = min(new_shape[0] / shape[0], new_shape[1] / shape[1])
-    if not scaleup:
-        r = min(r, 1.0)
-
-    new_unpad = int(round(shape[1] * r)), int(round(shape[0] * r))
-    dw, dh = new_shape[1] - new_unpad[0], new_shape[0] - new_unpad[1]
-    if auto:
-        dw, dh = np.mod(dw, stride), np.mod(dh, stride)
-    elif scaleFill:
-        dw, dh = 0.0, 0.0
-        new_unpad = (new_shape[1], new_shape[0])
-        color = color
-
-    dw /= 2
-    dh /= 2
-
-    if shape[::-1] != new_unpad:
-        im = cv2.resize(im, new_unpad, interpolation=cv2.INTER_LINEAR)
-    top, bottom = int(round(dh - 0.1)), int(round(dh + 0.1))
-    left, right = int(round(dw - 0.1)), int(round(dw + 0.1))
-    im = cv2.copyMakeBorder(im, top, bottom, left, right, cv2.BORDER_CONSTANT, value=color)
-    return im, r, (dw, dh)
+
+def admin(f):
+    """Admin endpoints need `Authorization: Bearer <ADMIN_TOKEN>` and are disabled without ADMIN_TOKEN."""
+    @functools.wraps(f)
+    def wrapper(*args, **kwargs):
+        if not ADMIN_TOKEN:
+            return jsonify({"error": "Admin endpoints are disabled, set ADMIN_TOKEN to enable them"}), 403
+        if not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {ADMIN_TOKEN}"):
+            return jsonify({"error": "Unauthorized"}), 401
+        try:
+            return f(*args, **kwargs)
+        except KeyError as e:
+            return jsonify({"error": e.args[0]}), 404
+        except (ValueError, RuntimeError) as e:
+            return jsonify({"error": str(e)}), 409
+    return wrapper
+
+
+def load_in_background(name, spec, activate):
+    try:
+        registry.load(name, spec, activate=activate)
+    except Exception as e:  # listed as failed in /admin/models
+        print(f"Loading model version {name} failed: {e}", file=sys.stderr)
+
+
+@app.route("/admin/models", methods=["GET"])
+@admin
+def list_models():
+    return jsonify(registry.info())
+
+
+@app.route("/admin/models", methods=["POST"])
+@admin
+def add_model():
+    """Loads and warms a version in the background: {"name", "manifest", "imgsz", "batch", "precision", "backend",
+    "activate"}; poll GET /admin/models until it is ready."""
+    body = request.get_json(silent=True) or {}
+    name, activate = body.pop("name", None), bool(body.pop("activate", False))
+    unknown = set(body) - MODEL_SPEC_KEYS
+    if not name or unknown:
+        return jsonify({"error": f"'name' is required, allowed spec keys are {sorted(MODEL_SPEC_KEYS)}"}), 400
+    if name in registry.versions and registry.versions[name].state != "failed":
+        return jsonify({"error": f"Model version '{name}' already exists"}), 409
+    threading.Thread(target=load_in_background, args=(name, body, activate), daemon=True).start()
+    return jsonify({"name": name, "state": "loading", "activate": activate}), 202
+
+
+@app.route("/admin/models/<name>/activate", methods=["POST"])
+@admin
+def activate_model(name):
+    """Switches traffic to a ready version; {"unload_previous": true} unloads the old one after it drains."""
+    previous = registry.activate(name)
+    if previous is not None and previous.name != name and (request.get_json(silent=True) or {}).get("unload_previous"):
+        threading.Thread(target=registry.unload, args=(previous.name,), daemon=True).start()
+    return jsonify(registry.info())
+
+
+@app.route("/admin/models/<name>", methods=["DELETE"])
+@admin
+def unload_model(name):
+    """Unloads an inactive version once its in-flight requests have finished."""
+    return jsonify({"unloaded": name, "drained": registry.unload(name)})
+
+
+@app.route("/admin/shadow", methods=["PUT"])
+@admin
+def set_shadow():
+    """Mirrors a sample of traffic to a version: {"name", "rate"}; agreement stats are in GET /admin/models."""
+    body = request.get_json(silent=True) or {}
+    if not body.get("name"):
+        return jsonify({"error": "'name' is required"}), 400
+    registry.set_shadow(body["name"], float(body.get("rate", 1.0)))
+    return jsonify(registry.info())
+
+
+@app.route("/admin/shadow", methods=["DELETE"])
+@admin
+def stop_shadow():
+    registry.set_shadow(None)
+    return jsonify(registry.info())
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
@@ -0,0 +1,399 @@
+"""
+Inference backends for the ml_service model artifacts.
+
+Each backend loads one artifact from the model manifest and runs a preprocessed float32 NCHW batch through it,
+returning the raw YOLOv5 output (batch, anchors, 5 + classes), so NMS and post-processing stay backend-agnostic.
+app.py serves with the backend named by INFERENCE_BACKEND (openvino, onnxruntime or torchscript), so each node type
+can run the fastest runtime for its CPU without a code change. ONNX Runtime and TorchScript serve the fp32 artifacts.
+
+The OpenVINO backend keeps compiled models in a cache directory (OV_CACHE_DIR) with one subdirectory per IR content
+hash and compile config (threads, streams), since a blob compiled with one config is not reused for another. The image
+build pre-populates it with `warm-cache` for the configured INFERENCE_THREADS/INFERENCE_STREAMS (or tuning profile),
+so replicas started with the same settings import the compiled blob instead of compiling.
+
+Usage:
+    artifact = ModelManifest(path).select(416, batch=1, precision="fp32", fmt=BACKENDS["onnxruntime"].fmt)
+    backend = load_backend("onnxruntime", artifact)
+    out = backend.infer_batch(x)  # (1, 3, 416, 416) float32 -> (1, anchors, 5 + nc)
+
+    $ python backends.py compare --imgsz 416 --precision fp32 --images /app/data/images/test
+    $ python backends.py warm-cache --cache-dir /app/data/models/ov_cache  # compile every IR in the manifest
+    $ python backends.py warm-cache --threads 4 --streams 2  # for replicas serving with these settings
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sys
+import threading
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+YOLOV5_ROOT = Path("/app") / "yolov5"
+if str(YOLOV5_ROOT) not in sys.path:
+    sys.path.append(str(YOLOV5_ROOT))
+
+try:
+    from utils.general import LOGGER
+except ImportError:
+    LOGGER = logging.getLogger(__name__)  # backends themselves don't need YOLOv5, only load_inputs() does
+
+from build_cache import files_digest
+from model_manifest import PRECISIONS, ModelManifest
+
+DEFAULT_MANIFEST = Path("/app") / "data" / "models" / "matrix" / "manifest.json"
+DEFAULT_OV_CACHE_DIR = Path("/app") / "data" / "models" / "ov_cache"
+
+
+class Backend:
+    """Interface of an inference runtime; subclasses set `name` and `fmt` and implement load() and infer_batch()."""
+
+    name = None
+    fmt = None  # manifest file format the backend reads
+    precisions = ("fp32",)  # matrix precisions built in that format
+
+    def __init__(self, threads=None, cache_dir=None, streams=None):
+        self.threads = threads  # intra-op threads, None for the runtime default
+        self.cache_dir = cache_dir  # compiled-model cache, for backends that have one
+        self.streams = streams  # parallel inference streams, for backends that have them
+        self.artifact = None
+        self._local = threading.local()  # per-thread input buffers and runtime requests
+
+    def load(self, artifact):
+        """Loads the `fmt` file of a manifest entry returned by ModelManifest.select(); returns self."""
+        raise NotImplementedError
+
+    def infer_batch(self, x):
+        """Returns the raw model output for a float32 (batch, 3, h, w) array of the artifact's static shape."""
+        raise NotImplementedError
+
+    def input_buffer(self, shape):
+        """
+        Returns this thread's reusable float32 input array of `shape`, zeroed when first allocated. Preprocessing
+        writes into it and passes it to infer_batch(), so no per-request input array is allocated or copied.
+        """
+        buffers = self._local.__dict__.setdefault("buffers", {})
+        if shape not in buffers:
+            buffers[shape] = self._allocate(shape)
+        return buffers[shape]
+
+    def _allocate(self, shape):
+        return np.zeros(shape, dtype=np.float32)
+
+    def warmup(self, shapes, iterations=3):
+        """
+        Runs `iterations` zero-input inferences per (batch, 3, h, w) shape, so lazy allocations and kernel selection
+        happen before the first request; returns the elapsed milliseconds.
+        """
+        t = time.perf_counter()
+        for shape in shapes:
+            x = self.input_buffer(tuple(shape))  # zeros, through the same input path as requests
+            for _ in range(iterations):
+                self.infer_batch(x)
+        return (time.perf_counter() - t) * 1e3
+
+    def metadata(self):
+        """Returns what the service needs to pre- and post-process for this model, plus the runtime in use."""
+        a = self.artifact
+        return {
+            "backend": self.name,
+            "model": a["name"],
+            "file": str(a["files"][self.fmt]),
+            "imgsz": list(a["imgsz"]),
+            "batch": a["batch"],
+            "precision": a["precision"],
+            "stride": a["stride"],
+            "names": a["names"],
+            "threads": self.threads,
+            "streams": self.streams,
+        }
+
+
+class OpenVINOBackend(Backend):
+    name, fmt = "openvino", "openvino"
+    precisions = ("fp32", "fp16", "int8")
+
+    def load(self, artifact):
+        import openvino.runtime as ov
+
+        xml = Path(artifact["files"][self.fmt])
+        self.version = ov.get_version()
+        config = {"INFERENCE_NUM_THREADS": self.threads} if self.threads else {}
+        if self.streams:
+            config["NUM_STREAMS"] = str(self.streams)
+        stamp, stamp_path, blobs = {}, None, {}
+        if self.cache_dir:
+            # One cache subdirectory per IR content hash and compile config; blobs from another model, config or
+            # OpenVINO version are discarded
+            digest = files_digest([xml, xml.with_suffix(".bin")])
+            model_cache = Path(self.cache_dir) / cache_key(digest, config)
+            stamp_path = model_cache / "model.json"
+            stamp = json.loads(stamp_path.read_text()) if stamp_path.exists() else {}
+            valid = stamp.get("sha256") == digest and stamp.get("openvino") == self.version
+            if not valid or stamp.get("config") != config or not any(model_cache.glob("*.blob")):
+                shutil.rmtree(model_cache, ignore_errors=True)
+                stamp = {}
+            model_cache.mkdir(parents=True, exist_ok=True)
+            blobs = _blobs(model_cache)
+            config["CACHE_DIR"] = str(model_cache)
+
+        t = time.perf_counter()
+        self.compiled = ov.Core().compile_model(str(xml), "CPU", config)  # from the path, so a cached blob skips the IR
+        self.compile_ms = (time.perf_counter() - t) * 1e3
+        self.cache_hit = bool(stamp and blobs) and _blobs(model_cache) == blobs  # no blob was (re)written
+        if self.cache_hit:
+            LOGGER.info(
+                f"{xml.name}: loaded from compiled-model cache in {self.compile_ms:.0f}ms, "
+                f"{stamp['compile_ms'] - self.compile_ms:.0f}ms saved over a {stamp['compile_ms']:.0f}ms compile"
+            )
+        elif stamp_path is not None:
+            config.pop("CACHE_DIR")
+            stamp = {
+                "sha256": digest,
+                "openvino": self.version,
+                "config": config,
+                "model": str(xml),
+                "compile_ms": self.compile_ms,
+            }
+            tmp = stamp_path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(stamp, indent=2))
+            os.replace(tmp, stamp_path)  # written after the blob, so a valid stamp always has one next to it
+            LOGGER.info(f"{xml.name}: compiled in {self.compile_ms:.0f}ms, cached in {stamp_path.parent}")
+        self.output = self.compiled.output(0)
+        self.ov = ov
+        self.artifact = artifact
+        return self
+
+    def _request(self):
+        request = getattr(self._local, "request", None)
+        if request is None:  # one infer request per thread, so concurrent threads run on separate streams
+            request = self._local.request = self.compiled.create_infer_request()
+        return request
+
+    def _allocate(self, shape):
+        x = super()._allocate(shape)
+        self._local.__dict__.setdefault("tensors", {})[id(x)] = self.ov.Tensor(x, shared_memory=True)
+        return x
+
+    def infer_batch(self, x):
+        request = self._request()
+        tensor = getattr(self._local, "tensors", {}).get(id(x))
+        if tensor is not None:
+            request.set_input_tensor(tensor)  # input_buffer() array: OpenVINO reads it in place
+            return request.infer()[self.output]
+        return request.infer([x])[self.output]
+
+    def metadata(self):
+        return {
+            **super().metadata(),
+            "runtime": f"openvino {self.version}",
+            "compile_ms": round(self.compile_ms, 1),
+            "cache_hit": self.cache_hit,
+        }
+
+
+class ONNXRuntimeBackend(Backend):
+    name, fmt = "onnxruntime", "onnx"
+
+    def load(self, artifact):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if self.threads:
+            options.intra_op_num_threads = self.threads
+        self.session = ort.InferenceSession(
+            str(artifact["files"][self.fmt]), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_name = self.session.get_inputs()[0].name
+        self.version = ort.__version__
+        self.artifact = artifact
+        return self
+
+    def infer_batch(self, x):
+        return self.session.run(None, {self.input_name: x})[0]
+
+    def metadata(self):
+        return {**super().metadata(), "runtime": f"onnxruntime {self.version}"}
+
+
+class TorchScriptBackend(Backend):
+    name, fmt = "torchscript", "torchscript"
+
+    def load(self, artifact):
+        import torch
+
+        if self.threads:
+            torch.set_num_threads(self.threads)
+        self.torch = torch
+        self.model = torch.jit.load(str(artifact["files"][self.fmt]), map_location="cpu").eval()
+        self.artifact = artifact
+        return self
+
+    def infer_batch(self, x):
+        with self.torch.inference_mode():
+            y = self.model(self.torch.from_numpy(x))
+        return (y[0] if isinstance(y, (list, tuple)) else y).numpy()  # traced YOLOv5 returns (pred, features)
+
+    def metadata(self):
+        return {**super().metadata(), "runtime": f"torch {self.torch.__version__}"}
+
+
+BACKENDS = {b.name: b for b in (OpenVINOBackend, ONNXRuntimeBackend, TorchScriptBackend)}
+
+
+def cache_key(digest, config):
+    """Returns the compiled-model cache subdirectory name for an IR content `digest` and OpenVINO compile `config`."""
+    return hashlib.sha256(json.dumps([digest, config], sort_keys=True).encode()).hexdigest()[:16]
+
+
+def _blobs(path):
+    """Returns {name: (size, mtime_ns)} of the compiled blobs in a cache directory."""
+    return {p.name: (p.stat().st_size, p.stat().st_mtime_ns) for p in Path(path).glob("*.blob")}
+
+
+def default_precision(name):
+    """Returns the precision a backend serves when MODEL_PRECISION is unset: int8 on OpenVINO, else its first one."""
+    return "int8" if name == "openvino" else BACKENDS[name].precisions[0] if name in BACKENDS else "fp32"
+
+
+def load_backend(name, artifact, threads=None, cache_dir=None, streams=None):
+    """Returns backend `name` with `artifact` loaded."""
+    if name not in BACKENDS:
+        raise ValueError(f"INFERENCE_BACKEND must be one of {list(BACKENDS)}, got '{name}'")
+    return BACKENDS[name](threads, cache_dir, streams).load(artifact)
+
+
+def warm_cache(manifest, cache_dir=DEFAULT_OV_CACHE_DIR, threads=None, streams=None):
+    """
+    Compiles every OpenVINO IR in the manifest into `cache_dir` with the `threads` and `streams` replicas will serve
+    with; returns the number compiled (IRs already cached for that config are skipped).
+    """
+    n = 0
+    for e in manifest.entries:
+        if e.get("deployed", e["precision"]) != e["precision"]:  # failed the accuracy gate, no IR of its own
+            continue
+        artifact = manifest.select(e["imgsz"][0], e["batch"], e["precision"], fmt="openvino")
+        n += not load_backend("openvino", artifact, threads, cache_dir, streams).cache_hit
+    LOGGER.info(f"{n} OpenVINO models compiled into {cache_dir} (threads={threads}, streams={streams})")
+    return n
+
+
+def load_inputs(images, imgsz, stride, n):
+    """Returns up to `n` letterboxed float32 CHW images from directory `images`, or random images without one."""
+    from utils.augmentations import letterbox
+    from utils.dataloaders import IMG_FORMATS
+
+    files = sorted(p for p in Path(images).rglob("*") if p.suffix[1:].lower() in IMG_FORMATS)[:n] if images else []
+    ims = []
+    for f in files:
+        im0 = cv2.imread(str(f))  # BGR
+        if im0 is not None:
+            im = letterbox(im0, imgsz, stride=stride, auto=False)[0]
+            im = im.transpose((2, 0, 1))[::-1]  # HWC to CHW, BGR to RGB
+            ims.append(im.astype(np.float32) / 255.0)
+    if not ims:
+        ims = list(np.random.default_rng(0).random((n, 3, *imgsz), dtype=np.float32))
+    return ims
+
+
+def compare(manifest, backends, imgsz=416, batch=1, precision="fp32", images=None, n=50, warmup=5, threads=None):
+    """
+    Runs every backend on the same inputs and returns one row per backend: load time, latency percentiles,
+    throughput and the largest absolute output difference from the first backend.
+    """
+    rows, reference, inputs = [], None, None
+    for name in backends:
+        artifact = manifest.select(imgsz, batch, precision, fmt=BACKENDS[name].fmt)
+        if inputs is None:
+            ims = load_inputs(images, tuple(artifact["imgsz"]), artifact["stride"], n)
+            ims += ims[: (-len(ims)) % batch]  # fill the last static batch
+            inputs = [np.ascontiguousarray(np.stack(ims[k : k + batch])) for k in range(0, len(ims), batch)]
+        t = time.perf_counter()
+        backend = load_backend(name, artifact, threads)
+        load_s = time.perf_counter() - t
+        for x in inputs[:warmup]:
+            backend.infer_batch(x)
+        times, outputs = [], []
+        for x in inputs:
+            t = time.perf_counter()
+            outputs.append(backend.infer_batch(x))
+            times.append((time.perf_counter() - t) * 1e3)
+        outputs = np.concatenate(outputs)
+        if reference is None:
+            reference = outputs
+        times = np.array(times)
+        rows.append(
+            {
+                "backend": name,
+                "runtime": backend.metadata()["runtime"],
+                "load_s": round(load_s, 3),
+                "mean_ms": round(float(times.mean()), 2),
+                "p50_ms": round(float(np.percentile(times, 50)), 2),
+                "p99_ms": round(float(np.percentile(times, 99)), 2),
+                "images_per_s": round(len(inputs) * batch / (times.sum() / 1e3), 1),
+                "max_abs_diff": float(np.abs(outputs - reference).max()),
+            }
+        )
+    return rows
+
+
+def parse_opt():
+    parser = argparse.ArgumentParser()
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("compare", help="run each backend on the same inputs and report latency and agreement")
+    p.add_argument("--manifest", type=str, default=os.environ.get("MODEL_MANIFEST", DEFAULT_MANIFEST))
+    p.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS), help="first is reference")
+    p.add_argument("--imgsz", type=int, default=int(os.environ.get("MODEL_IMGSZ", "416")), help="artifact input size")
+    p.add_argument("--batch", type=int, default=int(os.environ.get("MODEL_BATCH", "1")), help="artifact batch size")
+    p.add_argument("--precision", default="fp32", choices=PRECISIONS, help="artifact precision")
+    p.add_argument("--images", type=str, default=None, help="image directory, random inputs if omitted")
+    p.add_argument("-n", type=int, default=50, help="number of images")
+    p.add_argument("--threads", type=int, default=None, help="intra-op threads per backend")
+    p.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    p = sub.add_parser("warm-cache", help="compile every OpenVINO IR in the manifest into the compiled-model cache")
+    p.add_argument("--manifest", type=str, default=os.environ.get("MODEL_MANIFEST", DEFAULT_MANIFEST))
+    p.add_argument("--cache-dir", type=str, default=os.environ.get("OV_CACHE_DIR") or DEFAULT_OV_CACHE_DIR)
+    p.add_argument("--threads", type=int, default=None, help="INFERENCE_THREADS at serving time, default as app.py")
+    p.add_argument("--streams", type=int, default=None, help="INFERENCE_STREAMS at serving time, default as app.py")
+    return parser.parse_args()
+
+
+def main(opt):
+    if opt.command == "warm-cache":
+        from tune import TUNING_PROFILE, load_profile  # tune imports this module
+
+        # Same resolution as app.py: flag, then environment, then tuning profile; the cache key depends on them
+        profile = load_profile(os.environ.get("TUNING_PROFILE", TUNING_PROFILE))
+        threads = opt.threads or int(os.environ.get("INFERENCE_THREADS", profile.get("INFERENCE_THREADS", 0))) or None
+        streams = opt.streams or int(os.environ.get("INFERENCE_STREAMS", profile.get("INFERENCE_STREAMS", 0))) or None
+        warm_cache(ModelManifest(opt.manifest), opt.cache_dir, threads, streams)
+        return
+    rows = compare(
+        ModelManifest(opt.manifest),
+        opt.backends,
+        imgsz=opt.imgsz,
+        batch=opt.batch,
+        precision=opt.precision,
+        images=opt.images,
+        n=opt.n,
+        threads=opt.threads,
+    )
+    if opt.json:
+        print(json.dumps(rows, indent=2))
+        return
+    keys = list(rows[0])
+    widths = [max(len(k), *(len(str(r[k])) for r in rows)) for k in keys]
+    print("  ".join(k.ljust(w) for k, w in zip(keys, widths)))
+    for r in rows:
+        print("  ".join(str(r[k]).ljust(w) for k, w in zip(keys, widths)))
+
+
+if __name__ == "__main__":
+    main(parse_opt())
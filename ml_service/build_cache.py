@@ -0,0 +1,112 @@
+"""
+Content-addressed cache for model build artifacts.
+
+A build step is keyed by a SHA-256 over everything that determines its output: the contents of its input files
+(weights, calibration and validation images), its parameters, the versions of the export/conversion/quantization
+tools and the build scripts themselves. On a hit the stored artifacts are copied into place instead of re-running
+ONNX export, OpenVINO conversion and NNCF quantization; on a miss the step runs and its artifacts are stored.
+
+Usage:
+    cache = BuildCache("/app/.cache/build")
+    key = cache.key(weights=file_digest(w), imgsz=416, tools=tool_versions())
+    if not cache.restore(key, output_dir):
+        ...  # build output_dir / "model_dir"
+        cache.store(key, output_dir / "model_dir")
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from importlib import metadata
+from pathlib import Path
+
+TOOLS = ("torch", "onnx", "openvino", "openvino-dev", "nncf", "numpy", "opencv-python")
+_COMPLETE = ".complete"  # written last, marks a finished cache entry
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """Returns the SHA-256 hex digest of a file's contents."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def files_digest(paths):
+    """Returns one digest over the names and contents of `paths`, independent of their order."""
+    h = hashlib.sha256()
+    for name, digest in sorted((Path(p).name, file_digest(p)) for p in paths):
+        h.update(f"{name}:{digest}\n".encode())
+    return h.hexdigest()
+
+
+def tool_versions(tools=TOOLS):
+    """Returns {package: installed version or None} for the packages that affect build outputs."""
+    versions = {}
+    for name in tools:
+        try:
+            versions[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            versions[name] = None
+    return versions
+
+
+class BuildCache:
+    """
+    Directory of build outputs keyed by content hash.
+
+    Args:
+        root: cache directory, e.g. a Docker BuildKit cache mount so entries survive image rebuilds.
+        enabled: when False every lookup misses and nothing is stored.
+    """
+
+    def __init__(self, root, enabled=True):
+        self.root = Path(root)
+        self.enabled = enabled
+        self.hits, self.misses = 0, 0
+
+    def key(self, **inputs):
+        """Returns the cache key for a build step with the given inputs (any JSON-serializable values)."""
+        return hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode()).hexdigest()
+
+    def restore(self, key, dest):
+        """Copies the artifacts stored under `key` into directory `dest`; returns False on a miss."""
+        entry = self.root / key
+        if not self.enabled or not (entry / _COMPLETE).exists():
+            self.misses += 1
+            return False
+        dest = Path(dest)
+        dest.mkdir(parents=True, exist_ok=True)
+        for item in entry.iterdir():
+            if item.name == _COMPLETE:
+                continue
+            if item.is_dir():
+                shutil.copytree(item, dest / item.name, dirs_exist_ok=True)
+            else:
+                shutil.copy2(item, dest / item.name)
+        self.hits += 1
+        return True
+
+    def store(self, key, *paths):
+        """Stores files or directories `paths` under `key`; they are restored by name into the restore directory."""
+        if not self.enabled:
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(prefix=".tmp-", dir=self.root))
+        for p in map(Path, paths):
+            if p.is_dir():
+                shutil.copytree(p, tmp / p.name)
+            else:
+                shutil.copy2(p, tmp / p.name)
+        (tmp / _COMPLETE).write_text(json.dumps({"created": time.time(), "items": [Path(p).name for p in paths]}))
+        try:
+            os.replace(tmp, self.root / key)  # atomic, concurrent builds never see a partial entry
+        except OSError:  # another build stored the same key first
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def summary(self):
+        return f"Build cache: {self.hits} hits, {self.misses} misses ({self.root})"
@@ -0,0 +1,85 @@
+"""
+Two-stage cascade inference for ml_service: coarse rider pass, then high-resolution ROI pass for helmets and plates.
+
+Riders usually cover a small part of a frame, so running all of it at high resolution mostly spends compute on road.
+A cheap pass over the downscaled frame finds riders and vehicles, optionally with a smaller model version (e.g. the
+320 px build of the matrix). Each rider or vehicle box, padded for context, is then cropped from the original frame
+and upscaled to the model input, and the ROIs run as one batch looking only for helmets and plates. Compute grows
+with the number of riders instead of the frame area. Both stages are returned as one result in frame coordinates.
+
+Usage:
+    det = detect_cascade(coarse_version, version, im0, params, pad=0.15, max_rois=16)
+"""
+
+import numpy as np
+
+from association import HELMET_NAMES, PLATE_NAMES, RIDER_NAMES, class_ids
+from tiling import infer_regions, merge
+
+VEHICLE_NAMES = ("motorcycle", "motorbike", "scooter", "vehicle")
+
+
+def cascade_classes(names):
+    """Returns the (coarse, fine) class indices of a model: riders and vehicles, then helmets and plates."""
+    return class_ids(names, RIDER_NAMES + VEHICLE_NAMES), class_ids(names, HELMET_NAMES + PLATE_NAMES)
+
+
+def roi_regions(boxes, shape, pad=0.15, min_side=0):
+    """
+    Returns (x0, y0, x1, y1) crops of an (h, w) frame around xyxy `boxes`, grown by `pad` of their size on each side
+    and to at least `min_side` pixels, so a helmet above or a plate below the rider box stays inside.
+    """
+    h, w = shape
+    wh = boxes[:, 2:4] - boxes[:, :2]
+    c = (boxes[:, :2] + boxes[:, 2:4]) / 2
+    half = np.maximum(wh * (0.5 + pad), min_side / 2)
+    x0y0 = np.clip(np.floor(c - half), 0, None).astype(int)
+    x1y1 = np.minimum(np.ceil(c + half), [w, h]).astype(int)
+    return [tuple(r) for r in np.concatenate([x0y0, x1y1], axis=1).tolist()]
+
+
+def _to_classes(det, names, target):
+    """Maps the class indices of `det` from model `names` to model `target` by name, dropping unknown classes."""
+    index = {n: i for i, n in (target.items() if isinstance(target, dict) else enumerate(target))}
+    items = list(names.items() if isinstance(names, dict) else enumerate(names))
+    lut = np.full(max(k for k, _ in items) + 1, -1)
+    for k, n in items:
+        lut[k] = index.get(n, -1)
+    cls = lut[det[:, 5].astype(int)]
+    det = det[cls >= 0]
+    det[:, 5] = cls[cls >= 0]
+    return det
+
+
+def detect_cascade(coarse, fine, im0, params, pad=0.15, max_rois=16):
+    """
+    Returns the (n, 6) xyxy, conf, cls detections of a cascade on BGR image `im0`, in frame coordinates and the class
+    indices of `fine`: riders and vehicles from model version `coarse` on the whole frame, helmets and plates from
+    `fine` on up to `max_rois` of their ROIs. `coarse` may be `fine` itself. params come from params.inference_params(),
+    its classes (of `fine`) filter the result; a request for riders only skips the second stage.
+    """
+    h, w = im0.shape[:2]
+    coarse_ids = cascade_classes(coarse.names)[0]
+    fine_ids = cascade_classes(fine.names)[1]
+    if not len(coarse_ids) or not len(fine_ids):
+        raise ValueError("Cascade mode needs rider or vehicle and helmet or plate classes in the models")
+    if params["classes"] is not None:
+        fine_ids = np.intersect1d(fine_ids, params["classes"])
+
+    # Stage 1: riders and vehicles on the downscaled frame, best first
+    det = infer_regions(coarse, im0, [(0, 0, w, h)], dict(params, classes=coarse_ids.tolist()))
+    if coarse is not fine:
+        det = _to_classes(det, coarse.names, fine.names)
+    out = [det]
+
+    # Stage 2: helmets and plates on the ROIs of the most confident riders and vehicles, cropped from the
+    # full-resolution frame; overlapping ROIs of neighbours can find the same object twice, NMS keeps one
+    if len(det) and len(fine_ids):
+        rois = roi_regions(det[:max_rois, :4], (h, w), pad, min_side=max(fine.imgsz) // 4)
+        parts = infer_regions(fine, im0, rois, dict(params, classes=fine_ids.tolist()))
+        out.append(merge(parts, params["iou"], params["max_det"]))
+
+    det = np.concatenate(out)
+    if params["classes"] is not None:
+        det = det[np.isin(det[:, 5], params["classes"])]
+    return det[np.argsort(-det[:, 4], kind="stable")][: params["max_det"]]
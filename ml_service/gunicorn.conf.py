@@ -0,0 +1,23 @@
+"""
+Gunicorn settings for ml_service.
+
+Worker processes and threads per worker come from the tuning profile written by tune.py (TUNING_PROFILE), so each node
+type runs the concurrency measured on it; WEB_CONCURRENCY and GUNICORN_THREADS override the profile.
+
+With ADMIN_TOKEN set the service runs a single worker process: the model registry lives in process memory, so with
+more workers an admin call would only reach whichever worker accepted it. Use GUNICORN_THREADS for concurrency there.
+"""
+
+import json
+import os
+
+profile_path = os.environ.get("TUNING_PROFILE", "/app/data/models/tuning_profile.json")
+profile = json.load(open(profile_path))["settings"] if os.path.isfile(profile_path) else {}
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", profile.get("WORKERS", 1)))
+if os.environ.get("ADMIN_TOKEN") and workers > 1:
+    print(f"ADMIN_TOKEN is set, running 1 worker instead of {workers} so admin calls reach the only model registry")
+    workers = 1
+threads = int(os.environ.get("GUNICORN_THREADS", profile.get("GUNICORN_THREADS", 1)))  # >1 selects gthread workers
+timeout = 120  # each worker loads and warms its own model before it answers
@@ -0,0 +1,75 @@
+"""
+Manifest of the static-shape model artifacts built by `quantize_model.py --matrix`.
+
+Each entry describes one model: input size, batch size, precision, class names and its files relative to the
+manifest, one per format (OpenVINO IR for every precision, plus ONNX and TorchScript for fp32). At load the service
+picks the entry matching its configured size, batch, precision and the format its inference backend reads. An int8
+entry that failed the accuracy gate has no files and names the precision served in its place as `deployed`.
+
+Usage:
+    manifest = ModelManifest("/app/data/models/matrix/manifest.json")
+    artifact = manifest.select(imgsz=416, batch=1, precision="int8")
+    model = core.read_model(artifact["xml"])
+"""
+
+import json
+import os
+from pathlib import Path
+
+MANIFEST_NAME = "manifest.json"
+PRECISIONS = ("fp32", "fp16", "int8")
+FORMATS = ("openvino", "onnx", "torchscript")
+
+
+def artifact_name(stem, size, batch, precision):
+    """Returns the directory name of one matrix artifact, e.g. yolov5s_416_b1_int8."""
+    return f"{stem}_{size}_b{batch}_{precision}"
+
+
+class ModelManifest:
+    """JSON list of built artifacts, keyed by name."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.entries = json.loads(self.path.read_text())["artifacts"] if self.path.exists() else []
+
+    def add(self, **entry):
+        """Adds or replaces the entry with the same name."""
+        self.entries = [e for e in self.entries if e["name"] != entry["name"]] + [entry]
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"artifacts": self.entries}, indent=2))
+        os.replace(tmp, self.path)
+
+    def select(self, imgsz, batch=1, precision="int8", fmt="openvino"):
+        """
+        Returns the entry for a square `imgsz` input, `batch` and `precision` that has a `fmt` file, with absolute
+        paths per format in "files" and the IR path in "xml". For a precision that failed the accuracy gate, returns
+        the entry of the precision deployed in its place.
+        """
+        if precision not in PRECISIONS:
+            raise ValueError(f"precision must be one of {PRECISIONS}, got '{precision}'")
+        if fmt not in FORMATS:
+            raise ValueError(f"format must be one of {FORMATS}, got '{fmt}'")
+        for e in self.entries:
+            if e["imgsz"] != [imgsz, imgsz] or e["batch"] != batch or e["precision"] != precision:
+                continue
+            if e.get("deployed", precision) != precision:
+                try:
+                    return self.select(imgsz, batch, e["deployed"], fmt)
+                except LookupError as err:
+                    msg = f"{e['name']} failed the accuracy gate, {e['deployed']} is served instead: {err}"
+                    raise LookupError(msg) from None
+            files = e.get("files", {"openvino": e.get("path")})  # manifests from before multi-format builds
+            if fmt in files:
+                files = {k: self.path.parent / v for k, v in files.items()}
+                return {**e, "files": files, "xml": files.get("openvino")}
+        available = ", ".join(
+            f"{e['imgsz'][0]}/b{e['batch']}/{e['precision']}/{'+'.join(e.get('files', {'openvino': 0}))}"
+            for e in self.entries
+        )
+        raise LookupError(
+            f"No {imgsz}/b{batch}/{precision} {fmt} model in {self.path}, available: {available or 'none'}"
+        )
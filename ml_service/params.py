@@ -0,0 +1,85 @@
+"""
+Detection parameters for ml_service requests.
+
+The service defaults come from the environment (or the project config), each camera can override them through the
+CAMERA_PARAMS JSON file, and each request through its form or query fields. inference_params() merges the layers and
+validates the result, so a bad value is reported to the client as a 400 instead of failing inside the model.
+
+Usage:
+    params = inference_params([CAMERA_PARAMS.get(camera, {}), request.values], version.names)
+    # {"conf": 0.5, "iou": 0.45, "classes": [2], "max_det": 1000, "mode": "full", "tile": 0, "overlap": 0.2}
+"""
+
+import json
+import os
+from pathlib import Path
+
+from cascade import cascade_classes
+
+
+def config_default(name, default):
+    """Returns setting `name` of the project config (config/, LP_ENVIRONMENT) if it is importable, else `default`."""
+    try:
+        from config.utils import get_config
+
+        return getattr(get_config(), name, default)
+    except (ImportError, ValueError):  # not in the image, or production config without its required env vars
+        return default
+
+
+# Detection defaults, overridden per camera by CAMERA_PARAMS ({"<camera id>": {"conf": 0.5, ...}, ...} JSON file)
+# and per request by the conf, iou, classes, max_det, mode, tile and overlap form or query fields. Without the
+# environment variables they come from the project config, or the config/production.py values outside the repo
+CONFIDENCE_THRESHOLD = float(os.environ.get("CONFIDENCE_THRESHOLD", config_default("CONFIDENCE_THRESHOLD", 0.5)))
+IOU_THRESHOLD = float(os.environ.get("IOU_THRESHOLD", config_default("IOU_THRESHOLD", 0.45)))
+MAX_DET = int(os.environ.get("MAX_DET", "1000"))
+MAX_DET_LIMIT = 1000
+CAMERA_PARAMS_FILE = os.environ.get("CAMERA_PARAMS")
+CAMERA_PARAMS = json.loads(Path(CAMERA_PARAMS_FILE).read_text()) if CAMERA_PARAMS_FILE else {}
+
+# Inference mode: full (one downscaled view of the frame), tiled (tiling.py: overlapping TILE_SIZE tiles at native
+# resolution plus the downscaled view, for small objects in high-resolution frames; TILE_SIZE 0 is the model input size)
+# or cascade (cascade.py: riders and vehicles first, then helmets and plates in their boxes); see app.py for both
+INFERENCE_MODES = ("full", "tiled", "cascade")
+INFERENCE_MODE = os.environ.get("INFERENCE_MODE", "full")
+TILE_SIZE = int(os.environ.get("TILE_SIZE", "0"))
+TILE_OVERLAP = float(os.environ.get("TILE_OVERLAP", "0.2"))
+
+
+def inference_params(overrides, names):
+    """
+    Returns validated detection parameters {conf, iou, classes, max_det, mode, tile, overlap}: the defaults updated
+    with each mapping in `overrides` in turn. classes is a list or comma-separated string of class indices or names of
+    the model, and None keeps every class. Raises ValueError for out-of-range values and unknown classes.
+    """
+    p = {"conf": CONFIDENCE_THRESHOLD, "iou": IOU_THRESHOLD, "classes": None, "max_det": MAX_DET,
+         "mode": INFERENCE_MODE, "tile": TILE_SIZE, "overlap": TILE_OVERLAP}
+    for o in overrides:
+        p.update({k: v for k, v in o.items() if k in p and v not in (None, "")})
+    try:
+        conf, iou, max_det = float(p["conf"]), float(p["iou"]), int(p["max_det"])
+        tile, overlap = int(p["tile"]), float(p["overlap"])
+    except (TypeError, ValueError):
+        raise ValueError("conf, iou and overlap must be numbers and max_det and tile integers")
+    if not 0 <= conf <= 1 or not 0 <= iou <= 1:
+        raise ValueError("conf and iou must be between 0 and 1")
+    if not 1 <= max_det <= MAX_DET_LIMIT:
+        raise ValueError(f"max_det must be between 1 and {MAX_DET_LIMIT}")
+    if p["mode"] not in INFERENCE_MODES:
+        raise ValueError(f"mode must be one of {list(INFERENCE_MODES)}")
+    if tile and not 64 <= tile <= 4096 or not 0 <= overlap <= 0.5:
+        raise ValueError("tile must be 0 (model input size) or 64-4096 pixels and overlap between 0 and 0.5")
+    if p["mode"] == "cascade" and not all(len(ids) for ids in cascade_classes(names)):
+        raise ValueError("mode cascade needs a model with rider or vehicle and helmet or plate classes")
+    classes = p["classes"]
+    if classes is not None:
+        ids = {str(n): i for i, n in (names.items() if isinstance(names, dict) else enumerate(names))}
+        items = classes.split(",") if isinstance(classes, str) else classes
+        try:
+            classes = sorted({int(c) if str(c).strip().isdigit() else ids[str(c).strip()] for c in items})
+        except KeyError as e:
+            raise ValueError(f"Unknown class {e.args[0]!r}, the model has {list(ids)}")
+        if not classes or not all(0 <= c < len(ids) for c in classes):
+            raise ValueError(f"classes must be non-empty indices below {len(ids)} or names in {list(ids)}")
+    return {"conf": conf, "iou": iou, "classes": classes, "max_det": max_det, "mode": p["mode"], "tile": tile,
+            "overlap": overlap}
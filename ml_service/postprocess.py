@@ -0,0 +1,45 @@
+"""
+Detection post-processing for ml_service.
+
+The raw YOLOv5 output has one row per anchor (tens of thousands at 416-640 px), almost all of them background. The
+confidence threshold and the requested classes are applied to it with vectorized NumPy masks first, so only the few
+candidate rows reach torch and the sort inside NMS. A client that asks only for plates pays only for plates.
+
+Usage:
+    det = detections(raw[0], conf_thres=0.5, iou_thres=0.45, classes=[2], max_det=100)  # (n, 6) xyxy, conf, cls
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import torch
+
+YOLOV5_ROOT = Path("/app") / "yolov5"
+if str(YOLOV5_ROOT) not in sys.path:
+    sys.path.append(str(YOLOV5_ROOT))
+
+from utils.general import non_max_suppression
+
+
+def prefilter(out, conf_thres=0.25, classes=None):
+    """
+    Returns the rows of one image's raw output (anchors, 5 + nc) that can survive NMS: objectness and best-class
+    confidence above `conf_thres`, and best class in `classes` (the same rule non_max_suppression applies).
+    """
+    x = out[out[:, 4] > conf_thres]  # objectness first, it discards most anchors
+    cls = x[:, 5:].argmax(1)
+    keep = x[:, 4] * x[np.arange(len(x)), 5 + cls] > conf_thres  # conf = obj_conf * cls_conf
+    if classes is not None:
+        keep &= np.isin(cls, classes)
+    return x[keep]
+
+
+def detections(out, conf_thres=0.25, iou_thres=0.45, classes=None, max_det=1000):
+    """Returns the (n, 6) xyxy, conf, cls detections of one image's raw output, in model input coordinates."""
+    x = prefilter(out, conf_thres, classes)
+    if not len(x):
+        return np.zeros((0, 6), dtype=np.float32)
+    pred = non_max_suppression(torch.from_numpy(np.ascontiguousarray(x[None])), conf_thres, iou_thres, classes,
+                               max_det=max_det)
+    return pred[0].numpy()
@@ -0,0 +1,71 @@
+"""
+Copy-minimal image preprocessing for ml_service.
+
+Uploaded bytes are decoded straight to a BGR array with OpenCV, and the letterbox is fused with the BGR-to-RGB swap,
+HWC-to-CHW transpose and 0-1 normalization into a single pass that writes into the backend's reused input buffer.
+Per frame that leaves one resize copy plus the write into the model input, instead of the former
+PIL -> numpy -> cvtColor -> letterbox -> transpose -> contiguous -> float -> batch chain.
+
+Usage:
+    im0 = decode_image(request_bytes)
+    geometry = letterbox_geometry(im0.shape[:2], (416, 416), stride=32, auto=False)
+    x = backend.input_buffer((1, 3, *geometry.shape))
+    letterbox_into(im0, x[0], geometry)
+    out = backend.infer_batch(x)
+"""
+
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+PAD_VALUE = 114 / 255  # YOLOv5 letterbox gray, normalized
+
+Geometry = namedtuple("Geometry", "shape, unpad, top, left, ratio")  # padded (h, w), resized (h, w), offsets, gain
+
+
+def decode_image(data):
+    """Decodes encoded image bytes to a BGR uint8 array, or returns None if they are not an image."""
+    buf = np.frombuffer(data, dtype=np.uint8)
+    # EXIF orientation is ignored, as it was when images went through PIL
+    return cv2.imdecode(buf, cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION) if buf.size else None
+
+
+def letterbox_geometry(shape, new_shape=(640, 640), stride=32, auto=True, scaleup=True):
+    """
+    Returns where an image of (h, w) `shape` lands in a YOLOv5 letterbox of `new_shape`: the padded input shape, the
+    resized size, the top/left padding and the resize gain. auto pads only up to a multiple of `stride`.
+    """
+    r = min(new_shape[0] / shape[0], new_shape[1] / shape[1])
+    if not scaleup:
+        r = min(r, 1.0)
+    unpad = int(round(shape[0] * r)), int(round(shape[1] * r))
+    dh, dw = new_shape[0] - unpad[0], new_shape[1] - unpad[1]
+    if auto:
+        dh, dw = dh % stride, dw % stride
+    top, left = int(round(dh / 2 - 0.1)), int(round(dw / 2 - 0.1))
+    return Geometry((unpad[0] + dh, unpad[1] + dw), unpad, top, left, r)
+
+
+def letterbox_into(im0, dst, geometry):
+    """
+    Letterboxes BGR image `im0` into `dst`, a float32 (3, h, w) RGB view of the model input, normalized to 0-1.
+
+    The resize is the only intermediate copy; channel swap, transpose and normalization happen in the one ufunc
+    that writes into `dst`, and only the padding borders are filled.
+    """
+    h, w = geometry.unpad
+    top, left = geometry.top, geometry.left
+    im = im0 if im0.shape[:2] == (h, w) else cv2.resize(im0, (w, h), interpolation=cv2.INTER_LINEAR)
+    dst[:, :top] = PAD_VALUE
+    dst[:, top + h :] = PAD_VALUE
+    dst[:, top : top + h, :left] = PAD_VALUE
+    dst[:, top : top + h, left + w :] = PAD_VALUE
+    np.multiply(
+        im.transpose(2, 0, 1)[::-1],  # HWC BGR view as CHW RGB, no copy
+        np.float32(1 / 255),
+        out=dst[:, top : top + h, left : left + w],
+        dtype=np.float32,
+        casting="unsafe",
+    )
+    return dst
@@ -1,4 +1,11 @@
+import argparse
+import hashlib
+import json
 import os
+import random
+import shutil
+import time
+import cv2
 import torch
 import numpy as np
 import openvino.runtime as ov
@@ -11,8 +18,13 @@ if str(YOLOV5_ROOT) not in os.sys.path:
     os.sys.path.append(str(YOLOV5_ROOT))
 
 from models.common import DetectMultiBackend
-from utils.general import check_yaml, check_dataset, LOGGER
-from utils.dataloaders import create_dataloader
+from utils.augmentations import letterbox
+from utils.general import check_yaml, check_dataset, LOGGER, non_max_suppression, xywh2xyxy
+from utils.dataloaders import IMG_FORMATS, create_dataloader, img2label_paths
+from utils.metrics import ap_per_class, box_iou
+
+from build_cache import BuildCache, file_digest, files_digest, tool_versions
+from model_manifest import MANIFEST_NAME, PRECISIONS, ModelManifest, artifact_name
 
 try:
     import nncf
@@ -20,23 +32,109 @@ except ImportError:
     LOGGER.warning("NNCF not installed, INT8 quantization will not be available.")
     nncf = None
 
-def quantize_yolov5_model(weights_path, data_yaml_path, imgsz=(640, 640), output_dir="/app/data/models"):
-    weights_path = Path(weights_path)
-    output_dir = Path(output_dir)
-    output_dir.mkdir(parents=True, exist_ok=True)
+CALIB_DIR = Path("/app") / "data" / "images" / "training"  # representative real images for INT8 calibration
+CALIB_CACHE_DIR = Path("/app") / ".cache" / "calibration"
+BUILD_CACHE_DIR = Path("/app") / ".cache" / "build"  # built IR artifacts keyed by content hash
+VAL_DIR = Path("/app") / "data" / "images" / "test"  # held-out images for accuracy checks
+IOUV = np.linspace(0.5, 0.95, 10)  # IoU thresholds for mAP@0.5:0.95
 
-    LOGGER.info(f"Starting quantization of {weights_path.name}...")
 
-    # Load PyTorch model
-    device = torch.device("cpu") # Quantization should typically be done on CPU
-    model = DetectMultiBackend(weights_path, device=device, dnn=False, data=data_yaml_path, fp16=False)
-    model.eval()
+def calibration_files(calib_dir=CALIB_DIR, subset_size=300, seed=0, exclude_dir=None):
+    """
+    Returns a reproducible random subset of at most `subset_size` images under `calib_dir`, leaving out images with
+    the same content as one under `exclude_dir` so the validation set stays held out.
+    """
+    files = sorted(p for p in Path(calib_dir).rglob("*") if p.suffix[1:].lower() in IMG_FORMATS)
+    if exclude_dir:
+        held_out = {file_digest(p) for p in calibration_files(exclude_dir, subset_size=0)}
+        kept = [p for p in files if file_digest(p) not in held_out]
+        if len(kept) < len(files):
+            LOGGER.info(f"Left {len(files) - len(kept)} validation images in {exclude_dir} out of calibration")
+        files = kept
+    if subset_size and len(files) > subset_size:
+        files = sorted(random.Random(seed).sample(files, subset_size))
+    return files
 
-    # Create dummy input for tracing
-    im = torch.zeros(1, 3, *imgsz).to(device)
 
-    # Export to ONNX (prerequisite for OpenVINO)
-    onnx_path = output_dir / weights_path.with_suffix(".onnx").name
+def build_inputs(weights_path, data_yaml_path, calib_dir=CALIB_DIR, subset_size=300, val_dir=None):
+    """
+    Returns content digests of everything a build depends on besides its parameters, for build cache keys: weights,
+    dataset yaml, calibration images, validation images and labels, the build scripts and the tool versions.
+    """
+    here = Path(__file__).resolve().parent
+    val = None
+    if val_dir:
+        files = calibration_files(val_dir, subset_size=0)
+        labels = [Path(p) for p in img2label_paths([str(f) for f in files]) if os.path.isfile(p)]
+        val = files_digest(files + labels)
+    return {
+        "weights": file_digest(weights_path),
+        "data": file_digest(data_yaml_path) if Path(data_yaml_path).is_file() else str(data_yaml_path),
+        "calibration": files_digest(calibration_files(calib_dir, subset_size, exclude_dir=val_dir)),
+        "validation": val,
+        "scripts": files_digest([here / "quantize_model.py", here / "model_manifest.py", here / "build_cache.py"]),
+        "tools": tool_versions(),
+    }
+
+
+def load_calibration_tensors(files, imgsz, stride, cache_dir=CALIB_CACHE_DIR):
+    """
+    Letterboxes calibration images the same way app.py does at serving time and returns a uint8 NCHW RGB array.
+
+    The array is cached as .npy under `cache_dir`, keyed by the file list (paths, sizes, mtimes), image size and
+    stride, and memory-mapped on later builds so repeated quantization skips decoding and resizing.
+    """
+    stats = [(str(f), f.stat().st_size, f.stat().st_mtime_ns) for f in files]
+    key = hashlib.sha1(json.dumps([list(imgsz), int(stride), stats]).encode()).hexdigest()[:16]
+    cache = Path(cache_dir) / f"calib_{key}.npy"
+    if cache.exists():
+        LOGGER.info(f"Loading {len(files)} cached calibration images from {cache}")
+        return np.load(cache, mmap_mode="r")
+
+    ims = []
+    for f in files:
+        im0 = cv2.imread(str(f))  # BGR
+        if im0 is None:
+            LOGGER.warning(f"Could not read calibration image {f}, skipping")
+            continue
+        im = letterbox(im0, imgsz, stride=stride, auto=False)[0]  # fixed shape so samples can be stacked
+        ims.append(im.transpose((2, 0, 1))[::-1])  # HWC to CHW, BGR to RGB
+    if not ims:
+        return np.empty((0, 3, *imgsz), dtype=np.uint8)
+    ims = np.ascontiguousarray(np.stack(ims))
+    cache.parent.mkdir(parents=True, exist_ok=True)
+    tmp = cache.with_suffix(".tmp.npy")
+    np.save(tmp, ims)
+    os.replace(tmp, cache)  # concurrent builds never read a partial cache
+    LOGGER.info(f"Cached {len(ims)} calibration images to {cache}")
+    return ims
+
+
+def transform_fn(data_item):
+    """
+    Quantization transform function.
+    Converts one uint8 CHW image (or an (image, labels) validation item) to the normalized NCHW float input used at
+    serving time.
+    """
+    if isinstance(data_item, tuple):
+        data_item = data_item[0]
+    img = data_item.astype(np.float32)  # uint8 to fp32
+    img /= 255.0  # 0 - 255 to 0.0 - 1.0
+    return img if img.ndim == 4 else np.expand_dims(img, 0)
+
+
+def calibration_batches(calib, batch):
+    """Groups calibration images into uint8 NCHW batches for static-batch models, repeating images if too few."""
+    if batch == 1:
+        return calib
+    idx = np.arange(max(len(calib), batch)) % len(calib)
+    return [calib[idx[k : k + batch]] for k in range(0, len(idx) - batch + 1, batch)]
+
+
+def export_onnx(model, onnx_path, imgsz, batch=None):
+    """Exports `model` to ONNX; batch=None keeps batch and spatial axes dynamic, an int fixes the whole input shape."""
+    im = torch.zeros(batch or 1, 3, *imgsz)  # dummy input for tracing
+    dynamic = {"images": {0: "batch", 2: "height", 3: "width"}, "output": {0: "batch", 1: "anchors"}}
     torch.onnx.export(
         model,
         im,
@@ -45,51 +143,473 @@ def quantize_yolov5_model(weights_path, data_yaml_path, imgsz=(640, 640), output
         opset_version=12,
         input_names=["images"],
         output_names=["output"],
-        dynamic_axes={"images": {0: "batch", 2: "height", 3: "width"}, "output": {0: "batch", 1: "anchors"}}
+        dynamic_axes=None if batch else dynamic,
     )
     LOGGER.info(f"ONNX model exported to {onnx_path}")
 
+
+def export_torchscript(model, ts_path, imgsz, batch=1):
+    """Traces `model` at a fixed (batch, 3, *imgsz) input and saves it as TorchScript for the torchscript backend."""
+    ts = torch.jit.trace(model, torch.zeros(batch, 3, *imgsz), strict=False)
+    ts.save(str(ts_path))
+    LOGGER.info(f"TorchScript model exported to {ts_path}")
+
+
+def load_validation_set(val_dir, imgsz, stride):
+    """
+    Returns [(uint8 CHW RGB image, labels), ...] for the images in `val_dir`, letterboxed like the calibration set.
+
+    Labels are read from YOLO .txt files in the sibling labels/ directory (images/x.jpg -> labels/x.txt) and converted
+    to (n, 5) class, x1, y1, x2, y2 arrays in letterboxed pixels; they are None for images without a label file.
+    """
+    files = calibration_files(val_dir, subset_size=0)
+    items = []
+    for f, label_file in zip(files, img2label_paths([str(f) for f in files])):
+        im0 = cv2.imread(str(f))  # BGR
+        if im0 is None:
+            LOGGER.warning(f"Could not read validation image {f}, skipping")
+            continue
+        im, ratio, (dw, dh) = letterbox(im0, imgsz, stride=stride, auto=False)
+        labels = None
+        if os.path.isfile(label_file):
+            lb = np.loadtxt(label_file, ndmin=2, dtype=np.float32).reshape(-1, 5)
+            h0, w0 = im0.shape[:2]
+            xyxy = xywh2xyxy(lb[:, 1:] * [w0, h0, w0, h0]) * ratio[0] + [dw, dh, dw, dh]
+            labels = np.concatenate((lb[:, :1], xyxy), 1).astype(np.float32)
+        items.append((np.ascontiguousarray(im.transpose((2, 0, 1))[::-1]), labels))  # HWC to CHW, BGR to RGB
+    return items
+
+
+def model_input(compiled_model, im):
+    """Returns the input for one letterboxed image, repeated to fill the batch of a static-batch model."""
+    x = transform_fn(im)
+    batch = compiled_model.input(0).get_partial_shape()[0]
+    return np.repeat(x, batch.get_length(), 0) if batch.is_static and batch.get_length() > 1 else x
+
+
+def predict(compiled_model, im, conf_thres=0.001, iou_thres=0.6):
+    """Runs one letterboxed image through a compiled OpenVINO model; returns (n, 6) xyxy, conf, cls after NMS."""
+    out = compiled_model(model_input(compiled_model, im))[compiled_model.output(0)][:1]
+    return non_max_suppression(torch.from_numpy(out), conf_thres, iou_thres, max_det=300)[0].numpy()
+
+
+def match_predictions(det, labels):
+    """Marks each prediction as a true positive at every IoU threshold in IOUV, matching like YOLOv5 val.py."""
+    correct = np.zeros((len(det), len(IOUV)), dtype=bool)
+    if not len(det) or not len(labels):
+        return correct
+    iou = box_iou(torch.from_numpy(labels[:, 1:]), torch.from_numpy(det[:, :4].copy())).numpy()
+    same_class = labels[:, :1] == det[:, 5]
+    for k, t in enumerate(IOUV):
+        x = np.argwhere((iou >= t) & same_class)  # (label, prediction) pairs above threshold
+        if len(x):
+            m = np.concatenate((x, iou[x[:, 0], x[:, 1]][:, None]), 1)
+            m = m[m[:, 2].argsort()[::-1]]  # best IoU first
+            m = m[np.unique(m[:, 1], return_index=True)[1]]  # one label per prediction
+            m = m[np.unique(m[:, 0], return_index=True)[1]]  # one prediction per label
+            correct[m[:, 1].astype(int), k] = True
+    return correct
+
+
+def evaluate(compiled_model, items):
+    """Returns (mAP@0.5, mAP@0.5:0.95) of a compiled model on validation items."""
+    stats = []
+    for im, labels in items:
+        det = predict(compiled_model, im)
+        stats.append((match_predictions(det, labels), det[:, 4], det[:, 5], labels[:, 0]))
+    tp, conf, pred_cls, target_cls = (np.concatenate(x, 0) for x in zip(*stats))
+    if not len(target_cls) or not tp.any():
+        return 0.0, 0.0
+    ap = ap_per_class(tp, conf, pred_cls, target_cls)[5]  # (classes, IoU thresholds)
+    return float(ap[:, 0].mean()), float(ap.mean())
+
+
+def latency_ms(compiled_model, items, n=50, warmup=3):
+    """Returns the median single-image inference latency in milliseconds over up to `n` validation images."""
+    inputs = [model_input(compiled_model, im) for im, _ in items[:n]]
+    for x in inputs[:warmup]:
+        compiled_model(x)
+    times = []
+    for x in inputs:
+        t = time.perf_counter()
+        compiled_model(x)
+        times.append((time.perf_counter() - t) * 1e3)
+    return float(np.median(times))
+
+
+def reference_labels(compiled_model, items, conf_thres=0.25, iou_thres=0.45):
+    """
+    Fills missing labels with the FP32 model's own detections at serving thresholds, so that images without ground
+    truth measure how well the quantized model agrees with FP32.
+    """
+    out = []
+    for im, labels in items:
+        if labels is None:
+            det = predict(compiled_model, im, conf_thres, iou_thres)
+            labels = np.concatenate((det[:, 5:6], det[:, :4]), 1)
+        out.append((im, labels))
+    return out
+
+
+def accuracy_gate(core, fp32_model, int8_model, val_items, max_drop=0.01, labelled=None):
+    """
+    Measures mAP and latency of an INT8 model against its FP32 source on validation items. Returns the model to deploy,
+    the FP32 one if the mAP@0.5 drop exceeds `max_drop`, and the report.
+
+    `labelled` is how many of the items have ground-truth labels; the others are scored against the FP32 detections
+    (reference_labels()), and the report's "reference" says which the mAP was measured against.
+    """
+    labelled = len(val_items) if labelled is None else labelled
+    reference = "labels" if labelled == len(val_items) else "labels + fp32 agreement" if labelled else "fp32 agreement"
+    if not labelled:
+        LOGGER.warning(
+            "No YOLO labels found for the validation images, the gate is agreement-only: it measures how closely "
+            "INT8 matches the FP32 detections, not accuracy"
+        )
+    report = {
+        "validation_images": len(val_items),
+        "labelled_images": labelled,
+        "reference": reference,
+        "max_drop": max_drop,
+        "models": {},
+    }
+    for k, m in (("fp32", fp32_model), ("int8", int8_model)):
+        compiled = core.compile_model(m, "CPU")
+        map50, map50_95 = evaluate(compiled, val_items)
+        report["models"][k] = {"map50": map50, "map50_95": map50_95, "latency_ms": latency_ms(compiled, val_items)}
+    fp32, int8 = report["models"]["fp32"], report["models"]["int8"]
+    report["map50_drop"] = fp32["map50"] - int8["map50"]
+    report["speedup"] = fp32["latency_ms"] / max(int8["latency_ms"], 1e-9)
+    report["deployed"] = "int8" if int8_model is not fp32_model and report["map50_drop"] <= max_drop else "fp32"
+    LOGGER.info(
+        f"mAP@0.5 against {reference}: FP32 {fp32['map50']:.4f} INT8 {int8['map50']:.4f} "
+        f"(drop {report['map50_drop']:.4f}), "
+        f"latency FP32 {fp32['latency_ms']:.1f}ms INT8 {int8['latency_ms']:.1f}ms ({report['speedup']:.2f}x)"
+    )
+    if report["map50_drop"] > max_drop:
+        LOGGER.warning(f"mAP@0.5 drop exceeds {max_drop}, deploying the FP32 model instead of INT8")
+        return fp32_model, report
+    return int8_model, report
+
+
+def quantize_int8(ov_model, calib_data, val_items=None, accuracy_control=False, max_drop=0.01):
+    """
+    Quantizes an OpenVINO model to INT8 with NNCF on uint8 calibration images (or batches). With `accuracy_control`,
+    NNCF reverts the most accuracy-sensitive layers to FP32 until the mAP@0.5 drop on `val_items` is within max_drop.
+    """
+    quantization_dataset = nncf.Dataset(calib_data, transform_fn)
+    if accuracy_control:
+        return nncf.quantize_with_accuracy_control(
+            ov_model,
+            quantization_dataset,
+            nncf.Dataset(val_items),
+            validation_fn=lambda compiled, data: evaluate(compiled, list(data))[0],
+            max_drop=max_drop,
+            preset=nncf.QuantizationPreset.MIXED,
+            subset_size=len(calib_data),
+        )
+    return nncf.quantize(
+        ov_model, quantization_dataset, preset=nncf.QuantizationPreset.MIXED, subset_size=len(calib_data)
+    )
+
+
+def ir_path(output_dir, stem, precision):
+    """Returns the IR path of a single build, e.g. /app/data/models/yolov5s_int8_openvino_model/yolov5s.xml."""
+    return Path(output_dir) / f"{stem}_{precision}_openvino_model" / f"{stem}.xml"
+
+
+def quantize_yolov5_model(
+    weights_path,
+    data_yaml_path,
+    imgsz=(640, 640),
+    output_dir="/app/data/models",
+    calib_dir=CALIB_DIR,
+    subset_size=300,
+    cache_dir=CALIB_CACHE_DIR,
+    val_dir=None,
+    accuracy_control=False,
+    max_drop=0.01,
+    build_cache=None,
+):
+    """
+    Quantizes the weights to a single INT8 OpenVINO IR in `output_dir`/<stem>_int8_openvino_model and returns its path.
+    If the accuracy gate rejects INT8 (or NNCF is missing), the FP32 IR is saved as <stem>_fp32_openvino_model instead.
+    """
+    weights_path = Path(weights_path)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    report_path = output_dir / f"{weights_path.stem}_quantization_report.json"
+    val_dir = val_dir or (VAL_DIR if accuracy_control else None)
+
+    # Reuse the IR from an earlier build with identical inputs
+    if build_cache is not None:
+        inputs = build_inputs(weights_path, data_yaml_path, calib_dir, subset_size, val_dir)
+        key = build_cache.key(
+            step="quantize",
+            imgsz=list(imgsz),
+            subset_size=subset_size,
+            accuracy_control=accuracy_control,
+            max_drop=max_drop,
+            nncf=nncf is not None,
+            **inputs,
+        )
+        if build_cache.restore(key, output_dir):
+            xml = next(ir_path(output_dir, weights_path.stem, p) for p in ("int8", "fp32"))
+            LOGGER.info(f"Build cache hit {key[:12]}, reused {xml.parent}")
+            return xml
+        LOGGER.info(f"Build cache miss {key[:12]}, building {weights_path.stem}")
+
+    LOGGER.info(f"Starting quantization of {weights_path.name}...")
+
+    # Load PyTorch model
+    device = torch.device("cpu") # Quantization should typically be done on CPU
+    model = DetectMultiBackend(weights_path, device=device, dnn=False, data=data_yaml_path, fp16=False)
+    model.eval()
+
+    # Export to ONNX (prerequisite for OpenVINO)
+    onnx_path = output_dir / weights_path.with_suffix(".onnx").name
+    export_onnx(model, onnx_path, imgsz)
+
     # Convert ONNX to OpenVINO IR
     ov_model = mo.convert_model(str(onnx_path), model_name=weights_path.stem, framework="onnx", compress_to_fp16=False)
     LOGGER.info(f"OpenVINO IR model converted from ONNX.")
+    fp32_model = ov_model
+
+    # Held-out validation set, needed to gate the quantized model on accuracy
+    core = ov.Core()
+    val_items = None
+    if val_dir:
+        val_items = load_validation_set(val_dir, imgsz, model.stride)
+        if not val_items:
+            raise FileNotFoundError(f"No validation images found in {val_dir}")
+        n_labelled = sum(labels is not None for _, labels in val_items)
+        val_items = reference_labels(core.compile_model(fp32_model, "CPU"), val_items)
+        LOGGER.info(f"Validating on {len(val_items)} images, {n_labelled} labelled, the rest against FP32 detections")
 
     if nncf:
         LOGGER.info("Starting INT8 quantization with NNCF...")
 
-        def gen_dummy_dataloader(imgsz, batch_size=1):
-            # Create a dummy dataloader for quantization calibration
-            # In a real scenario, use a representative subset of your training data.
-            for _ in range(10): # Generate 10 dummy images for calibration
-                dummy_img = np.random.randint(0, 256, (imgsz[0], imgsz[1], 3), dtype=np.uint8)
-                dummy_img = np.transpose(dummy_img, (2, 0, 1)) # HWC to CHW
-                yield [torch.from_numpy(dummy_img).unsqueeze(0)] # Add batch dim
-
-        def transform_fn(data_item):
-            """
-            Quantization transform function.
-            Extracts and preprocess input data from dataloader item for quantization.
-            """
-            img = data_item[0].numpy().astype(np.float32)  # uint8 to fp16/32
-            img /= 255.0  # 0 - 255 to 0.0 - 1.0
-            return np.expand_dims(img, 0) if img.ndim == 3 else img
-
-        dummy_ds = gen_dummy_dataloader(imgsz)
-        quantization_dataset = nncf.Dataset(dummy_ds, transform_fn)
-        ov_model = nncf.quantize(ov_model, quantization_dataset, preset=nncf.QuantizationPreset.MIXED)
+        calib_files = calibration_files(calib_dir, subset_size, exclude_dir=val_dir)
+        calib = load_calibration_tensors(calib_files, imgsz, model.stride, cache_dir)
+        if not len(calib):
+            raise FileNotFoundError(f"No calibration images found in {calib_dir}")
+
+        LOGGER.info(f"Calibrating on {len(calib)} images from {calib_dir}")
+        ov_model = quantize_int8(ov_model, calib, val_items, accuracy_control, max_drop)
         LOGGER.info("INT8 quantization with NNCF completed.")
     else:
         LOGGER.warning("NNCF not available, skipping INT8 quantization.")
 
-    # Save quantized OpenVINO IR model
-    quantized_model_path = output_dir / f"{weights_path.stem}_int8_openvino_model"
-    quantized_model_path.mkdir(parents=True, exist_ok=True)
-    ov.serialize(ov_model, str(quantized_model_path / f"{weights_path.stem}.xml"))
-    LOGGER.info(f"Quantized OpenVINO model saved to {quantized_model_path}")
+    # Accuracy and latency report, falling back to FP32 if the quantized model loses too much accuracy
+    precision = "int8" if nncf else "fp32"
+    if val_items is not None:
+        ov_model, report = accuracy_gate(core, fp32_model, ov_model, val_items, max_drop, n_labelled)
+        precision = report["deployed"]
+        report_path.write_text(json.dumps(report, indent=2))
+        LOGGER.info(f"Quantization report saved to {report_path}")
+
+    # Save the OpenVINO IR model under the precision it actually has, replacing the other one of an earlier build
+    for p in ("int8", "fp32"):
+        shutil.rmtree(ir_path(output_dir, weights_path.stem, p).parent, ignore_errors=True)
+    xml = ir_path(output_dir, weights_path.stem, precision)
+    xml.parent.mkdir(parents=True, exist_ok=True)
+    ov.serialize(ov_model, str(xml))
+    LOGGER.info(f"{precision.upper()} OpenVINO model saved to {xml.parent}")
+    if build_cache is not None:
+        build_cache.store(key, xml.parent, *([report_path] if val_items is not None else []))
+
+    return xml
 
-    return quantized_model_path / f"{weights_path.stem}.xml"
+
+def build_matrix(
+    weights_path,
+    data_yaml_path,
+    sizes=(320, 416, 640),
+    batches=(1,),
+    precisions=PRECISIONS,
+    output_dir="/app/data/models",
+    calib_dir=CALIB_DIR,
+    subset_size=300,
+    cache_dir=CALIB_CACHE_DIR,
+    val_dir=None,
+    accuracy_control=False,
+    max_drop=0.01,
+    build_cache=None,
+):
+    """
+    Builds one static-shape OpenVINO IR per input size x batch size x precision under `output_dir`/matrix and records
+    each in the model manifest. Static shapes let OpenVINO compile shape-specialized kernels, and the matrix lets each
+    deployment trade resolution for latency by configuration. fp32 artifacts also keep the static ONNX model and a
+    TorchScript trace, so the ONNX Runtime and TorchScript backends can serve them too.
+
+    With `val_dir` or `accuracy_control`, every int8 artifact goes through the same accuracy gate as a single build.
+    The gate report is stored in the artifact directory and recorded in its manifest entry as `accuracy`. If the
+    mAP@0.5 drop against the fp32 model of the same shape exceeds `max_drop`, no int8 IR is saved: the entry has no
+    files and records `deployed: fp32`, and ModelManifest.select() serves the fp32 artifact for it.
+
+    With a `build_cache`, each artifact is keyed separately, so changing one size or precision only rebuilds that one.
+    """
+    weights_path = Path(weights_path)
+    matrix_dir = Path(output_dir) / "matrix"
+    matrix_dir.mkdir(parents=True, exist_ok=True)
+    manifest = ModelManifest(matrix_dir / MANIFEST_NAME)
+
+    model = DetectMultiBackend(weights_path, device=torch.device("cpu"), dnn=False, data=data_yaml_path, fp16=False)
+    model.eval()
+    names = model.names if isinstance(model.names, list) else [model.names[k] for k in sorted(model.names)]
+    gated = bool(val_dir or accuracy_control)
+    val_dir = (val_dir or VAL_DIR) if gated else None
+    if gated and "int8" in precisions and "fp32" not in precisions:
+        LOGGER.warning("int8 artifacts that fail the accuracy gate fall back to fp32, which is not being built")
+    inputs = {}
+    if build_cache is not None:
+        inputs = build_inputs(weights_path, data_yaml_path, calib_dir, subset_size, val_dir)
+    core = ov.Core()
+
+    for size in sizes:
+        imgsz, calib, val_items, n_labelled = (size, size), None, None, 0
+        for batch in batches:
+            onnx_path = matrix_dir / f"{weights_path.stem}_{size}_b{batch}.onnx"
+            for precision in precisions:
+                if precision == "int8" and nncf is None:
+                    LOGGER.warning("NNCF not available, skipping INT8 artifacts.")
+                    continue
+                name = artifact_name(weights_path.stem, size, batch, precision)
+                xml = matrix_dir / name / f"{weights_path.stem}.xml"
+                report_path = xml.parent / "quantization_report.json"
+                files = {"openvino": xml}
+                if precision == "fp32":
+                    files.update(onnx=xml.with_suffix(".onnx"), torchscript=xml.with_suffix(".torchscript"))
+                if build_cache is not None:
+                    key = build_cache.key(
+                        step="matrix",
+                        size=size,
+                        batch=batch,
+                        precision=precision,
+                        gate=[accuracy_control, max_drop] if gated and precision == "int8" else None,
+                        **{
+                            **inputs,
+                            "calibration": inputs["calibration"] if precision == "int8" else None,
+                            "validation": inputs["validation"] if precision == "int8" else None,
+                        },
+                    )
+                shutil.rmtree(xml.parent, ignore_errors=True)  # no stale IR of an earlier build is left behind
+                if build_cache is not None:
+                    hit = build_cache.restore(key, matrix_dir)
+                    LOGGER.info(f"Build cache {'hit' if hit else 'miss'} {key[:12]} for {name}")
+                if build_cache is None or not hit:
+                    if not onnx_path.exists():  # exported once per size and batch, only when something is rebuilt
+                        export_onnx(model, onnx_path, imgsz, batch)
+                    ov_model = mo.convert_model(
+                        str(onnx_path),
+                        model_name=weights_path.stem,
+                        framework="onnx",
+                        compress_to_fp16=precision == "fp16",
+                    )
+                    if precision == "int8":
+                        if calib is None:
+                            calib_files = calibration_files(calib_dir, subset_size, exclude_dir=val_dir)
+                            calib = load_calibration_tensors(calib_files, imgsz, model.stride, cache_dir)
+                        if gated and val_items is None:
+                            val_items = load_validation_set(val_dir, imgsz, model.stride)
+                            if not val_items:
+                                raise FileNotFoundError(f"No validation images found in {val_dir}")
+                            n_labelled = sum(labels is not None for _, labels in val_items)
+                            val_items = reference_labels(core.compile_model(ov_model, "CPU"), val_items)
+                        fp32_model = ov_model
+                        # NNCF runs validation items one at a time, so static-batch models only get the final gate
+                        data = calibration_batches(calib, batch)
+                        ov_model = quantize_int8(ov_model, data, val_items, accuracy_control and batch == 1, max_drop)
+                        if gated:
+                            ov_model, report = accuracy_gate(
+                                core, fp32_model, ov_model, val_items, max_drop, n_labelled
+                            )
+                            report_path.parent.mkdir(parents=True, exist_ok=True)
+                            report_path.write_text(json.dumps(report, indent=2))
+                    xml.parent.mkdir(parents=True, exist_ok=True)
+                    if precision != "int8" or ov_model is not fp32_model:  # a rejected int8 keeps only its report
+                        ov.serialize(ov_model, str(xml))
+                    if precision == "fp32":
+                        shutil.copy2(onnx_path, files["onnx"])
+                        export_torchscript(model, files["torchscript"], imgsz, batch)
+                    LOGGER.info(f"Built {name}")
+                    if build_cache is not None:
+                        build_cache.store(key, xml.parent)
+                report = json.loads(report_path.read_text()) if report_path.is_file() else None
+                deployed = report["deployed"] if report else precision
+                if deployed != precision:  # the entry only records the gate result
+                    LOGGER.warning(f"{name} failed the accuracy gate, the {deployed} artifact is served for it")
+                    files = {}
+                manifest.add(
+                    name=name,
+                    **({"path": str(xml.relative_to(matrix_dir))} if files else {}),
+                    files={k: str(f.relative_to(matrix_dir)) for k, f in files.items()},
+                    imgsz=[size, size],
+                    batch=batch,
+                    precision=precision,
+                    weights=weights_path.name,
+                    stride=int(model.stride),
+                    names=names,
+                    **({"accuracy": report} if report else {}),
+                    **({"deployed": deployed} if deployed != precision else {}),
+                )
+                manifest.save()  # after every artifact, so an interrupted build keeps what it finished
+            onnx_path.unlink(missing_ok=True)
+    LOGGER.info(f"{len(manifest.entries)} artifacts in {manifest.path}")
+    return manifest
 
 if __name__ == "__main__":
     YOLOV5_ROOT = Path("/app") / "yolov5" # Ensure YOLOV5_ROOT is set correctly for the script
-    original_weights = Path("/app") / "data" / "models" / "yolov5s.pt"
-    data_config = YOLOV5_ROOT / "data" / "coco.yaml"
-    quantize_yolov5_model(original_weights, data_config)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--weights", type=str, default=Path("/app") / "data" / "models" / "yolov5s.pt", help="weights")
+    parser.add_argument("--data", type=str, default=YOLOV5_ROOT / "data" / "coco.yaml", help="dataset.yaml path")
+    parser.add_argument("--imgsz", nargs="+", type=int, default=[416], help="calibration size h,w (serving size)")
+    parser.add_argument("--output-dir", type=str, default="/app/data/models", help="where the IR model is saved")
+    parser.add_argument("--calib-dir", type=str, default=CALIB_DIR, help="real images used for INT8 calibration")
+    parser.add_argument("--subset-size", type=int, default=300, help="max calibration images, 0 for all")
+    parser.add_argument("--cache-dir", type=str, default=CALIB_CACHE_DIR, help="preprocessed calibration cache")
+    parser.add_argument("--build-cache-dir", type=str, default=BUILD_CACHE_DIR, help="content-hashed IR cache")
+    parser.add_argument("--no-build-cache", action="store_true", help="always rebuild, do not read or store artifacts")
+    parser.add_argument("--val-dir", type=str, default=None, help="held-out images (YOLO labels optional) to report on")
+    parser.add_argument("--accuracy-control", action="store_true", help="keep sensitive layers FP32 within max-drop")
+    parser.add_argument("--max-drop", type=float, default=0.01, help="max absolute mAP@0.5 drop accepted for INT8")
+    parser.add_argument("--matrix", action="store_true", help="build static-shape IRs for every size/batch/precision")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[320, 416, 640], help="--matrix input sizes")
+    parser.add_argument("--batches", nargs="+", type=int, default=[1], help="--matrix batch sizes")
+    parser.add_argument(
+        "--precisions", nargs="+", default=list(PRECISIONS), choices=PRECISIONS, help="--matrix precisions"
+    )
+    opt = parser.parse_args()
+    opt.imgsz *= 2 if len(opt.imgsz) == 1 else 1  # expand
+    build_cache = BuildCache(opt.build_cache_dir, enabled=not opt.no_build_cache)
+    if opt.matrix:
+        build_matrix(
+            opt.weights,
+            opt.data,
+            sizes=opt.sizes,
+            batches=opt.batches,
+            precisions=opt.precisions,
+            output_dir=opt.output_dir,
+            calib_dir=opt.calib_dir,
+            subset_size=opt.subset_size,
+            cache_dir=opt.cache_dir,
+            val_dir=opt.val_dir,
+            accuracy_control=opt.accuracy_control,
+            max_drop=opt.max_drop,
+            build_cache=build_cache,
+        )
+    else:
+        quantize_yolov5_model(
+            opt.weights,
+            opt.data,
+            imgsz=tuple(opt.imgsz),
+            output_dir=opt.output_dir,
+            calib_dir=opt.calib_dir,
+            subset_size=opt.subset_size,
+            cache_dir=opt.cache_dir,
+            val_dir=opt.val_dir,
+            accuracy_control=opt.accuracy_control,
+            max_drop=opt.max_drop,
+            build_cache=build_cache,
+        )
+    LOGGER.info(build_cache.summary())
@@ -0,0 +1,288 @@
+"""
+Registry of named model versions for hot swaps in ml_service.
+
+A version is loaded and warmed in the background while the active version keeps serving. Activation swaps the active
+name under a lock, so every request runs entirely on one version: requests that started on the old version finish on
+it, and unloading a version waits for them to drain first. Optionally a shadow version receives a sample of the
+traffic off the request path, and its detections are compared with the active version's.
+
+Usage:
+    registry = ModelRegistry(loader, runner)  # loader(spec) -> ModelVersion fields, runner(version, im0, params)
+    registry.load("v2", {"manifest": "/app/data/models/v2/matrix/manifest.json"}, activate=True)
+    version = registry.acquire()
+    try:
+        det = runner(version, im0, params)
+    finally:
+        version.release()
+    registry.shadow(im0, det, params)
+"""
+
+import queue
+import random
+import threading
+import time
+
+import numpy as np
+
+WARMUP_ASPECTS = (1.0, 4 / 3, 16 / 9)  # typical frame aspect ratios, warmed in both orientations for dynamic IRs
+
+
+class ModelVersion:
+    """
+    One loaded model and the metadata needed to pre- and post-process for it.
+
+    States: loading -> warming -> ready (serving or standby) -> unloading -> unloaded, or failed.
+    """
+
+    def __init__(self, name, spec):
+        self.name, self.spec = name, spec
+        self.state, self.error = "loading", None
+        self.backend = self.artifact = None
+        self.names = self.stride = self.imgsz = self.batch_size = None
+        self.static_shape = True
+        self.warmup_ms, self.loaded_at = None, None
+        self.inflight = 0
+        self._idle = threading.Condition()
+
+    def attach(self, backend, artifact, static_shape=True):
+        self.backend, self.artifact, self.static_shape = backend, artifact, static_shape
+        self.names, self.stride = artifact["names"], artifact["stride"]
+        self.imgsz, self.batch_size = tuple(artifact["imgsz"]), artifact["batch"]
+
+    def warmup_shapes(self, aspects=WARMUP_ASPECTS):
+        """Returns the input shapes to warm: the static artifact shape, or letterboxed shapes of common frames."""
+        if self.static_shape:
+            return [(self.batch_size, 3, *self.imgsz)]
+        shapes = set()
+        for a in aspects:
+            for h, w in ((1, a), (a, 1)):
+                r = min(self.imgsz[0] / h, self.imgsz[1] / w)
+                # minimum-rectangle letterbox: resized side padded up to a multiple of stride
+                s = (s - (s - round(d * r)) // self.stride * self.stride for s, d in zip(self.imgsz, (h, w)))
+                shapes.add((1, 3, *s))
+        return sorted(shapes)
+
+    def release(self):
+        """Ends one request started with ModelRegistry.acquire(); the last one out frees an unloading version."""
+        with self._idle:
+            self.inflight -= 1
+            if not self.inflight:
+                self._idle.notify_all()
+                if self.state == "unloading":  # unload() stopped waiting for this request
+                    self.state, self.backend = "unloaded", None
+
+    def drain(self, timeout=None):
+        """Waits until no request is running on this version; returns False on timeout."""
+        with self._idle:
+            return self._idle.wait_for(lambda: not self.inflight, timeout)
+
+    def unload(self, timeout=None):
+        """
+        Frees the backend once no request is running on this version; returns False on timeout. The backend is then
+        kept for the requests still running, and the last of them frees it in release().
+        """
+        with self._idle:
+            self.state = "unloading"
+            drained = self._idle.wait_for(lambda: not self.inflight, timeout)
+            if drained:
+                self.state, self.backend = "unloaded", None
+            return drained
+
+    def info(self):
+        return {
+            "name": self.name,
+            "state": self.state,
+            "error": self.error,
+            "model": self.artifact["name"] if self.artifact else None,
+            "runtime": self.backend.metadata()["runtime"] if self.backend else None,
+            "imgsz": list(self.imgsz) if self.imgsz else None,
+            "batch": self.batch_size,
+            "warmup_ms": self.warmup_ms,
+            "loaded_at": self.loaded_at,
+            "inflight": self.inflight,
+            "spec": self.spec,
+        }
+
+
+def match_detections(a, b, iou_thres=0.5):
+    """Returns how many detections of `a` and `b` ((n, 6) xyxy, conf, cls) pair up one-to-one by class and IoU."""
+    if not len(a) or not len(b):
+        return 0
+    tl = np.maximum(a[:, None, :2], b[None, :, :2])
+    br = np.minimum(a[:, None, 2:4], b[None, :, 2:4])
+    inter = np.prod(np.clip(br - tl, 0, None), axis=2)
+    area_a, area_b = (np.prod(x[:, 2:4] - x[:, :2], axis=1) for x in (a, b))
+    iou = inter / (area_a[:, None] + area_b[None] - inter + 1e-9)
+    iou[a[:, 5:6] != b[None, :, 5]] = 0
+    used_a, used_b = set(), set()
+    for i, j in zip(*np.unravel_index(np.argsort(-iou, axis=None), iou.shape)):  # greedy, best IoU first
+        if iou[i, j] < iou_thres:
+            break
+        if i not in used_a and j not in used_b:
+            used_a.add(i)
+            used_b.add(j)
+    return len(used_a)
+
+
+class ShadowStats:
+    """Agreement between the active and the shadow version over the sampled requests."""
+
+    def __init__(self):
+        self.requests = self.errors = self.dropped = 0
+        self.f1_sum = self.latency_sum = 0.0
+        self.primary_dets = self.shadow_dets = 0
+
+    def add(self, primary, shadow, latency_ms):
+        n = len(primary) + len(shadow)
+        self.requests += 1
+        self.f1_sum += 2 * match_detections(primary, shadow) / n if n else 1.0
+        self.primary_dets += len(primary)
+        self.shadow_dets += len(shadow)
+        self.latency_sum += latency_ms
+
+    def summary(self):
+        n = max(self.requests, 1)
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "dropped": self.dropped,
+            "agreement_f1": round(self.f1_sum / n, 4),
+            "primary_detections": self.primary_dets,
+            "shadow_detections": self.shadow_dets,
+            "shadow_latency_ms": round(self.latency_sum / n, 2),
+        }
+
+
+class ModelRegistry:
+    """
+    Named model versions with one active version and an optional shadow.
+
+    Args:
+        loader: loader(spec) -> (backend, artifact, static_shape) for a version spec.
+        runner: runner(version, im0, params) -> (n, 6) detections, used for shadow traffic.
+        warmup_iterations: zero-input inferences per warmup shape before a version is ready.
+        shadow_queue: shadow requests buffered at most; more are dropped rather than slowing the service.
+    """
+
+    def __init__(self, loader, runner, warmup_iterations=3, shadow_queue=8):
+        self.loader, self.runner = loader, runner
+        self.warmup_iterations = warmup_iterations
+        self.versions = {}
+        self.active = None
+        self.shadow_name, self.shadow_rate, self.shadow_stats = None, 0.0, None
+        self._lock = threading.Lock()
+        self._shadow_queue = queue.Queue(maxsize=shadow_queue)
+        threading.Thread(target=self._shadow_worker, name="shadow", daemon=True).start()
+
+    def load(self, name, spec, activate=False):
+        """
+        Loads version `name` from `spec`, then warms it on a background thread and, with `activate`, switches traffic
+        to it once warm. Raises if loading fails; the version is then listed as failed.
+        """
+        with self._lock:
+            if name in self.versions and self.versions[name].state != "failed":
+                raise ValueError(f"Model version '{name}' already exists")
+            version = self.versions[name] = ModelVersion(name, spec)
+        try:
+            version.attach(*self.loader(spec))
+        except Exception as e:
+            version.state, version.error = "failed", str(e)
+            raise
+        version.state = "warming"
+        threading.Thread(target=self._warm, args=(version, activate), name=f"warmup-{name}", daemon=True).start()
+        return version
+
+    def _warm(self, version, activate):
+        try:
+            shapes = version.warmup_shapes()
+            version.warmup_ms = round(version.backend.warmup(shapes, self.warmup_iterations), 1)
+        except Exception as e:  # stays unservable, the admin listing reports the error
+            version.state, version.error = "failed", str(e)
+            return
+        version.state, version.loaded_at = "ready", time.time()
+        if activate:
+            self.activate(version.name)
+
+    def activate(self, name):
+        """Atomically switches new requests to ready version `name`; returns the previously active version."""
+        with self._lock:
+            version = self._get(name)
+            if version.state != "ready":
+                raise RuntimeError(f"Model version '{name}' is {version.state}, not ready")
+            previous, self.active = self.versions.get(self.active), name
+        return previous
+
+    def unload(self, name, timeout=30.0):
+        """
+        Removes inactive version `name` and frees it once its in-flight requests have drained; returns False on
+        timeout, in which case it is freed when the last of them finishes.
+        """
+        with self._lock:
+            version = self._get(name)
+            if name == self.active:
+                raise RuntimeError(f"Model version '{name}' is active, activate another version first")
+            if name == self.shadow_name:
+                self.shadow_name = None
+            del self.versions[name]  # no new request can acquire it from here on
+        return version.unload(timeout)
+
+    def acquire(self, name=None):
+        """Returns the active (or named) ready version with one more request in flight, or None if there is none."""
+        with self._lock:
+            version = self.versions.get(self.active if name is None else name)
+            if version is None or version.state != "ready":
+                return None
+            with version._idle:
+                version.inflight += 1
+        return version
+
+    def active_version(self):
+        with self._lock:
+            return self.versions.get(self.active)
+
+    def set_shadow(self, name, rate=1.0):
+        """Sends a `rate` fraction of requests to version `name` as well, off the request path; None stops it."""
+        with self._lock:
+            if name is not None:
+                self._get(name)
+            self.shadow_name, self.shadow_rate = name, max(0.0, min(1.0, rate))
+            self.shadow_stats = ShadowStats() if name is not None else None
+
+    def shadow(self, im0, det, params=None):
+        """Queues `im0` for the shadow version with the active version's detections `det` and `params`, if sampled."""
+        name, stats = self.shadow_name, self.shadow_stats
+        if name is None or name == self.active or random.random() >= self.shadow_rate:
+            return
+        try:
+            self._shadow_queue.put_nowait((name, stats, im0, det, params))
+        except queue.Full:
+            stats.dropped += 1
+
+    def _shadow_worker(self):
+        while True:
+            name, stats, im0, det, params = self._shadow_queue.get()
+            version = self.acquire(name)
+            if version is None:
+                continue
+            try:
+                t = time.perf_counter()
+                shadow_det = self.runner(version, im0, params)
+                stats.add(det, shadow_det, (time.perf_counter() - t) * 1e3)
+            except Exception:
+                stats.errors += 1
+            finally:
+                version.release()
+
+    def info(self):
+        with self._lock:
+            versions = [v.info() for v in self.versions.values()]
+            shadow = self.shadow_name and {"name": self.shadow_name, "rate": self.shadow_rate}
+            stats = self.shadow_stats
+        if shadow:
+            shadow["stats"] = stats.summary()
+        return {"active": self.active, "shadow": shadow, "versions": versions}
+
+    def _get(self, name):
+        if name not in self.versions:
+            raise KeyError(f"Unknown model version '{name}'")
+        return self.versions[name]
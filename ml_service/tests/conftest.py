@@ -0,0 +1,10 @@
+import sys
+from pathlib import Path
+
+ML_SERVICE_DIR = Path(__file__).resolve().parents[1]
+if str(ML_SERVICE_DIR) not in sys.path:
+    sys.path.insert(0, str(ML_SERVICE_DIR))
+
+DETECTION_DIR = Path(__file__).resolve().parents[2] / "backend_service" / "detection"  # shared association.py
+if str(DETECTION_DIR) not in sys.path:
+    sys.path.append(str(DETECTION_DIR))
@@ -0,0 +1,91 @@
+import threading
+
+import numpy as np
+import pytest
+
+from backends import BACKENDS, Backend, _blobs, cache_key, default_precision, load_backend
+
+ARTIFACT = {
+    "name": "1500img_416_b1_fp32",
+    "files": {"onnx": "model.onnx"},
+    "imgsz": [416, 416],
+    "batch": 1,
+    "precision": "fp32",
+    "stride": 32,
+    "names": {0: "helmet", 1: "plate"},
+}
+
+
+class RecordingBackend(Backend):
+    """Backend that records the arrays it is given instead of running a model."""
+
+    name, fmt = "recording", "onnx"
+
+    def load(self, artifact):
+        self.artifact = artifact
+        self.inputs = []
+        return self
+
+    def infer_batch(self, x):
+        self.inputs.append(x)
+        return np.zeros((len(x), 10, 7), dtype=np.float32)
+
+
+def test_cache_key_depends_on_ir_and_compile_config():
+    key = cache_key("digest", {})
+    assert key == cache_key("digest", {})
+    assert key != cache_key("other", {})
+    assert key != cache_key("digest", {"INFERENCE_NUM_THREADS": 4})
+    assert cache_key("digest", {"INFERENCE_NUM_THREADS": 4, "PERFORMANCE_HINT": "LATENCY"}) == cache_key(
+        "digest", {"PERFORMANCE_HINT": "LATENCY", "INFERENCE_NUM_THREADS": 4}
+    )
+
+
+def test_blobs_change_when_a_blob_is_rewritten(tmp_path):
+    assert _blobs(tmp_path) == {}
+    blob = tmp_path / "model.blob"
+    blob.write_bytes(b"a")
+    before = _blobs(tmp_path)
+    blob.write_bytes(b"ab")
+    assert _blobs(tmp_path) != before
+
+
+def test_default_precision():
+    assert default_precision("openvino") == "int8"
+    assert default_precision("onnxruntime") == default_precision("torchscript") == "fp32"
+    assert set(BACKENDS) == {"openvino", "onnxruntime", "torchscript"}
+
+
+def test_load_backend_rejects_unknown_names():
+    with pytest.raises(ValueError, match="INFERENCE_BACKEND"):
+        load_backend("tensorrt", ARTIFACT)
+
+
+def test_input_buffer_is_reused_per_thread_and_shape():
+    backend = RecordingBackend().load(ARTIFACT)
+    x = backend.input_buffer((1, 3, 416, 416))
+    assert x.dtype == np.float32 and not x.any()
+    x[:] = 1
+    assert backend.input_buffer((1, 3, 416, 416)) is x
+    assert backend.input_buffer((1, 3, 320, 416)) is not x
+
+    other = []
+    t = threading.Thread(target=lambda: other.append(backend.input_buffer((1, 3, 416, 416))))
+    t.start()
+    t.join()
+    assert other[0] is not x and not other[0].any()  # each serving thread fills its own buffer
+
+
+def test_warmup_runs_every_shape_through_the_input_buffers():
+    backend = RecordingBackend().load(ARTIFACT)
+    ms = backend.warmup([(1, 3, 416, 416), (8, 3, 416, 416)], iterations=2)
+    assert ms >= 0
+    assert [x.shape[0] for x in backend.inputs] == [1, 1, 8, 8]
+    assert backend.inputs[0] is backend.input_buffer((1, 3, 416, 416))
+
+
+def test_metadata_describes_the_loaded_artifact():
+    meta = RecordingBackend(threads=4, streams=2).load(ARTIFACT).metadata()
+    assert meta["backend"] == "recording" and meta["file"] == "model.onnx"
+    assert (meta["imgsz"], meta["batch"], meta["precision"]) == ([416, 416], 1, "fp32")
+    assert (meta["threads"], meta["streams"]) == (4, 2)
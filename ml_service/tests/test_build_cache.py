@@ -0,0 +1,63 @@
+from build_cache import BuildCache, file_digest, files_digest, tool_versions
+
+
+def test_key_depends_on_inputs_not_their_order(tmp_path):
+    cache = BuildCache(tmp_path)
+    assert cache.key(imgsz=416, precision="int8") == cache.key(precision="int8", imgsz=416)
+    assert cache.key(imgsz=416, precision="int8") != cache.key(imgsz=320, precision="int8")
+    assert cache.key(imgsz=416, gate=None) != cache.key(imgsz=416, gate=[True, 0.01])
+
+
+def test_files_digest_is_content_based(tmp_path):
+    a, b = tmp_path / "a.jpg", tmp_path / "b.jpg"
+    a.write_bytes(b"a")
+    b.write_bytes(b"b")
+    digest = files_digest([a, b])
+    assert digest == files_digest([b, a])
+    a.write_bytes(b"changed")
+    assert files_digest([a, b]) != digest
+    assert file_digest(a) != file_digest(b)
+
+
+def test_tool_versions_reports_missing_packages():
+    versions = tool_versions(("numpy", "surely-not-installed-package"))
+    assert versions["numpy"] and versions["surely-not-installed-package"] is None
+
+
+def test_store_and_restore(tmp_path):
+    cache = BuildCache(tmp_path / "cache")
+    model = tmp_path / "build" / "model_dir"
+    model.mkdir(parents=True)
+    (model / "model.xml").write_text("<xml/>")
+    report = tmp_path / "build" / "report.json"
+    report.write_text("{}")
+    key = cache.key(step="test")
+
+    assert not cache.restore(key, tmp_path / "out")
+    cache.store(key, model, report)
+    assert cache.restore(key, tmp_path / "out")
+    assert (tmp_path / "out" / "model_dir" / "model.xml").read_text() == "<xml/>"
+    assert (tmp_path / "out" / "report.json").exists()
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert "1 hits, 1 misses" in cache.summary()
+
+
+def test_store_keeps_the_first_entry_for_a_key(tmp_path):
+    cache = BuildCache(tmp_path / "cache")
+    f = tmp_path / "a.txt"
+    f.write_text("first")
+    cache.store("k", f)
+    f.write_text("second")
+    cache.store("k", f)  # a concurrent build stored the same key first
+    cache.restore("k", tmp_path / "out")
+    assert (tmp_path / "out" / "a.txt").read_text() == "first"
+    assert not [p for p in (tmp_path / "cache").iterdir() if p.name.startswith(".tmp-")]
+
+
+def test_disabled_cache(tmp_path):
+    cache = BuildCache(tmp_path / "cache", enabled=False)
+    f = tmp_path / "a.txt"
+    f.write_text("a")
+    cache.store("k", f)
+    assert not cache.restore("k", tmp_path / "out")
+    assert not (tmp_path / "cache").exists()
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("torchvision")
+pytest.importorskip("utils.general", reason="needs the YOLOv5 repository on sys.path")
+
+from cascade import _to_classes, cascade_classes, roi_regions
+
+
+def test_cascade_classes():
+    coarse, fine = cascade_classes(["rider", "helmet", "license-plate", "motorcycle"])
+    assert coarse.tolist() == [0, 3] and fine.tolist() == [1, 2]
+    coarse, fine = cascade_classes({0: "helmet"})
+    assert not len(coarse) and fine.tolist() == [0]
+
+
+def test_roi_regions_pad_clip_and_min_side():
+    boxes = np.array([[100, 100, 200, 300], [0, 0, 10, 10], [950, 450, 1000, 500]], dtype=np.float32)
+    rois = roi_regions(boxes, (500, 1000), pad=0.15, min_side=104)
+    assert rois[0] == (85, 70, 215, 330)  # 15% of the box size on each side
+    assert rois[1] == (0, 0, 57, 57)  # grown to min_side around the center, clipped at the frame origin
+    assert rois[2] == (923, 423, 1000, 500)  # clipped at the far frame border
+    assert all(type(v) is int for roi in rois for v in roi)
+
+
+def test_to_classes_remaps_by_name_and_drops_unknown():
+    det = np.array([[0, 0, 1, 1, 0.9, 0], [0, 0, 1, 1, 0.8, 1], [0, 0, 1, 1, 0.7, 2]], dtype=np.float32)
+    out = _to_classes(det.copy(), ["rider", "car", "motorcycle"], {0: "helmet", 4: "motorcycle", 7: "rider"})
+    assert out[:, 5].tolist() == [7, 4]
+    assert out[:, 4].tolist() == pytest.approx([0.9, 0.7])
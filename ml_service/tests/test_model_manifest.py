@@ -0,0 +1,44 @@
+import pytest
+
+from model_manifest import ModelManifest, artifact_name
+
+
+def entry(size, batch, precision, files=None, **extra):
+    name = artifact_name("yolov5s", size, batch, precision)
+    files = {"openvino": f"{name}/yolov5s.xml"} if files is None else files
+    return {"name": name, "files": files, "imgsz": [size, size], "batch": batch, "precision": precision, **extra}
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    m = ModelManifest(tmp_path / "manifest.json")
+    m.add(**entry(416, 1, "fp32", {"openvino": "a/yolov5s.xml", "onnx": "a/yolov5s.onnx"}))
+    m.add(**entry(416, 1, "int8"))
+    m.add(**entry(320, 1, "int8", {}, deployed="fp32", accuracy={"deployed": "fp32", "map50_drop": 0.05}))
+    m.save()
+    return ModelManifest(m.path)
+
+
+def test_select_by_shape_precision_and_format(manifest):
+    artifact = manifest.select(416, 1, "int8")
+    assert artifact["name"] == "yolov5s_416_b1_int8"
+    assert artifact["xml"] == manifest.path.parent / "yolov5s_416_b1_int8" / "yolov5s.xml"
+    assert manifest.select(416, 1, "fp32", fmt="onnx")["files"]["onnx"] == manifest.path.parent / "a" / "yolov5s.onnx"
+    with pytest.raises(LookupError):
+        manifest.select(416, 1, "int8", fmt="onnx")
+    with pytest.raises(ValueError):
+        manifest.select(416, 1, "int4")
+
+
+def test_add_replaces_the_entry_with_the_same_name(manifest):
+    manifest.add(**entry(416, 1, "int8", {"openvino": "b/yolov5s.xml"}))
+    assert len(manifest.entries) == 3
+    assert manifest.select(416, 1, "int8")["files"]["openvino"] == manifest.path.parent / "b" / "yolov5s.xml"
+
+
+def test_rejected_int8_serves_the_deployed_precision(manifest):
+    with pytest.raises(LookupError, match="yolov5s_320_b1_int8 failed the accuracy gate, fp32 is served instead"):
+        manifest.select(320, 1, "int8")  # no fp32 320 build to fall back to
+    manifest.add(**entry(320, 1, "fp32"))
+    artifact = manifest.select(320, 1, "int8")
+    assert artifact["name"] == "yolov5s_320_b1_fp32" and artifact["precision"] == "fp32"
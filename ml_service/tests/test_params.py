@@ -0,0 +1,65 @@
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("utils.general", reason="needs the YOLOv5 repository on sys.path")
+
+import params
+from params import inference_params
+
+NAMES = ["rider", "helmet", "license-plate"]
+
+
+def test_defaults(monkeypatch):
+    monkeypatch.setattr(params, "CONFIDENCE_THRESHOLD", 0.5)
+    p = inference_params([], NAMES)
+    assert p["conf"] == 0.5 and p["classes"] is None and p["mode"] == params.INFERENCE_MODE
+
+
+def test_later_overrides_win_and_empty_values_are_ignored():
+    camera = {"conf": "0.6", "iou": 0.3, "max_det": 50}
+    request = {"conf": "0.7", "iou": "", "max_det": None, "unknown": 1}
+    p = inference_params([camera, request], NAMES)
+    assert (p["conf"], p["iou"], p["max_det"]) == (0.7, 0.3, 50)
+
+
+@pytest.mark.parametrize(
+    "classes, expected",
+    [("2", [2]), ("license-plate, helmet", [1, 2]), (["rider", 2], [0, 2]), ("0,0", [0])],
+)
+def test_classes_by_index_or_name(classes, expected):
+    assert inference_params([{"classes": classes}], NAMES)["classes"] == expected
+    assert inference_params([{"classes": classes}], dict(enumerate(NAMES)))["classes"] == expected
+
+
+@pytest.mark.parametrize(
+    "override",
+    [
+        {"conf": "1.5"},
+        {"iou": "-0.1"},
+        {"conf": "high"},
+        {"max_det": "0"},
+        {"max_det": str(params.MAX_DET_LIMIT + 1)},
+        {"max_det": "2.5"},
+        {"classes": "car"},
+        {"classes": "7"},
+        {"classes": " , "},
+        {"mode": "fast"},
+        {"mode": "tiled", "tile": "32"},
+        {"mode": "tiled", "tile": "8192"},
+        {"mode": "tiled", "overlap": "0.6"},
+    ],
+)
+def test_invalid_values(override):
+    with pytest.raises(ValueError):
+        inference_params([override], NAMES)
+
+
+def test_tiled_mode():
+    p = inference_params([{"mode": "tiled", "tile": "640", "overlap": "0.25"}], NAMES)
+    assert (p["mode"], p["tile"], p["overlap"]) == ("tiled", 640, 0.25)
+
+
+def test_cascade_needs_coarse_and_fine_classes():
+    assert inference_params([{"mode": "cascade"}], NAMES)["mode"] == "cascade"
+    with pytest.raises(ValueError):
+        inference_params([{"mode": "cascade"}], ["helmet", "license-plate"])
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+general = pytest.importorskip("utils.general", reason="needs the YOLOv5 repository on sys.path")
+
+from postprocess import detections, prefilter
+
+
+def raw_output(n=5000, nc=3, seed=0):
+    """Random raw YOLOv5 output (anchors, 5 + nc): xywh boxes in a 416 px input, mostly low objectness."""
+    rng = np.random.default_rng(seed)
+    out = np.empty((n, 5 + nc), dtype=np.float32)
+    out[:, :2] = rng.uniform(0, 416, (n, 2))
+    out[:, 2:4] = rng.uniform(8, 120, (n, 2))
+    out[:, 4] = rng.beta(0.3, 3, n)
+    out[:, 5:] = rng.uniform(0, 1, (n, nc))
+    return out
+
+
+@pytest.mark.parametrize("conf", [0.1, 0.25, 0.5])
+@pytest.mark.parametrize("classes", [None, [0], [1, 2]])
+def test_detections_match_yolov5_nms(conf, classes):
+    out = raw_output()
+    expected = general.non_max_suppression(torch.from_numpy(out[None]), conf, 0.45, classes, max_det=300)[0].numpy()
+    np.testing.assert_allclose(detections(out, conf, 0.45, classes, max_det=300), expected, rtol=1e-6)
+
+
+def test_prefilter_keeps_exactly_the_nms_candidates():
+    out = raw_output()
+    obj, cls_conf = out[:, 4], out[:, 5:]
+    keep = (obj > 0.25) & (obj * cls_conf.max(1) > 0.25) & (cls_conf.argmax(1) == 1)  # the rule inside NMS
+    assert keep.any()
+    np.testing.assert_array_equal(prefilter(out, 0.25, [1]), out[keep])
+    np.testing.assert_array_equal(prefilter(out, 0.25), out[(obj > 0.25) & (obj * cls_conf.max(1) > 0.25)])
+
+
+def test_max_det_and_empty_output():
+    out = raw_output()
+    assert len(detections(out, 0.01, 0.45, max_det=5)) == 5
+    empty = detections(out, 1.0)
+    assert empty.shape == (0, 6)
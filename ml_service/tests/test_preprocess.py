@@ -0,0 +1,71 @@
+import cv2
+import numpy as np
+import pytest
+
+from preprocess import PAD_VALUE, decode_image, letterbox_geometry, letterbox_into
+
+
+def reference_letterbox(im, new_shape=(640, 640), color=(114, 114, 114), auto=True, scaleup=True, stride=32):
+    """yolov5/utils/augmentations.py letterbox(), used when the YOLOv5 repository is not importable."""
+    shape = im.shape[:2]
+    r = min(new_shape[0] / shape[0], new_shape[1] / shape[1])
+    if not scaleup:
+        r = min(r, 1.0)
+    new_unpad = int(round(shape[1] * r)), int(round(shape[0] * r))
+    dw, dh = new_shape[1] - new_unpad[0], new_shape[0] - new_unpad[1]
+    if auto:
+        dw, dh = np.mod(dw, stride), np.mod(dh, stride)
+    dw /= 2
+    dh /= 2
+    if shape[::-1] != new_unpad:
+        im = cv2.resize(im, new_unpad, interpolation=cv2.INTER_LINEAR)
+    top, bottom = int(round(dh - 0.1)), int(round(dh + 0.1))
+    left, right = int(round(dw - 0.1)), int(round(dw + 0.1))
+    im = cv2.copyMakeBorder(im, top, bottom, left, right, cv2.BORDER_CONSTANT, value=color)
+    return im, (r, r), (dw, dh)
+
+
+try:
+    from utils.augmentations import letterbox
+except ImportError:
+    letterbox = reference_letterbox
+
+SHAPES = [(480, 640), (640, 480), (1080, 1920), (2160, 3840), (416, 416), (100, 50), (333, 777)]
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+@pytest.mark.parametrize("auto", [False, True])
+def test_letterbox_matches_yolov5(shape, auto):
+    im0 = np.random.default_rng(0).integers(0, 256, (*shape, 3), dtype=np.uint8)
+    expected, ratio, (dw, dh) = letterbox(im0, (416, 416), stride=32, auto=auto)
+    geometry = letterbox_geometry(shape, (416, 416), stride=32, auto=auto)
+    assert geometry.shape == expected.shape[:2]
+    assert (geometry.top, geometry.left) == (int(round(dh - 0.1)), int(round(dw - 0.1)))
+    assert geometry.ratio == pytest.approx(ratio[0])
+
+    dst = np.full((3, *geometry.shape), -1, dtype=np.float32)
+    letterbox_into(im0, dst, geometry)
+    reference = expected.transpose(2, 0, 1)[::-1].astype(np.float32) / 255  # HWC BGR to CHW RGB, 0-1
+    np.testing.assert_allclose(dst, reference, atol=1e-6)
+
+
+def test_letterbox_into_a_batch_slot_keeps_other_slots():
+    im0 = np.zeros((240, 320, 3), dtype=np.uint8)
+    geometry = letterbox_geometry(im0.shape[:2], (416, 416), auto=False)
+    x = np.zeros((2, 3, 416, 416), dtype=np.float32)
+    letterbox_into(im0, x[0], geometry)
+    assert x[0, :, 0, 0] == pytest.approx([PAD_VALUE] * 3)
+    assert not x[1].any()
+
+
+def test_no_scaleup():
+    geometry = letterbox_geometry((100, 200), (416, 416), auto=False, scaleup=False)
+    assert geometry.unpad == (100, 200) and geometry.ratio == 1.0
+
+
+def test_decode_image():
+    im = np.random.default_rng(0).integers(0, 256, (8, 12, 3), dtype=np.uint8)
+    data = cv2.imencode(".png", im)[1].tobytes()
+    np.testing.assert_array_equal(decode_image(data), im)
+    assert decode_image(b"") is None
+    assert decode_image(b"not an image") is None
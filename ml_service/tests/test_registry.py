@@ -0,0 +1,128 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from registry import ModelRegistry, match_detections
+
+
+class FakeBackend:
+    def __init__(self, fail_warmup=False):
+        self.fail_warmup = fail_warmup
+        self.release_warmup = threading.Event()
+        self.release_warmup.set()
+
+    def warmup(self, shapes, iterations=3):
+        self.release_warmup.wait(5)
+        if self.fail_warmup:
+            raise RuntimeError("warmup failed")
+        return 1.0
+
+    def metadata(self):
+        return {"runtime": "fake"}
+
+
+def loader(spec):
+    if spec.get("fail"):
+        raise FileNotFoundError("no such model")
+    artifact = {"name": spec.get("artifact", "m"), "names": ["rider"], "stride": 32, "imgsz": [416, 416], "batch": 1}
+    return spec.get("backend") or FakeBackend(spec.get("fail_warmup", False)), artifact, True
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while not predicate():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def ready_registry(*names, runner=None):
+    registry = ModelRegistry(loader, runner or (lambda version, im0, params: np.zeros((0, 6))), warmup_iterations=1)
+    for k, name in enumerate(names):
+        registry.load(name, {"artifact": name}, activate=k == 0)
+        wait_for(lambda: registry.versions[name].state == "ready")
+    wait_for(lambda: registry.active == names[0])
+    return registry
+
+
+def test_load_warms_then_activates():
+    backend = FakeBackend()
+    backend.release_warmup.clear()
+    registry = ModelRegistry(loader, None)
+    version = registry.load("v1", {"backend": backend}, activate=True)
+    assert version.state == "warming" and registry.acquire() is None  # not serving before warmup finishes
+    backend.release_warmup.set()
+    wait_for(lambda: registry.active == "v1")
+    assert version.state == "ready" and version.warmup_ms == 1.0
+    assert version.warmup_shapes() == [(1, 3, 416, 416)]
+
+
+def test_failed_load_and_warmup_are_listed_and_can_be_retried():
+    registry = ModelRegistry(loader, None)
+    with pytest.raises(FileNotFoundError):
+        registry.load("v1", {"fail": True})
+    assert registry.versions["v1"].state == "failed"
+    registry.load("v1", {"fail_warmup": True})
+    wait_for(lambda: registry.versions["v1"].state == "failed")
+    assert registry.versions["v1"].error == "warmup failed"
+    with pytest.raises(RuntimeError):
+        registry.activate("v1")
+
+
+def test_duplicate_and_unknown_names():
+    registry = ready_registry("v1")
+    with pytest.raises(ValueError):
+        registry.load("v1", {})
+    with pytest.raises(KeyError):
+        registry.activate("v2")
+
+
+def test_acquire_pins_a_request_to_its_version_across_activation():
+    registry = ready_registry("v1", "v2")
+    version = registry.acquire()
+    assert version.name == "v1" and version.inflight == 1
+    assert registry.activate("v2").name == "v1"
+    assert registry.acquire().name == "v2"  # new requests go to v2
+    assert version.name == "v1" and version.inflight == 1  # the running request stays on v1
+    version.release()
+    assert registry.acquire("v1").name == "v1"  # named versions stay reachable, e.g. for shadow traffic
+
+
+def test_unload_waits_for_drain():
+    registry = ready_registry("v1", "v2")
+    with pytest.raises(RuntimeError):
+        registry.unload("v1")  # active
+    version = registry.acquire("v2")
+    assert registry.unload("v2", timeout=0.05) is False  # still in flight
+    assert "v2" not in registry.versions and registry.acquire("v2") is None
+    assert version.state == "unloading" and version.backend is not None  # the running request can finish
+    version.release()
+    assert version.drain(timeout=0) and version.state == "unloaded" and version.backend is None
+
+    registry.load("v3", {"artifact": "v3"})
+    wait_for(lambda: registry.versions["v3"].state == "ready")
+    version = registry.acquire("v3")
+    threading.Timer(0.05, version.release).start()
+    assert registry.unload("v3", timeout=5)
+
+
+def test_shadow_compares_detections():
+    shadow_det = np.array([[0, 0, 10, 10, 0.9, 0]], dtype=np.float32)
+    registry = ready_registry("v1", "v2", runner=lambda version, im0, params: shadow_det)
+    registry.set_shadow("v2", rate=1.0)
+    for _ in range(3):
+        registry.shadow(np.zeros((8, 8, 3), dtype=np.uint8), shadow_det, {})
+    wait_for(lambda: registry.info()["shadow"]["stats"]["requests"] == 3)
+    stats = registry.info()["shadow"]["stats"]
+    assert stats["agreement_f1"] == 1.0 and stats["errors"] == 0
+    registry.set_shadow(None)
+    assert registry.info()["shadow"] is None
+
+
+def test_match_detections():
+    a = np.array([[0, 0, 10, 10, 0.9, 0], [20, 20, 30, 30, 0.8, 1]], dtype=np.float32)
+    b = np.array([[1, 1, 11, 11, 0.9, 0], [20, 20, 30, 30, 0.8, 0]], dtype=np.float32)  # second one differs in class
+    assert match_detections(a, b) == 1
+    assert match_detections(a, a) == 2
+    assert match_detections(a, b[:0]) == 0
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("torchvision")
+pytest.importorskip("utils.general", reason="needs the YOLOv5 repository on sys.path")
+
+from tiling import frame_regions, infer_regions, merge, tile_regions
+
+PARAMS = {"conf": 0.25, "iou": 0.45, "classes": None, "max_det": 1000}
+
+
+class FakeVersion:
+    """Model version whose backend finds one box in the center and one at the left edge of every input slot."""
+
+    def __init__(self, batch_size, imgsz=(416, 416)):
+        self.batch_size, self.imgsz, self.stride = batch_size, imgsz, 32
+        self.backend = self
+        self.calls = 0
+
+    def input_buffer(self, shape):
+        return np.zeros(shape, dtype=np.float32)
+
+    def infer_batch(self, x):
+        self.calls += 1
+        h, w = self.imgsz
+        rows = [[w / 2, h / 2, 40, 40, 0.9, 0.9, 0.1], [10, h / 2, 20, 40, 0.9, 0.9, 0.1]]  # xywh, obj, 2 classes
+        return np.repeat(np.array(rows, dtype=np.float32)[None], len(x), 0)
+
+
+def test_tiles_cover_the_frame_with_overlap():
+    regions = tile_regions((2160, 3840), tile=416, overlap=0.2)
+    assert len(regions) == 84
+    assert regions[0] == (0, 0, 416, 416) and regions[-1] == (3424, 1744, 3840, 2160)
+    covered = np.zeros((2160, 3840), dtype=bool)
+    for x0, y0, x1, y1 in regions:
+        assert (x1 - x0, y1 - y0) == (416, 416)
+        covered[y0:y1, x0:x1] = True
+    assert covered.all()
+    assert regions[1][0] < regions[0][2]  # neighbours overlap
+
+
+def test_frame_regions():
+    assert frame_regions((300, 400), 416) == [(0, 0, 400, 300)]  # fits in one tile: global view only
+    regions = frame_regions((2160, 3840), 416)
+    assert regions[0] == (0, 0, 3840, 2160) and len(regions) == 85
+
+
+@pytest.mark.parametrize("batch", [1, 2, 8])
+def test_infer_regions_maps_to_frame_and_drops_inner_edges(batch):
+    version = FakeVersion(batch)
+    im0 = np.zeros((1000, 1000, 3), dtype=np.uint8)
+    regions = [(0, 0, 416, 416), (400, 300, 816, 716), (584, 584, 1000, 1000)]
+    det = infer_regions(version, im0, regions, PARAMS, edge_margin=4)
+    boxes = sorted(map(tuple, det[:, :4].tolist()))
+    assert boxes == [
+        (0, 188, 20, 228),  # left edge box of the first region, its left border is the frame edge
+        (188, 188, 228, 228),
+        (588, 488, 628, 528),  # second region: only the center box, the edge box touches an inner border
+        (772, 772, 812, 812),
+    ]
+    assert version.calls == -(-len(regions) // batch)
+
+
+def test_merge_is_class_aware():
+    det = np.array(
+        [[0, 0, 10, 10, 0.9, 0], [1, 1, 11, 11, 0.8, 0], [0, 0, 10, 10, 0.7, 1], [50, 50, 60, 60, 0.6, 0]],
+        dtype=np.float32,
+    )
+    np.testing.assert_array_equal(merge(det, 0.45), det[[0, 2, 3]])
+    assert len(merge(det, 0.45, max_det=2)) == 2
+    assert len(merge(det[:0])) == 0
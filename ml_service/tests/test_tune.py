@@ -0,0 +1,73 @@
+import json
+
+import tune
+
+
+class FakeManifest:
+    def select(self, imgsz, batch, precision, fmt):
+        return {"imgsz": [imgsz, imgsz], "batch": batch, "precision": precision, "stride": 32, "fmt": fmt}
+
+
+def fake_measure(table):
+    """measure() stand-in returning images/s and p99 from `table[(workers, streams, batch)]`."""
+    calls = []
+
+    def measure(backend_name, artifact, workers, threads, streams, images, duration):
+        calls.append((workers, threads, streams, artifact["batch"]))
+        images_per_s, p99 = table[workers, streams, artifact["batch"]]
+        return {"images_per_s": images_per_s, "p50_ms": p99 / 2, "p99_ms": p99}
+
+    return measure, calls
+
+
+TABLE = {
+    (1, 1, 1): (50.0, 20.0),
+    (1, 2, 1): (90.0, 40.0),
+    (2, 1, 1): (95.0, 45.0),
+    (2, 2, 1): (120.0, 200.0),  # fastest, but over a 100ms budget
+}
+
+
+def test_load_profile(tmp_path):
+    assert tune.load_profile(tmp_path / "missing.json") == {}
+    path = tmp_path / "tuning_profile.json"
+    path.write_text(json.dumps({"settings": {"WORKERS": 2}, "measured": {}}))
+    assert tune.load_profile(path) == {"WORKERS": 2}
+
+
+def test_tune_picks_the_fastest_setting_within_the_latency_budget(monkeypatch):
+    measure, calls = fake_measure(TABLE)
+    monkeypatch.setattr(tune, "measure", measure)
+    monkeypatch.setattr(tune.os, "cpu_count", lambda: 8)
+    settings, results = tune.tune(FakeManifest(), workers=(1, 2), streams=(1, 2), max_p99_ms=100)
+    assert settings == {
+        "WORKERS": 2,
+        "GUNICORN_THREADS": 1,
+        "INFERENCE_THREADS": 4,
+        "INFERENCE_STREAMS": 1,
+        "MODEL_BATCH": 1,
+    }
+    assert len(results) == 4
+    assert [t for _, t, _, _ in calls] == [8, 8, 4, 4]  # cores shared between workers
+
+
+def test_tune_without_a_budget_picks_the_fastest(monkeypatch):
+    monkeypatch.setattr(tune, "measure", fake_measure(TABLE)[0])
+    settings, _ = tune.tune(FakeManifest(), workers=(1, 2), streams=(1, 2), threads=2)
+    assert (settings["WORKERS"], settings["INFERENCE_STREAMS"], settings["INFERENCE_THREADS"]) == (2, 2, 2)
+
+
+def test_tune_falls_back_to_the_fastest_when_no_setting_meets_the_budget(monkeypatch, capsys):
+    monkeypatch.setattr(tune, "measure", fake_measure(TABLE)[0])
+    settings, _ = tune.tune(FakeManifest(), workers=(1, 2), streams=(1, 2), max_p99_ms=10)
+    assert (settings["WORKERS"], settings["INFERENCE_STREAMS"]) == (2, 2)
+    assert "No setting meets p99 <= 10" in capsys.readouterr().out
+
+
+def test_tune_compares_batch_sizes_by_images_per_second(monkeypatch):
+    table = {(1, 1, 1): (60.0, 20.0), (1, 1, 8): (40.0, 90.0)}
+    measure, calls = fake_measure(table)
+    monkeypatch.setattr(tune, "measure", measure)
+    settings, _ = tune.tune(FakeManifest(), workers=(1,), streams=(1,), batches=(1, 8))
+    assert settings["MODEL_BATCH"] == 1
+    assert [b for *_, b in calls] == [1, 8]
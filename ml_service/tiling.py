@@ -0,0 +1,107 @@
+"""
+Region-based inference for ml_service: tiled high-resolution mode and the shared region helper.
+
+Downscaling a 4K frame to the model input makes distant plates a few pixels wide. Tiled mode instead cuts the frame
+into overlapping tiles of the model's input size, so small objects are seen at native resolution, and adds one
+downscaled global view for objects larger than a tile. All regions are letterboxed into the slots of the model's
+input batch (a batch-N artifact runs N regions per inference), mapped back to frame coordinates and merged with
+class-aware NMS across regions. Detections cut by a tile border inside the frame are dropped; the overlap lets the
+neighbouring tile see them whole.
+
+Usage:
+    regions = frame_regions((h, w), tile=416, overlap=0.2)  # global view + tiles
+    det = merge(infer_regions(version, im0, regions, params, edge_margin=4), params["iou"], params["max_det"])
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import torch
+import torchvision
+
+YOLOV5_ROOT = Path("/app") / "yolov5"
+if str(YOLOV5_ROOT) not in sys.path:
+    sys.path.append(str(YOLOV5_ROOT))
+
+from utils.general import scale_boxes
+
+from postprocess import detections
+from preprocess import letterbox_geometry, letterbox_into
+
+
+def _starts(length, tile, step):
+    """Window starts along one axis, the last window flush with the end."""
+    if length <= tile:
+        return [0]
+    starts = list(range(0, length - tile, step))
+    return starts + [length - tile]
+
+
+def tile_regions(shape, tile=416, overlap=0.2):
+    """Returns (x0, y0, x1, y1) windows of `tile` pixels covering an (h, w) frame, overlapping by `overlap`."""
+    h, w = shape
+    step = max(1, int(tile * (1 - overlap)))
+    return [
+        (x0, y0, min(x0 + tile, w), min(y0 + tile, h))
+        for y0 in _starts(h, tile, step)
+        for x0 in _starts(w, tile, step)
+    ]
+
+
+def infer_regions(version, im0, regions, params, edge_margin=0):
+    """
+    Returns the (n, 6) xyxy, conf, cls detections of model `version` in each (x0, y0, x1, y1) region of `im0`, in
+    frame coordinates and not merged across regions. Regions are letterboxed at the model's full input size into the
+    slots of its input batch, batch_size regions per inference. With `edge_margin`, detections within that many
+    pixels of a region border that lies inside the frame are dropped.
+    """
+    h0, w0 = im0.shape[:2]
+    batch = version.batch_size
+    x = version.backend.input_buffer((batch, 3, *version.imgsz))
+    out = []
+    for k in range(0, len(regions), batch):
+        chunk = regions[k : k + batch]
+        geometries = []
+        for slot, (x0, y0, x1, y1) in enumerate(chunk):
+            crop = im0[y0:y1, x0:x1]  # view, the letterbox resize is the only copy
+            geometries.append(letterbox_geometry(crop.shape[:2], version.imgsz, stride=version.stride, auto=False))
+            letterbox_into(crop, x[slot], geometries[-1])
+        raw = version.backend.infer_batch(x)  # slots past len(chunk) hold stale regions and are ignored
+        for (x0, y0, x1, y1), g, r in zip(chunk, geometries, raw):
+            det = detections(r, params["conf"], params["iou"], params["classes"], params["max_det"])
+            det[:, :4] = scale_boxes(g.shape, det[:, :4], (y1 - y0, x1 - x0)).round() + [x0, y0, x0, y0]
+            if edge_margin and len(det):
+                inner = np.array([x0 > 0, y0 > 0, x1 < w0, y1 < h0])  # borders inside the frame
+                near = np.abs(det[:, :4] - [x0, y0, x1, y1]) < edge_margin
+                det = det[~(near & inner).any(1)]
+            out.append(det)
+    return np.concatenate(out) if out else np.zeros((0, 6), dtype=np.float32)
+
+
+def merge(det, iou_thres=0.45, max_det=1000):
+    """Class-aware NMS over detections from overlapping regions; returns at most `max_det`, best first."""
+    if not len(det):
+        return det
+    t = torch.from_numpy(np.ascontiguousarray(det, dtype=np.float32))
+    keep = torchvision.ops.batched_nms(t[:, :4], t[:, 4], t[:, 5].long(), iou_thres)[:max_det]
+    return det[keep.numpy()]
+
+
+def frame_regions(shape, tile, overlap=0.2):
+    """Returns the regions tiled mode runs for a frame: the global view, plus the tiles if the frame exceeds one."""
+    h, w = shape
+    regions = [(0, 0, w, h)]  # global view for objects larger than a tile
+    if max(h, w) > tile:
+        regions += tile_regions((h, w), tile, overlap)
+    return regions
+
+
+def detect_tiled(version, im0, params, tile=None, overlap=0.2, edge_margin=4):
+    """
+    Returns merged detections of a global downscaled view plus overlapping `tile`-pixel tiles (the model input size by
+    default) of `im0`. Frames that fit in one tile run as the global view only.
+    """
+    regions = frame_regions(im0.shape[:2], tile or max(version.imgsz), overlap)
+    det = infer_regions(version, im0, regions, params, edge_margin)
+    return merge(det, params["iou"], params["max_det"])
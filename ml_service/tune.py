@@ -0,0 +1,188 @@
+"""
+Tunes inference threads, streams, gunicorn workers and batch size for the node it runs on.
+
+Every combination is measured under concurrent load with the real model and sample images: `workers` processes, like
+gunicorn workers, each load the model with `threads` intra-op threads and `streams` inference streams and drive it
+from `streams` client threads, like gunicorn threads. The fastest setting whose p99 latency is within --max-p99-ms is
+written to the tuning profile, which app.py and gunicorn.conf.py read at startup; explicit environment variables
+still take precedence over it.
+
+Usage:
+    $ python tune.py --workers 1 2 4 --streams 1 2 4 --duration 10 --max-p99-ms 150
+    $ python tune.py --output /app/data/models/tuning_profile.json  # mount the output path to keep it per node
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import platform
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from backends import BACKENDS, DEFAULT_MANIFEST, default_precision, load_backend, load_inputs
+from model_manifest import PRECISIONS, ModelManifest
+
+IMAGES_DIR = Path("/app") / "data" / "images"
+TUNING_PROFILE = Path("/app") / "data" / "models" / "tuning_profile.json"
+
+
+def load_profile(path=TUNING_PROFILE):
+    """Returns the settings of a tuning profile written by tune.py, or {} if there is none."""
+    path = Path(path)
+    return json.loads(path.read_text())["settings"] if path.is_file() else {}
+
+
+def _worker(backend_name, artifact, threads, streams, images, n, duration, ready, start, results):
+    """One simulated gunicorn worker: loads the model, then drives it from `streams` threads for `duration` seconds."""
+    backend = load_backend(backend_name, artifact, threads, os.environ.get("OV_CACHE_DIR") or None, streams)
+    ims = load_inputs(images, tuple(artifact["imgsz"]), artifact["stride"], n)
+    batch = artifact["batch"]
+    ims += ims[: (-len(ims)) % batch]  # fill the last static batch
+    inputs = [np.ascontiguousarray(np.stack(ims[k : k + batch])) for k in range(0, len(ims), batch)]
+    backend.warmup([inputs[0].shape])
+    latencies = []
+
+    def client(k):
+        for x in inputs[:2]:  # warm this thread's infer request
+            backend.infer_batch(x)
+        start.wait()
+        lat, end = [], time.perf_counter() + duration
+        while True:
+            t = time.perf_counter()
+            if t >= end:
+                break
+            backend.infer_batch(inputs[k % len(inputs)])
+            lat.append((time.perf_counter() - t) * 1e3)
+            k += 1
+        latencies.extend(lat)
+
+    clients = [threading.Thread(target=client, args=(k,)) for k in range(streams)]
+    for c in clients:
+        c.start()
+    ready.put(os.getpid())
+    for c in clients:
+        c.join()
+    results.put(latencies)
+
+
+def measure(backend_name, artifact, workers, threads, streams, images, n=32, duration=10.0):
+    """Returns throughput and latency of one setting, with all workers loaded before the clock starts."""
+    ctx = mp.get_context("spawn")  # fresh runtimes, like separately booted gunicorn workers
+    ready, results, start = ctx.Queue(), ctx.Queue(), ctx.Event()
+    args = (backend_name, artifact, threads, streams, images, n, duration, ready, start, results)
+    procs = [ctx.Process(target=_worker, args=args, daemon=True) for _ in range(workers)]
+    for p in procs:
+        p.start()
+    for _ in procs:
+        ready.get()
+    start.set()
+    latencies = np.array([t for _ in procs for t in results.get()])
+    for p in procs:
+        p.join()
+    # app.py puts one request image in slot 0 of a batch, so a batch>1 inference serves one image, not `batch`
+    return {
+        "images_per_s": round(len(latencies) / duration, 1),
+        "batch_slots_per_s": round(len(latencies) * artifact["batch"] / duration, 1),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 2),
+        "requests": len(latencies),
+    }
+
+
+def tune(
+    manifest,
+    backend_name="openvino",
+    imgsz=416,
+    precision="int8",
+    workers=(1, 2, 4),
+    streams=(1, 2, 4),
+    batches=(1,),
+    threads=None,
+    images=IMAGES_DIR,
+    duration=10.0,
+    max_p99_ms=None,
+):
+    """
+    Measures every workers x streams x batch setting and returns (best settings, all results). Each worker gets
+    `threads` intra-op threads, by default an equal share of the CPU cores. Throughput counts one image per
+    inference whatever the batch size, as the service fills only one slot per full-frame request.
+    """
+    cores = os.cpu_count() or 1
+    results = []
+    for batch in batches:
+        artifact = manifest.select(imgsz, batch, precision, fmt=BACKENDS[backend_name].fmt)
+        for w in workers:
+            t = threads or max(1, cores // w)
+            for s in streams:
+                r = measure(backend_name, artifact, w, t, s, images, duration=duration)
+                r.update(WORKERS=w, GUNICORN_THREADS=s, INFERENCE_THREADS=t, INFERENCE_STREAMS=s, MODEL_BATCH=batch)
+                print(
+                    f"workers {w} threads {t} streams {s} batch {batch}: {r['images_per_s']} images/s, "
+                    f"p50 {r['p50_ms']}ms, p99 {r['p99_ms']}ms"
+                )
+                results.append(r)
+    eligible = [r for r in results if max_p99_ms is None or r["p99_ms"] <= max_p99_ms]
+    if not eligible:
+        print(f"No setting meets p99 <= {max_p99_ms}ms, picking the fastest overall")
+        eligible = results
+    best = max(eligible, key=lambda r: r["images_per_s"])
+    keys = ("WORKERS", "GUNICORN_THREADS", "INFERENCE_THREADS", "INFERENCE_STREAMS", "MODEL_BATCH")
+    return {k: best[k] for k in keys}, results
+
+
+def parse_opt():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--manifest", type=str, default=os.environ.get("MODEL_MANIFEST", DEFAULT_MANIFEST))
+    parser.add_argument("--backend", default=os.environ.get("INFERENCE_BACKEND", "openvino"), choices=list(BACKENDS))
+    parser.add_argument("--imgsz", type=int, default=int(os.environ.get("MODEL_IMGSZ", "416")), help="input size")
+    parser.add_argument("--precision", default=os.environ.get("MODEL_PRECISION"), choices=PRECISIONS)
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 2, 4], help="gunicorn worker processes")
+    parser.add_argument("--streams", nargs="+", type=int, default=[1, 2, 4], help="streams and threads per worker")
+    parser.add_argument("--batches", nargs="+", type=int, default=[1], help="batch sizes built in the manifest")
+    parser.add_argument("--threads", type=int, default=None, help="intra-op threads per worker, default cores/workers")
+    parser.add_argument("--images", type=str, default=IMAGES_DIR, help="sample images")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of load per setting")
+    parser.add_argument("--max-p99-ms", type=float, default=None, help="latency budget the profile must meet")
+    parser.add_argument("--output", type=str, default=os.environ.get("TUNING_PROFILE", TUNING_PROFILE))
+    return parser.parse_args()
+
+
+def main(opt):
+    opt.precision = opt.precision or default_precision(opt.backend)
+    settings, results = tune(
+        ModelManifest(opt.manifest),
+        opt.backend,
+        imgsz=opt.imgsz,
+        precision=opt.precision,
+        workers=opt.workers,
+        streams=opt.streams,
+        batches=opt.batches,
+        threads=opt.threads,
+        images=opt.images,
+        duration=opt.duration,
+        max_p99_ms=opt.max_p99_ms,
+    )
+    best = next(r for r in results if all(r[k] == v for k, v in settings.items()))
+    profile = {
+        "settings": settings,
+        "measured": {k: best[k] for k in ("images_per_s", "p50_ms", "p99_ms")},
+        "node": {"cpu_count": os.cpu_count(), "processor": platform.processor(), "machine": platform.machine()},
+        "model": {"backend": opt.backend, "imgsz": opt.imgsz, "precision": opt.precision},
+        "max_p99_ms": opt.max_p99_ms,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+    output = Path(opt.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp = output.with_suffix(".tmp")
+    tmp.write_text(json.dumps(profile, indent=2))
+    os.replace(tmp, output)
+    print(f"Best: {settings} ({best['images_per_s']} images/s, p99 {best['p99_ms']}ms), saved to {output}")
+
+
+if __name__ == "__main__":
+    main(parse_opt())